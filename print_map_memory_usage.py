@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+import argparse
+import gc
+import sys
+import tracemalloc
+
+from pythongame.core.common import HeroId
+from pythongame.core.game_state import NonPlayerCharacter, BuffWithDuration
+from pythongame.core.visual_effects import VisualEffect, Particle
+from pythongame.core.world_entity import WorldEntity
+from pythongame.headless_simulation import HeadlessSimulation
+from pythongame.register_game_data import register_all_game_data
+
+TYPES_TO_PRINT = [WorldEntity, NonPlayerCharacter, BuffWithDuration, VisualEffect, Particle]
+
+
+# Size of the object itself and (if it has one) its attribute dict, but not of the objects that it refers to
+def get_shallow_size(obj) -> int:
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def print_map_memory_usage(map_file: str):
+    register_all_game_data()
+    gc.collect()
+    tracemalloc.start()
+    simulation = HeadlessSimulation('resources/maps/' + map_file, HeroId.MAGE)
+    gc.collect()
+    traced_memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print("Memory allocated while loading %s: %.2f MB" % (map_file, traced_memory / 1024 / 1024))
+    print()
+    print("{:<20}".format("Type") + "{:>10}".format("Count") + "{:>12}".format("Bytes each") +
+          "{:>12}".format("Total KB"))
+    objects = gc.get_objects()
+    for object_type in TYPES_TO_PRINT:
+        instances = [o for o in objects if isinstance(o, object_type)]
+        total_size = sum(get_shallow_size(o) for o in instances)
+        size_each = total_size / len(instances) if instances else 0
+        print("{:<20}".format(object_type.__name__) + "{:>10}".format(len(instances)) +
+              "{:>12.0f}".format(size_each) + "{:>12.0f}".format(total_size / 1024))
+    return simulation
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Print how much memory a loaded map uses")
+    parser.add_argument('--map', default='map1.json')
+    args = parser.parse_args()
+    print_map_memory_usage(args.map)
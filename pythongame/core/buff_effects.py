@@ -16,6 +16,19 @@ class AbstractBuffEffect:
     def apply_end_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
         pass
 
+    # Buffs that do something at a fixed interval (like damage over time) should return the interval here, and do it in
+    # apply_periodic_effect. The game engine schedules those calls, so that the buff doesn't need to poll a timer in
+    # apply_middle_effect every frame.
+    def get_periodic_effect_interval(self) -> Optional[Millis]:
+        return None
+
+    def apply_periodic_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
+        pass
+
+    # apply_middle_effect is only called for buffs that override it
+    def has_middle_effect(self) -> bool:
+        return type(self).apply_middle_effect is not AbstractBuffEffect.apply_middle_effect
+
     def get_buff_type(self):
         raise Exception("This method needs to be overridden")
 
@@ -1014,6 +1014,12 @@ class AbstractScene:
     def run_one_frame(self, _time_passed: Millis) -> Optional[SceneTransition]:
         pass
 
+    # Called before render. The value (from 0 to 1) is how far the real time has come from the last simulated frame
+    # towards the next one, so that scenes can render moving things in between two simulated frames.
+    def set_render_interpolation(self, _interpolation: float):
+        pass
+
+    # Returns the areas of the screen that were changed, or None if all of it may have changed
     def render(self):
         pass
 
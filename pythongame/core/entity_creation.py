@@ -4,7 +4,7 @@ from pythongame.core.common import NpcType, Direction, Sprite, ConsumableType, W
     ItemId, LootTableId
 from pythongame.core.consumable_inventory import ConsumableInventory
 from pythongame.core.game_data import NON_PLAYER_CHARACTERS, CONSUMABLES, POTION_ENTITY_SIZE, \
-    WALLS, PORTALS, HEROES, NpcData
+    PORTALS, HEROES, NpcData
 from pythongame.core.game_state import NonPlayerCharacter, MoneyPileOnGround, ItemOnGround, \
     ConsumableOnGround, Portal, Wall, DecorationEntity, PlayerState, WarpPoint, Chest, Shrine, \
     DungeonEntrance
@@ -74,8 +74,7 @@ def create_dungeon_entrance(pos: Tuple[int, int]) -> DungeonEntrance:
 
 
 def create_wall(wall_type: WallType, pos: Tuple[int, int]) -> Wall:
-    entity = WorldEntity(pos, WALLS[wall_type].size, WALLS[wall_type].sprite)
-    return Wall(wall_type, entity)
+    return Wall(wall_type, pos)
 
 
 def create_hero_world_entity(hero_id: HeroId, pos: Tuple[int, int]) -> WorldEntity:
@@ -1,20 +1,27 @@
-from typing import Dict
+from heapq import nsmallest
+from typing import Dict, Iterator, Iterable, Set
 
 from pygame.rect import Rect
 
 from pythongame.core.common import *
 from pythongame.core.consumable_inventory import ConsumableInventory
-from pythongame.core.game_data import NpcCategory, PlayerLevelBonus
+from pythongame.core.game_data import NpcCategory, PlayerLevelBonus, WALLS
 from pythongame.core.health_and_mana import HealthOrManaResource
 from pythongame.core.item_inventory import ItemInventory
-from pythongame.core.math import boxes_intersect, rects_intersect, get_position_from_center_position, \
-    is_x_and_y_within_distance
+from pythongame.core.math import get_position_from_center_position, is_x_and_y_within_distance, \
+    get_euclidean_distance
 from pythongame.core.quests import QuestId, Quest
+from pythongame.core.static_geometry import StaticGeometry, StaticSprite
 from pythongame.core.talents import TalentsConfig, TalentsState
+from pythongame.core.timer_scheduler import TimerScheduler, ScheduledTimer
 from pythongame.core.world_entity import WorldEntity
 from pythongame.game_data.loot_tables import LootTableId
 
 GRID_CELL_WIDTH = 25
+# Entities are only rendered if their position is within this distance of the camera. It covers the biggest sprites
+# (which can extend 230 pixels from the entity's position), the health bars and quest marks drawn above NPCs, and the
+# small offsets that the camera and entities can have while rendering (camera shake and render interpolation).
+ENTITY_RENDER_MARGIN = 300
 
 
 class LootableOnGround:
@@ -73,6 +80,11 @@ class QuestGiverState(Enum):
 
 
 class NonPlayerCharacter:
+    __slots__ = ('npc_type', 'world_entity', 'health_resource', 'npc_mind', 'active_buffs', 'buffs_to_start',
+                 'invulnerable', 'stun_status', 'npc_category', 'is_enemy', 'is_neutral', 'enemy_loot_table',
+                 'death_sound_id', 'start_position', 'max_distance_allowed_from_start_position', 'is_boss',
+                 'quest_giver_state', 'last_simulated_at')
+
     def __init__(self, npc_type: NpcType, world_entity: WorldEntity, health_resource: HealthOrManaResource,
                  npc_mind, npc_category: NpcCategory,
                  enemy_loot_table: Optional[LootTableId], death_sound_id: Optional[SoundId],
@@ -82,6 +94,8 @@ class NonPlayerCharacter:
         self.health_resource = health_resource
         self.npc_mind = npc_mind
         self.active_buffs: List[BuffWithDuration] = []
+        # Buffs that the game engine hasn't started yet. (They are also in active_buffs.)
+        self.buffs_to_start: List[BuffWithDuration] = []
         self.invulnerable: bool = False
         self.stun_status = StunStatus()
         self.npc_category = npc_category
@@ -93,6 +107,8 @@ class NonPlayerCharacter:
         self.max_distance_allowed_from_start_position = max_distance_allowed_from_start_position  # Only for neutral NPC
         self.is_boss: bool = is_boss
         self.quest_giver_state: Optional[QuestGiverState] = None  # Only for neutral NPC
+        # Game time (see GameEngine) at which the NPC was last simulated. NPCs far from the camera are simulated less often.
+        self.last_simulated_at: Optional[Millis] = None
 
     # TODO There is a cyclic dependancy here between game_state and buff_effects
     def gain_buff_effect(self, buff: Any, duration: Millis):
@@ -101,42 +117,86 @@ class NonPlayerCharacter:
         if existing_buffs_with_this_type:
             existing_buffs_with_this_type[0].set_remaining_duration(duration)
         else:
-            self.active_buffs.append(BuffWithDuration(buff, duration))
+            buff_with_duration = BuffWithDuration(buff, duration)
+            self.active_buffs.append(buff_with_duration)
+            self.buffs_to_start.append(buff_with_duration)
+
+    def cancel_buff_timers(self):
+        for buff in self.active_buffs:
+            buff.cancel_timers()
 
 
+# Walls are only kept as objects while a map is being loaded, generated or saved. In the game world they are stored in
+# the static geometry of the WallsState.
 class Wall:
-    def __init__(self, wall_type: WallType, world_entity: WorldEntity):
+    __slots__ = ('wall_type', 'x', 'y')
+
+    def __init__(self, wall_type: WallType, pos: Tuple[int, int]):
         self.wall_type = wall_type
-        self.world_entity = world_entity
+        self.x = pos[0]
+        self.y = pos[1]
+
+    def get_position(self):
+        return self.x, self.y
 
 
 # TODO There is a cyclic dependancy here between game_state and buff_effects
+# Until the game engine starts the buff (applying its start effect), the remaining duration is stored here. After that,
+# the buff expires through a timer in a TimerScheduler.
 class BuffWithDuration:
+    __slots__ = ('buff_effect', '_time_until_expiration', 'has_been_force_cancelled', '_total_duration',
+                 'has_applied_start_effect', '_timer_scheduler', '_expiration_timer', '_periodic_effect_timer')
+
     def __init__(self, buff_effect: Any, duration: Optional[Millis]):
         self.buff_effect = buff_effect
         self._time_until_expiration: Optional[Millis] = duration
         self.has_been_force_cancelled: bool = False
         self._total_duration: Optional[Millis] = duration
         self.has_applied_start_effect: bool = False
+        self._timer_scheduler: Optional[TimerScheduler] = None
+        self._expiration_timer: Optional[ScheduledTimer] = None
+        self._periodic_effect_timer: Optional[ScheduledTimer] = None
+
+    def start(self, timer_scheduler: TimerScheduler, on_expired: Callable[[Any], None]):
+        self.has_applied_start_effect = True
+        self._timer_scheduler = timer_scheduler
+        self._expiration_timer = timer_scheduler.schedule(self._time_until_expiration, on_expired)
+
+    def start_periodic_effect(self, interval: Millis, apply_periodic_effect: Callable[[Any], None]):
+        self._periodic_effect_timer = self._timer_scheduler.schedule(interval, apply_periodic_effect, interval)
+
+    # A periodic effect that is due at the same time as the buff expires should still happen
+    def stop(self, game_state: Any):
+        if self._periodic_effect_timer:
+            self._timer_scheduler.run_if_due(self._periodic_effect_timer, game_state)
+        self.cancel_timers()
+
+    def cancel_timers(self):
+        if self._expiration_timer:
+            self._expiration_timer.cancel()
+        if self._periodic_effect_timer:
+            self._periodic_effect_timer.cancel()
 
     def force_cancel(self):
         self.has_been_force_cancelled = True
-        self._time_until_expiration = 0
+        self.set_remaining_duration(Millis(0))
 
-    def notify_time_passed(self, time: Millis):
-        self._time_until_expiration -= time
-
-    def has_expired(self) -> bool:
-        return self._time_until_expiration <= 0
+    def get_time_until_expiration(self) -> Millis:
+        if self._expiration_timer:
+            return self._timer_scheduler.get_time_remaining(self._expiration_timer)
+        return self._time_until_expiration
 
     def get_ratio_duration_remaining(self) -> float:
-        return self._time_until_expiration / self._total_duration
+        return self.get_time_until_expiration() / self._total_duration
 
     def change_remaining_duration(self, delta: Millis):
-        self._time_until_expiration = min(self._time_until_expiration + delta, self._total_duration)
+        self.set_remaining_duration(min(self.get_time_until_expiration() + delta, self._total_duration))
 
     def set_remaining_duration(self, time: Millis):
-        self._time_until_expiration = time
+        if self._expiration_timer:
+            self._timer_scheduler.reschedule(self._expiration_timer, time)
+        else:
+            self._time_until_expiration = time
 
     def should_duration_be_visualized_on_enemies(self) -> bool:
         return self._total_duration > 1000
@@ -209,14 +269,6 @@ class PlayerUnlockedNewTalent(GainExpEvent):
     pass
 
 
-class AgentBuffsUpdate:
-    def __init__(self, buffs_that_started: List[BuffWithDuration], buffs_that_were_active: List[BuffWithDuration],
-                 buffs_that_ended: List[BuffWithDuration]):
-        self.buffs_that_started = buffs_that_started
-        self.buffs_that_were_active = buffs_that_were_active
-        self.buffs_that_ended = buffs_that_ended
-
-
 class PlayerState:
     def __init__(self,
                  health_resource: HealthOrManaResource,
@@ -238,8 +290,17 @@ class PlayerState:
         self.consumable_inventory = consumable_inventory
         self.abilities: List[AbilityType] = abilities
         self._active_item_ability: Optional[AbilityType] = None
-        self._ability_cooldowns_remaining: Dict[AbilityType, int] = {ability_type: 0 for ability_type in abilities}
+        # Player buffs and cooldowns are timed here rather than in the GameState, as the player state is carried over
+        # between game states (when entering and leaving dungeons)
+        self.timer_scheduler = TimerScheduler()
+        # Cooldowns are stored as the time (in timer_scheduler) when they end, so that they don't need to be counted
+        # down every frame
+        self._ability_cooldown_end_times: Dict[AbilityType, Millis] = {ability_type: Millis(0)
+                                                                         for ability_type in abilities}
+        self._is_any_ability_cooldown_in_progress = False
         self.active_buffs: List[BuffWithDuration] = []
+        # Buffs that the game engine hasn't started yet. (They are also in active_buffs.)
+        self.buffs_to_start: List[BuffWithDuration] = []
         self.is_invisible = False
         self.stun_status = StunStatus()
         self.item_inventory = item_inventory
@@ -391,7 +452,9 @@ class PlayerState:
         if existing_buffs_with_this_type:
             existing_buffs_with_this_type[0].set_remaining_duration(duration)
         else:
-            self.active_buffs.append(BuffWithDuration(buff, duration))
+            buff_with_duration = BuffWithDuration(buff, duration)
+            self.active_buffs.append(buff_with_duration)
+            self.buffs_to_start.append(buff_with_duration)
         self.notify_buff_observers()
 
     def notify_buff_observers(self):
@@ -411,47 +474,31 @@ class PlayerState:
                 b.force_cancel()
         self.notify_buff_observers()
 
-    def handle_buffs(self, time_passed: Millis):
-        # NOTE: duplication between NPC's and player's buff handling
-        copied_buffs_list = list(self.active_buffs)
-        buffs_that_started = []
-        buffs_that_ended = []
-        buffs_that_were_active = []
-        for buff in copied_buffs_list:
-            buff.notify_time_passed(time_passed)
-            if not buff.has_been_force_cancelled:
-                buffs_that_were_active.append(buff)
-            if not buff.has_applied_start_effect:
-                buffs_that_started.append(buff)
-                buff.has_applied_start_effect = True
-            elif buff.has_expired():
-                self.active_buffs.remove(buff)
-                buffs_that_ended.append(buff)
-        self.notify_buff_observers()
-        return AgentBuffsUpdate(buffs_that_started, buffs_that_were_active, buffs_that_ended)
-
-    def recharge_ability_cooldowns(self, time_passed: Millis):
-        did_update = False
-        for ability_type in self._ability_cooldowns_remaining:
-            if self._ability_cooldowns_remaining[ability_type] > 0:
-                self._ability_cooldowns_remaining[ability_type] -= time_passed
-                did_update = True
-        if did_update:
+    # Should be called once per frame. The cooldown observers (the UI) are notified while any cooldown is in progress,
+    # and once more when the last one has ended.
+    def update_ability_cooldowns(self):
+        if self._is_any_ability_cooldown_in_progress:
+            self._is_any_ability_cooldown_in_progress = any(
+                end_time > self.timer_scheduler.now for end_time in self._ability_cooldown_end_times.values())
             self.notify_cooldown_observers()
 
     def is_ability_on_cooldown(self, ability_type: AbilityType):
-        return self._ability_cooldowns_remaining[ability_type] > 0
+        return self._ability_cooldown_end_times[ability_type] > self.timer_scheduler.now
 
     def add_to_ability_cooldown(self, ability_type: AbilityType, amount: Millis):
-        self._ability_cooldowns_remaining[ability_type] += amount
+        end_time = max(self._ability_cooldown_end_times[ability_type], self.timer_scheduler.now)
+        self._ability_cooldown_end_times[ability_type] = Millis(end_time + amount)
+        self._is_any_ability_cooldown_in_progress = True
         self.notify_cooldown_observers()
 
     def set_ability_cooldown_to_zero(self, ability_type: AbilityType):
-        self._ability_cooldowns_remaining[ability_type] = 0
+        self._ability_cooldown_end_times[ability_type] = self.timer_scheduler.now
         self.notify_cooldown_observers()
 
     def notify_cooldown_observers(self):
-        self.cooldowns_were_updated.notify(self._ability_cooldowns_remaining)
+        now = self.timer_scheduler.now
+        self.cooldowns_were_updated.notify({ability_type: max(0, end_time - now)
+                                            for ability_type, end_time in self._ability_cooldown_end_times.items()})
 
     def gain_exp(self, amount: int) -> List[GainExpEvent]:
         events = []
@@ -500,8 +547,8 @@ class PlayerState:
         self.notify_stats_observers()
 
     def gain_ability(self, ability_type: AbilityType):
-        if ability_type not in self._ability_cooldowns_remaining:
-            self._ability_cooldowns_remaining[ability_type] = 0
+        if ability_type not in self._ability_cooldown_end_times:
+            self._ability_cooldown_end_times[ability_type] = Millis(0)
         self.abilities.append(ability_type)
         self.notify_cooldown_observers()
 
@@ -560,20 +607,14 @@ class PlayerState:
         return upgrade_id in [u.get_upgrade_id() for u in self._upgrades]
 
 
-# TODO Is there a way to handle this better in the view module? This class shouldn't need to masquerade as a WorldEntity
+# Like Wall, this is only used while a map is being loaded, generated or saved (see DecorationsState)
 class DecorationEntity:
+    __slots__ = ('x', 'y', 'sprite')
+
     def __init__(self, pos: Tuple[int, int], sprite: Sprite):
         self.x = pos[0]
         self.y = pos[1]
         self.sprite = sprite
-        # The fields below are needed for the view module to be able to handle this class the same as WorldEntity
-        self.direction = Direction.DOWN  # The view module uses direction to determine which image to render
-        self.movement_animation_progress: float = 0  # The view module uses this to determine which frame to render
-        self.visible = True  # Should only be used to control rendering
-
-    def rect(self):
-        # Used by view module in map_editor
-        return self.x, self.y, 0, 0
 
     def get_position(self):
         return self.x, self.y
@@ -659,6 +700,7 @@ class GameWorldState:
         self.money_piles_on_ground: List[MoneyPileOnGround] = money_piles_on_ground
         self.non_player_characters: List[NonPlayerCharacter] = non_player_characters
         self.entire_world_area = entire_world_area
+        self._npc_buckets = DynamicBuckets(non_player_characters, entire_world_area)
         self.walls_state = WallsState(walls, entire_world_area)
         self.visual_effects = []
         self.decorations_state = DecorationsState(decoration_entities, entire_world_area)
@@ -686,31 +728,71 @@ class GameWorldState:
 
     def add_non_player_character(self, npc: NonPlayerCharacter):
         self.non_player_characters.append(npc)
+        self._npc_buckets.add_item(npc)
+
+    def remove_non_player_character(self, npc: NonPlayerCharacter):
+        self.non_player_characters.remove(npc)
+        self._npc_buckets.remove_item(npc)
+        npc.cancel_buff_timers()
 
     def remove_all_player_summons(self):
+        for npc in self.non_player_characters:
+            if npc.npc_category == NpcCategory.PLAYER_SUMMON:
+                self._npc_buckets.remove_item(npc)
+                npc.cancel_buff_timers()
         self.non_player_characters = [npc for npc in self.non_player_characters
                                       if npc.npc_category != NpcCategory.PLAYER_SUMMON]
 
-    def get_walls_in_sight_of_player(self, camera_world_area: Rect) -> List[WorldEntity]:
-        return self.walls_state.get_walls_in_camera(camera_world_area)
-
-    def get_decorations_to_render(self, camera_world_area: Rect) -> List[DecorationEntity]:
-        return self.decorations_state.get_decorations_in_camera(camera_world_area)
-
-    def get_projectiles_intersecting_with(self, entity: WorldEntity) -> List[Projectile]:
-        return [p for p in self.projectile_entities if boxes_intersect(entity.rect(), p.world_entity.rect())]
+    def get_wall_positions_in_sight_of_player(self, camera_world_area: Rect) -> List[Tuple[int, int]]:
+        return self.walls_state.get_wall_positions_in_camera(camera_world_area)
+
+    # Broadphase for projectile collisions: each projectile is only tested against the NPCs in nearby buckets,
+    # rather than every NPC being tested against every projectile. For each entity, the projectiles it intersects
+    # are listed in the same order as in projectile_entities.
+    def get_projectiles_by_intersecting_npc_or_player(self) -> Dict[WorldEntity, List[Projectile]]:
+        projectiles_by_entity: Dict[WorldEntity, List[Projectile]] = {}
+        for projectile in self.projectile_entities:
+            projectile_rect = projectile.world_entity.pygame_collision_rect
+            for npc in self._npc_buckets.get_items_intersecting_rect(projectile_rect):
+                projectiles_by_entity.setdefault(npc.world_entity, []).append(projectile)
+            if self.player_entity.pygame_collision_rect.colliderect(projectile_rect):
+                projectiles_by_entity.setdefault(self.player_entity, []).append(projectile)
+        return projectiles_by_entity
 
     def get_enemy_intersecting_with(self, entity: WorldEntity) -> List[NonPlayerCharacter]:
-        return [e for e in self.non_player_characters if
-                e.is_enemy and boxes_intersect(e.world_entity.rect(), entity.rect())]
+        return self.get_npcs_intersecting_rect(entity.rect(), NpcCategory.ENEMY)
 
     def get_enemy_intersecting_rect(self, rect: Rect) -> List[NonPlayerCharacter]:
-        return [e for e in self.non_player_characters if e.is_enemy and rects_intersect(e.world_entity.rect(), rect)]
+        return self.get_npcs_intersecting_rect(rect, NpcCategory.ENEMY)
 
     def get_enemies_within_x_y_distance_of(self, distance: int, position: Tuple[int, int]):
-        return [e for e in self.non_player_characters
-                if e.is_enemy
-                and is_x_and_y_within_distance(e.world_entity.get_center_position(), position, distance)]
+        return self.get_npcs_within_x_y_distance_of(distance, position, NpcCategory.ENEMY)
+
+    # The NPC queries below are backed by the NPC buckets, so they only need to look at NPCs close to the queried area.
+    # If a category is given, only NPCs of that category are returned.
+
+    def get_npcs_intersecting_rect(self, rect: Rect, npc_category: Optional[NpcCategory] = None) \
+            -> List[NonPlayerCharacter]:
+        return [npc for npc in self._npc_buckets.get_items_intersecting_rect(rect)
+                if npc_category is None or npc.npc_category == npc_category]
+
+    def get_npcs_within_x_y_distance_of(self, distance: int, position: Tuple[int, int],
+                                        npc_category: Optional[NpcCategory] = None) -> List[NonPlayerCharacter]:
+        area = (position[0] - distance, position[1] - distance, distance * 2, distance * 2)
+        return [npc for npc in self._npc_buckets.get_items_close_to_rect(area)
+                if (npc_category is None or npc.npc_category == npc_category)
+                and is_x_and_y_within_distance(npc.world_entity.get_center_position(), position, distance)]
+
+    def get_npcs_within_radius_of(self, radius: int, position: Tuple[int, int],
+                                  npc_category: Optional[NpcCategory] = None) -> List[NonPlayerCharacter]:
+        return [npc for npc in self.get_npcs_within_x_y_distance_of(radius + 1, position, npc_category)
+                if get_euclidean_distance(npc.world_entity.get_center_position(), position) <= radius]
+
+    def get_nearest_npcs(self, num_npcs: int, position: Tuple[int, int], npc_category: Optional[NpcCategory] = None,
+                         max_distance: Optional[int] = None) -> List[NonPlayerCharacter]:
+        return self._npc_buckets.get_nearest_items(
+            position, num_npcs, max_distance,
+            lambda npc: npc_category is None or npc.npc_category == npc_category)
 
     # NOTE: Very naive brute-force collision checking
     def update_world_entity_position_within_game_world(self, entity: WorldEntity, time_passed: Millis):
@@ -740,18 +822,23 @@ class GameWorldState:
     def would_entity_collide_if_new_pos(self, entity, new_pos_within_world):
         if not self.is_position_within_game_world(new_pos_within_world):
             raise Exception("not within game-world: " + str(new_pos_within_world))
-        old_pos = entity.x, entity.y
-        entity.set_position(new_pos_within_world)
-        walls = self.walls_state.get_walls_close_to_position(entity.get_position())
-        other_entities = [e.world_entity for e in self.non_player_characters] + \
-                         [self.player_entity] + walls + [p.world_entity for p in self.portals] + \
-                         [s.world_entity for s in self.shrines] + \
-                         [w.world_entity for w in self.warp_points] + [c.world_entity for c in self.chests] + \
-                         [e.world_entity for e in self.dungeon_entrances]
-        collision = any([other for other in other_entities if self._entities_collide(entity, other)
-                         and entity is not other])
-        entity.set_position(old_pos)
-        return collision
+        # We check a copy of the entity's rect, rather than moving the entity back and forth, as moving it would
+        # force it to be re-indexed in the NPC buckets
+        new_rect = Rect(entity.pygame_collision_rect)
+        new_rect.x = new_pos_within_world[0]
+        new_rect.y = new_pos_within_world[1]
+        if self.walls_state.does_rect_intersect_with_wall(new_rect):
+            return True
+        if any(npc for npc in self._npc_buckets.get_items_intersecting_rect(new_rect) if npc.world_entity is not entity):
+            return True
+        if self.player_entity is not entity and self.player_entity.pygame_collision_rect.colliderect(new_rect):
+            return True
+        # These entities never move and there are only a few of them, so there's no need to index them
+        for immovable_entities in [self.portals, self.shrines, self.warp_points, self.chests, self.dungeon_entrances]:
+            for e in immovable_entities:
+                if e.world_entity is not entity and e.world_entity.pygame_collision_rect.colliderect(new_rect):
+                    return True
+        return False
 
     def get_within_world(self, pos: Tuple[int, int], size: Tuple[int, int]):
         # TODO extract world area arithmetic
@@ -768,6 +855,9 @@ class GameWorldState:
 
     def remove_dead_npcs(self) -> List[NonPlayerCharacter]:
         npcs_that_died = [npc for npc in self.non_player_characters if npc.health_resource.is_at_or_below_zero()]
+        for npc in npcs_that_died:
+            self._npc_buckets.remove_item(npc)
+            npc.cancel_buff_timers()
         self.non_player_characters = [npc for npc in self.non_player_characters if
                                       not npc.health_resource.is_at_or_below_zero()]
         return npcs_that_died
@@ -791,18 +881,37 @@ class GameWorldState:
         # Optimization: collision checking done with C-code from Pygame
         return a.pygame_collision_rect.colliderect(b.pygame_collision_rect)
 
-    def get_renderable_non_wall_entities(self) -> List[WorldEntity]:
-        return [self.player_entity] + \
-               [p.world_entity for p in self.consumables_on_ground] + \
-               [i.world_entity for i in self.items_on_ground] + \
-               [m.world_entity for m in self.money_piles_on_ground] + \
-               [e.world_entity for e in self.non_player_characters] + \
-               [p.world_entity for p in self.projectile_entities] + \
-               [p.world_entity for p in self.portals] + \
-               [s.world_entity for s in self.shrines] + \
-               [w.world_entity for w in self.warp_points] + \
-               [c.world_entity for c in self.chests] + \
-               [e.world_entity for e in self.dungeon_entrances]
+    # Only the entities that can be visible in the camera are returned (and the player, which is always rendered). NPCs
+    # are looked up in the NPC buckets, so the cost doesn't grow with the number of NPCs on the map.
+    def get_renderable_non_wall_entities(self, camera_world_area: Rect) -> List[WorldEntity]:
+        render_area = camera_world_area.inflate(ENTITY_RENDER_MARGIN * 2, ENTITY_RENDER_MARGIN * 2)
+        entities = [self.player_entity]
+        for objects in [self.consumables_on_ground, self.items_on_ground, self.money_piles_on_ground]:
+            entities += [o.world_entity for o in self._get_objects_in_render_area(objects, render_area)]
+        entities += [npc.world_entity for npc in self.get_npcs_to_render(camera_world_area)]
+        for objects in [self.projectile_entities, self.portals, self.shrines, self.warp_points, self.chests,
+                        self.dungeon_entrances]:
+            entities += [o.world_entity for o in self._get_objects_in_render_area(objects, render_area)]
+        return entities
+
+    # The sprites that are used by anything in the world right now. (More may be used later, by loot for example.)
+    def get_all_sprites(self) -> Set[Sprite]:
+        sprites = {self.player_entity.sprite} if self.player_entity else set()
+        for objects in [self.consumables_on_ground, self.items_on_ground, self.money_piles_on_ground,
+                        self.non_player_characters, self.projectile_entities, self.portals, self.shrines,
+                        self.warp_points, self.chests, self.dungeon_entrances]:
+            sprites.update(o.world_entity.sprite for o in objects)
+        return sprites | self.walls_state.get_all_sprites() | self.decorations_state.get_all_sprites()
+
+    def get_npcs_to_render(self, camera_world_area: Rect) -> List[NonPlayerCharacter]:
+        render_area = camera_world_area.inflate(ENTITY_RENDER_MARGIN * 2, ENTITY_RENDER_MARGIN * 2)
+        return self._get_objects_in_render_area(self._npc_buckets.get_items_close_to_rect(render_area), render_area)
+
+    # Works for anything that has a world_entity. Objects are returned if their entity's position is in the area.
+    @staticmethod
+    def _get_objects_in_render_area(objects: Iterable[Any], render_area: Rect) -> List[Any]:
+        x0, y0, x1, y1 = render_area.x, render_area.y, render_area.right, render_area.bottom
+        return [o for o in objects if x0 <= o.world_entity.x < x1 and y0 <= o.world_entity.y < y1]
 
 
 class GameState:
@@ -819,25 +928,51 @@ class GameState:
         self.camera_world_area = Rect((0, 0), self.camera_size)
         self.camera_shake: CameraShake = None
         self.pathfinder_wall_grid = self._setup_pathfinder_wall_grid(
-            self.game_world.entire_world_area, [w.world_entity for w in game_world.walls_state.walls])
+            self.game_world.entire_world_area, game_world.walls_state.get_all_wall_positions())
+        # The grid is kept up to date when walls are added or removed (for example in the map editor). Notified with
+        # (cell, is_blocked) for every cell that changes, so that the path finder can update itself.
+        self.pathfinder_wall_grid_changed = Observable()
+        game_world.walls_state.position_was_changed.register_observer(self._on_wall_position_changed)
         self.player_spawn_position: Tuple[int, int] = player_spawn_position
         self.is_dungeon = is_dungeon
         self.player_state: PlayerState = player_state
+        # Timers for everything in this game world (like the buffs of NPCs). Player timers are in the player state.
+        self.timer_scheduler = TimerScheduler()
 
     @staticmethod
-    def _setup_pathfinder_wall_grid(entire_world_area: Rect, walls: List[WorldEntity]):
+    def _setup_pathfinder_wall_grid(entire_world_area: Rect, wall_positions: List[Tuple[int, int]]):
         # TODO extract world area arithmetic
         grid_width = entire_world_area.w // GRID_CELL_WIDTH
         grid_height = entire_world_area.h // GRID_CELL_WIDTH
         grid = []
         for x in range(grid_width + 1):
             grid.append((grid_height + 1) * [0])
-        for w in walls:
-            cell_x = (w.x - entire_world_area.x) // GRID_CELL_WIDTH
-            cell_y = (w.y - entire_world_area.y) // GRID_CELL_WIDTH
+        for wall_x, wall_y in wall_positions:
+            cell_x = (wall_x - entire_world_area.x) // GRID_CELL_WIDTH
+            cell_y = (wall_y - entire_world_area.y) // GRID_CELL_WIDTH
             grid[cell_x][cell_y] = 1
         return grid
 
+    def _on_wall_position_changed(self, position: Optional[Tuple[int, int]]):
+        world_area = self.game_world.entire_world_area
+        if position is None:
+            changed_cells = [(x, y) for x, column in enumerate(self.pathfinder_wall_grid)
+                             for y, is_blocked in enumerate(column) if is_blocked]
+        else:
+            changed_cells = [((position[0] - world_area.x) // GRID_CELL_WIDTH,
+                              (position[1] - world_area.y) // GRID_CELL_WIDTH)]
+        for cell_x, cell_y in changed_cells:
+            if not (0 <= cell_x < len(self.pathfinder_wall_grid) and 0 <= cell_y < len(self.pathfinder_wall_grid[0])):
+                continue
+            cell_rect = Rect(world_area.x + cell_x * GRID_CELL_WIDTH, world_area.y + cell_y * GRID_CELL_WIDTH,
+                             GRID_CELL_WIDTH, GRID_CELL_WIDTH)
+            # Like when the grid is set up, a cell is blocked if the top-left corner of any wall is in it
+            is_blocked = any(cell_rect.collidepoint(wall_position) for wall_position
+                             in self.game_world.walls_state.get_wall_positions_in_camera(cell_rect))
+            if self.pathfinder_wall_grid[cell_x][cell_y] != int(is_blocked):
+                self.pathfinder_wall_grid[cell_x][cell_y] = int(is_blocked)
+                self.pathfinder_wall_grid_changed.notify(((cell_x, cell_y), is_blocked))
+
     def modify_hero_stat(self, hero_stat: HeroStat, stat_delta: Union[int, float]):
         if hero_stat == HeroStat.MOVEMENT_SPEED:
             self.game_world.modify_hero_movement_speed(stat_delta)
@@ -845,13 +980,13 @@ class GameState:
             self.player_state.modify_stat(hero_stat, stat_delta)
 
     def get_all_entities_to_render(self) -> List[WorldEntity]:
-        return self.get_walls_in_sight_of_player() + self.game_world.get_renderable_non_wall_entities()
+        return self.game_world.get_renderable_non_wall_entities(self.camera_world_area)
 
-    def get_walls_in_sight_of_player(self) -> List[WorldEntity]:
-        return self.game_world.get_walls_in_sight_of_player(self.camera_world_area)
+    def get_npcs_to_render(self) -> List[NonPlayerCharacter]:
+        return self.game_world.get_npcs_to_render(self.camera_world_area)
 
-    def get_decorations_to_render(self) -> List[DecorationEntity]:
-        return self.game_world.get_decorations_to_render(self.camera_world_area)
+    def get_wall_positions_in_sight_of_player(self) -> List[Tuple[int, int]]:
+        return self.game_world.get_wall_positions_in_sight_of_player(self.camera_world_area)
 
     def handle_camera_shake(self, time_passed: Millis):
         if self.camera_shake is not None:
@@ -897,117 +1032,184 @@ class GameState:
 
 class WallsState:
     def __init__(self, walls: List[Wall], entire_world_area: Rect):
-        self.walls: List[Wall] = walls
-        self._buckets = Buckets([w.world_entity for w in walls], entire_world_area)
-        self._entire_world_area = entire_world_area
+        self._static_geometry = StaticGeometry(entire_world_area)
+        # Notified with the position of a wall that was added or removed (or None if all of them were removed), so
+        # that the view knows which parts of the world need to be rendered again
+        self.position_was_changed = Observable()
+        for wall in walls:
+            self.add_wall(wall)
 
     def add_wall(self, wall: Wall):
-        self.walls.append(wall)
-        self._buckets.add_entity(wall.world_entity)
-
-    def remove_wall(self, wall: Wall):
-        self.walls.remove(wall)
-        self._buckets.remove_entity(wall.world_entity)
+        wall_data = WALLS[wall.wall_type]
+        self._static_geometry.add(wall.wall_type, wall_data.sprite, wall_data.size, wall.get_position())
+        self.position_was_changed.notify(wall.get_position())
 
     def remove_all_from_position(self, position: Tuple[int, int]):
-        for wall in self.get_walls_at_position(position):
-            self.remove_wall(wall)
+        if self._static_geometry.remove_all_at_position(position):
+            self.position_was_changed.notify(position)
 
     def clear(self):
-        self.walls.clear()
-        self._buckets = Buckets([], self._entire_world_area)
+        self._static_geometry.clear()
+        self.position_was_changed.notify(None)
+
+    def get_num_walls(self) -> int:
+        return len(self._static_geometry)
+
+    def get_all_walls(self) -> List[Wall]:
+        return [Wall(wall_type, (x, y)) for wall_type, x, y in self._static_geometry.get_all()]
+
+    def get_all_sprites(self) -> Set[Sprite]:
+        return self._static_geometry.get_all_sprites()
+
+    def get_all_wall_positions(self) -> List[Tuple[int, int]]:
+        return self._static_geometry.get_all_positions()
 
-    # TODO Use _entities_collide?
     def does_entity_intersect_with_wall(self, entity: WorldEntity):
-        nearby_walls = self.get_walls_close_to_position(entity.get_position())
-        return any([w for w in nearby_walls if boxes_intersect(w.rect(), entity.rect())])
+        return self._static_geometry.does_rect_intersect(entity.pygame_collision_rect)
 
-    # TODO Use _entities_collide?
-    def does_rect_intersect_with_wall(self, rect: Rect):
-        nearby_walls = self.get_walls_close_to_position((rect[0], rect[1]))
-        return any([w for w in nearby_walls if rects_intersect(w.rect(), rect)])
+    def does_rect_intersect_with_wall(self, rect: Union[Rect, Tuple[int, int, int, int]]):
+        return self._static_geometry.does_rect_intersect(Rect(rect))
 
-    def get_walls_close_to_position(self, position: Tuple[int, int]) -> List[WorldEntity]:
-        return self._buckets.get_entities_close_to_position(position)
+    def get_wall_sprites_close_to_world_area(self, world_area: Rect) -> List[StaticSprite]:
+        return self._static_geometry.get_sprites_close_to_world_area(world_area)
 
-    def get_walls_in_camera(self, camera_world_area: Rect) -> List[WorldEntity]:
-        return self._buckets.get_entitites_close_to_world_area(camera_world_area)
+    def get_wall_positions_in_camera(self, camera_world_area: Rect) -> List[Tuple[int, int]]:
+        return self._static_geometry.get_positions_close_to_world_area(camera_world_area)
 
     def get_walls_at_position(self, position: Tuple[int, int]) -> List[Wall]:
-        return [w for w in self.walls if w.world_entity.get_position() == position]
+        return [Wall(wall_type, position) for wall_type in self._static_geometry.get_kind_keys_at_position(position)]
 
 
 class DecorationsState:
     def __init__(self, decoration_entities: List[DecorationEntity], entire_world_area: Rect):
-        self.decoration_entities: List[DecorationEntity] = decoration_entities
-        self._buckets = Buckets(decoration_entities, entire_world_area)
-        self._entire_world_area = entire_world_area
+        self._static_geometry = StaticGeometry(entire_world_area)
+        # See WallsState
+        self.position_was_changed = Observable()
+        for decoration in decoration_entities:
+            self.add_decoration(decoration)
 
     def clear(self):
-        self.decoration_entities.clear()
-        self._buckets = Buckets([], self._entire_world_area)
+        self._static_geometry.clear()
+        self.position_was_changed.notify(None)
 
     def add_decoration(self, decoration: DecorationEntity):
-        self.decoration_entities.append(decoration)
-        self._buckets.add_entity(decoration)
+        # Decorations are never collided with, so they don't need a size
+        self._static_geometry.add(decoration.sprite, decoration.sprite, (0, 0), decoration.get_position())
+        self.position_was_changed.notify(decoration.get_position())
+
+    def remove_all_from_position(self, position: Tuple[int, int]):
+        if self._static_geometry.remove_all_at_position(position):
+            self.position_was_changed.notify(position)
+
+    def get_num_decorations(self) -> int:
+        return len(self._static_geometry)
+
+    def get_all_decorations(self) -> List[DecorationEntity]:
+        return [DecorationEntity((x, y), sprite) for sprite, x, y in self._static_geometry.get_all()]
 
-    def remove_decoration(self, decoration: DecorationEntity):
-        self.decoration_entities.remove(decoration)
-        self._buckets.remove_entity(decoration)
+    def get_all_sprites(self) -> Set[Sprite]:
+        return self._static_geometry.get_all_sprites()
 
-    def get_decorations_in_camera(self, camera_world_area: Rect) -> List[DecorationEntity]:
-        return self._buckets.get_entitites_close_to_world_area(camera_world_area)
+    def get_decoration_sprites_close_to_world_area(self, world_area: Rect) -> List[StaticSprite]:
+        return self._static_geometry.get_sprites_close_to_world_area(world_area)
 
     def get_decorations_at_position(self, position: Tuple[int, int]) -> List[DecorationEntity]:
-        return [d for d in self.decoration_entities if d.get_position() == position]
+        return [DecorationEntity(position, sprite)
+                for sprite in self._static_geometry.get_kind_keys_at_position(position)]
 
 
-# This class provides a way to store entities based on their location in the world,
-# which improves performance mainly for collision checking and rendering
-# NOTE: it should only be used for immovable objects (such as walls and floor tiles)
-class Buckets:
+# Stores objects that move around (such as NPCs) based on their location in the world, which improves performance
+# mainly for collision checking. (Walls and decorations are stored in StaticGeometry.) Each stored object must have a
+# world_entity. An object is stored in the bucket that contains its entity's top-left corner, and is moved to another
+# bucket whenever the entity's position changes (see WorldEntity.set_position).
+class DynamicBuckets:
     _BUCKET_WIDTH = 100
     _BUCKET_HEIGHT = 100
 
-    def __init__(self, entities: List[Any], entire_world_area: Rect):
-        self._buckets: Dict[int, Dict[int, List[Any]]] = {}
+    def __init__(self, items: List[Any], entire_world_area: Rect):
+        self._buckets: Dict[Tuple[int, int], List[Any]] = {}
+        self._bucket_index_by_entity: Dict[WorldEntity, Tuple[int, int]] = {}
+        self._item_by_entity: Dict[WorldEntity, Any] = {}
         self.entire_world_area = entire_world_area
-        for x_bucket in range(self.entire_world_area.w // Buckets._BUCKET_WIDTH + 1):
-            self._buckets[x_bucket] = {}
-            for y_bucket in range(self.entire_world_area.h // Buckets._BUCKET_HEIGHT + 1):
-                self._buckets[x_bucket][y_bucket] = []
-        for entity in entities:
-            self.add_entity(entity)
-
-    def add_entity(self, entity: Any):
-        bucket = self._bucket_for_world_position(entity.get_position())
-        bucket.append(entity)
-
-    def remove_entity(self, entity: Any):
-        bucket = self._bucket_for_world_position(entity.get_position())
-        bucket.remove(entity)
-
-    def get_entitites_close_to_world_area(self, world_area: Rect) -> List[Any]:
-        x0_bucket, y0_bucket = self._bucket_index_for_world_position(world_area.topleft)
-        x1_bucket, y1_bucket = self._bucket_index_for_world_position(world_area.bottomright)
-        buckets = self._buckets_between_indices(x0_bucket - 1, x1_bucket + 1, y0_bucket - 1, y1_bucket + 1)
-        return [entity for bucket in buckets for entity in bucket]
-
-    def get_entities_close_to_position(self, position: Tuple[int, int]) -> List[Any]:
-        x_bucket, y_bucket = self._bucket_index_for_world_position(position)
-        buckets = self._buckets_between_indices(x_bucket - 1, x_bucket + 1, y_bucket - 1, y_bucket + 1)
-        return [entity for bucket in buckets for entity in bucket]
-
-    def _buckets_between_indices(self, x0: int, x1: int, y0: int, y1: int) -> List[List[Any]]:
-        for x_bucket in range(max(0, x0), min(x1 + 1, len(self._buckets))):
-            for y_bucket in range(max(0, y0), min(y1 + 1, len(self._buckets[x_bucket]))):
-                yield self._buckets[x_bucket][y_bucket]
-
-    def _bucket_for_world_position(self, world_position: Tuple[int, int]):
-        x_bucket, y_bucket = self._bucket_index_for_world_position(world_position)
-        return self._buckets[x_bucket][y_bucket]
-
-    def _bucket_index_for_world_position(self, world_position: Tuple[int, int]) -> Tuple[int, int]:
-        x_bucket = int(world_position[0] - self.entire_world_area.x) // Buckets._BUCKET_WIDTH
-        y_bucket = int(world_position[1] - self.entire_world_area.y) // Buckets._BUCKET_HEIGHT
+        # Entities can span several buckets, so queries need to look this far up and to the left of the query area
+        self._max_entity_w = 0
+        self._max_entity_h = 0
+        for item in items:
+            self.add_item(item)
+
+    def add_item(self, item: Any):
+        entity = item.world_entity
+        bucket_index = self._bucket_index_for_world_position(entity.x, entity.y)
+        self._buckets.setdefault(bucket_index, []).append(item)
+        self._bucket_index_by_entity[entity] = bucket_index
+        self._item_by_entity[entity] = item
+        self._max_entity_w = max(self._max_entity_w, entity.pygame_collision_rect.w)
+        self._max_entity_h = max(self._max_entity_h, entity.pygame_collision_rect.h)
+        entity.dynamic_buckets = self
+
+    def remove_item(self, item: Any):
+        entity = item.world_entity
+        bucket_index = self._bucket_index_by_entity.pop(entity, None)
+        if bucket_index is not None:
+            self._buckets[bucket_index].remove(item)
+            del self._item_by_entity[entity]
+            entity.dynamic_buckets = None
+
+    def update_entity(self, entity: WorldEntity):
+        old_bucket_index = self._bucket_index_by_entity[entity]
+        new_bucket_index = self._bucket_index_for_world_position(entity.x, entity.y)
+        if new_bucket_index != old_bucket_index:
+            item = self._item_by_entity[entity]
+            self._buckets[old_bucket_index].remove(item)
+            self._buckets.setdefault(new_bucket_index, []).append(item)
+            self._bucket_index_by_entity[entity] = new_bucket_index
+
+    # Returns all items that might intersect with the rect (and some that don't)
+    def get_items_close_to_rect(self, rect: Rect) -> Iterator[Any]:
+        x0_bucket, y0_bucket = self._bucket_index_for_world_position(rect[0] - self._max_entity_w,
+                                                                     rect[1] - self._max_entity_h)
+        x1_bucket, y1_bucket = self._bucket_index_for_world_position(rect[0] + rect[2], rect[1] + rect[3])
+        for x_bucket in range(x0_bucket, x1_bucket + 1):
+            for y_bucket in range(y0_bucket, y1_bucket + 1):
+                bucket = self._buckets.get((x_bucket, y_bucket))
+                if bucket:
+                    yield from bucket
+
+    def get_items_intersecting_rect(self, rect: Rect) -> List[Any]:
+        return [item for item in self.get_items_close_to_rect(rect)
+                if item.world_entity.pygame_collision_rect.colliderect(rect)]
+
+    # Returns (at most) the k items whose entity centers are closest to the position, closest first. The buckets are
+    # searched in growing rings around the position, until no unsearched item can be closer than the k found ones.
+    def get_nearest_items(self, position: Tuple[int, int], k: int, max_distance: Optional[float],
+                          accept_item: Callable[[Any], bool]) -> List[Any]:
+        center_x_bucket, center_y_bucket = self._bucket_index_for_world_position(position[0], position[1])
+        max_ring = max(self.entire_world_area.w // DynamicBuckets._BUCKET_WIDTH,
+                       self.entire_world_area.h // DynamicBuckets._BUCKET_HEIGHT) + 1
+        # An item's center can lie this far from the bucket that it's stored in
+        max_center_offset = max(self._max_entity_w, self._max_entity_h) / 2
+        found: List[Tuple[float, int, Any]] = []
+        for ring in range(max_ring + 1):
+            for x_bucket in range(center_x_bucket - ring, center_x_bucket + ring + 1):
+                is_vertical_edge = x_bucket in (center_x_bucket - ring, center_x_bucket + ring)
+                y_step = 1 if is_vertical_edge else 2 * ring
+                for y_bucket in range(center_y_bucket - ring, center_y_bucket + ring + 1, max(y_step, 1)):
+                    for item in self._buckets.get((x_bucket, y_bucket), []):
+                        if accept_item(item):
+                            center = item.world_entity.pygame_collision_rect.center
+                            distance = get_euclidean_distance(center, position)
+                            if max_distance is None or distance <= max_distance:
+                                found.append((distance, len(found), item))
+            # The closest possible distance to an item in a bucket that hasn't been searched yet
+            unsearched_distance = ring * min(DynamicBuckets._BUCKET_WIDTH, DynamicBuckets._BUCKET_HEIGHT) \
+                                  - max_center_offset
+            if max_distance is not None and unsearched_distance > max_distance:
+                break
+            if len(found) >= k and nsmallest(k, found)[-1][0] <= unsearched_distance:
+                break
+        return [item for (_distance, _i, item) in nsmallest(k, found)]
+
+    def _bucket_index_for_world_position(self, x: float, y: float) -> Tuple[int, int]:
+        x_bucket = int(x - self.entire_world_area.x) // DynamicBuckets._BUCKET_WIDTH
+        y_bucket = int(y - self.entire_world_area.y) // DynamicBuckets._BUCKET_HEIGHT
         return x_bucket, y_bucket
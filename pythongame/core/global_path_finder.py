@@ -1,14 +1,39 @@
 # NPC's share a "global path finder" that needs to be initialized before we start creating NPCs.
 from pythongame.core.pathfinding.grid_astar_pathfinder import GlobalPathFinder
+from pythongame.core.pathfinding.pathfinding_worker_pool import WorkerPoolGlobalPathFinder
 
 path_finder = None
 
+# When this is above 0, paths are found in worker processes rather than in the main loop
+num_pathfinding_worker_processes = 0
+
+
+def configure_pathfinding_worker_processes(num_worker_processes: int):
+    global num_pathfinding_worker_processes
+    num_pathfinding_worker_processes = num_worker_processes
+
 
 def init_global_path_finder():
     global path_finder
-    path_finder = GlobalPathFinder()
+    if num_pathfinding_worker_processes > 0:
+        # Starting the worker processes is slow, so they are kept around when switching to a new map
+        # (set_grid discards everything that belonged to the previous map.)
+        if not isinstance(path_finder, WorkerPoolGlobalPathFinder):
+            close_global_path_finder()
+            path_finder = WorkerPoolGlobalPathFinder(num_pathfinding_worker_processes)
+    else:
+        close_global_path_finder()
+        path_finder = GlobalPathFinder()
     return path_finder
 
 
+# Should be called when the game exits, so that worker processes are stopped
+def close_global_path_finder():
+    global path_finder
+    if path_finder is not None:
+        path_finder.close()
+        path_finder = None
+
+
 def get_global_path_finder():
     return path_finder
@@ -1,3 +1,4 @@
+import math
 import random
 from typing import Tuple, List
 
@@ -93,6 +94,10 @@ def is_x_and_y_within_distance(a: Tuple[int, int], b: Tuple[int, int], distance:
     return abs(a[0] - b[0]) < distance and abs(a[1] - b[1]) < distance
 
 
+def get_euclidean_distance(a: Tuple[int, int], b: Tuple[int, int]) -> float:
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
 # TODO use Vector2
 def get_manhattan_distance(a: Tuple[int, int], b: Tuple[int, int]) -> int:
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
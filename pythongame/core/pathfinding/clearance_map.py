@@ -0,0 +1,81 @@
+from array import array
+from typing import Tuple, Callable, Optional
+
+# Clearance values are capped, so that updating a single cell only affects a small region of the map
+MAX_CLEARANCE = 16
+
+
+# For every cell, a clearance map holds the size of the largest free square that has the cell as its top-left corner.
+# This lets us check if an agent fits at a cell with a single lookup, rather than looking at every cell of its
+# footprint. It's computed once per wall grid, and updated incrementally when a cell changes.
+class ClearanceMap:
+
+    def __init__(self, grid):
+        # Grid is a 2d vector with 1s or 0s (1 == cell is blocked), indexed as grid[x][y]
+        self.grid = grid
+        self.width = len(grid)
+        self.height = len(grid[0]) if grid else 0
+        self._clearance = array('B', [0] * (self.width * self.height))
+        for x in range(self.width - 1, -1, -1):
+            for y in range(self.height - 1, -1, -1):
+                self._compute_clearance(x, y)
+
+    def _compute_clearance(self, x: int, y: int):
+        # Agents are never allowed to touch the last column or row of the grid (see is_free_for_agent), so those
+        # cells are treated as blocked
+        if x >= self.width - 1 or y >= self.height - 1 or self.grid[x][y] == 1:
+            clearance = 0
+        else:
+            i = x * self.height + y
+            clearance = min(MAX_CLEARANCE, 1 + min(self._clearance[i + self.height],  # right
+                                                   self._clearance[i + 1],  # down
+                                                   self._clearance[i + self.height + 1]))  # down-right
+        self._clearance[x * self.height + y] = clearance
+
+    def get_clearance(self, x: int, y: int) -> int:
+        return self._clearance[x * self.height + y]
+
+    def is_free_for_agent(self, x: int, y: int, agent_size: Tuple[int, int]) -> bool:
+        # The agent occupies the cells [x, x + w) and [y, y + h), and needs to stay clear of the last column and row
+        w, h = agent_size
+        if x < 0 or y < 0 or x + w >= self.width or y + h >= self.height:
+            return False
+        clearance = self._clearance
+        i = x * self.height + y
+        if w == h and w <= MAX_CLEARANCE:
+            return clearance[i] >= w
+        # Non-square agents are covered by a row of squares (which may overlap)
+        side = min(w, h, MAX_CLEARANCE)
+        if clearance[i] >= max(w, h):
+            return True
+        if clearance[i] < side:
+            return False
+        for dx in list(range(0, w - side, side)) + [w - side]:
+            for dy in list(range(0, h - side, side)) + [h - side]:
+                if clearance[i + dx * self.height + dy] < side:
+                    return False
+        return True
+
+    # Returns a function that checks if the agent fits at a cell, and treats cells outside of the given bounds as
+    # blocked. This is meant for the hot loops of the pathfinders: for square agents, it's a single lookup.
+    def create_is_free_function(self, agent_size: Tuple[int, int], min_x: Optional[int] = None,
+                                min_y: Optional[int] = None, max_x: Optional[int] = None,
+                                max_y: Optional[int] = None) -> Callable[[int, int], bool]:
+        w, h = agent_size
+        # Narrow the bounds down to where is_free_for_agent could return True
+        min_x = 0 if min_x is None else max(0, min_x)
+        min_y = 0 if min_y is None else max(0, min_y)
+        max_x = self.width - 1 - w if max_x is None else min(max_x, self.width - 1 - w)
+        max_y = self.height - 1 - h if max_y is None else min(max_y, self.height - 1 - h)
+        if w == h and w <= MAX_CLEARANCE:
+            clearance = self._clearance
+            height = self.height
+            return lambda x, y: min_x <= x <= max_x and min_y <= y <= max_y and clearance[x * height + y] >= w
+        return lambda x, y: min_x <= x <= max_x and min_y <= y <= max_y and self.is_free_for_agent(x, y, agent_size)
+
+    def set_cell_blocked(self, x: int, y: int, is_blocked: bool):
+        self.grid[x][y] = 1 if is_blocked else 0
+        # Only cells up and to the left of the changed cell can have squares that reach it
+        for _x in range(x, max(x - MAX_CLEARANCE, -1), -1):
+            for _y in range(y, max(y - MAX_CLEARANCE, -1), -1):
+                self._compute_clearance(_x, _y)
@@ -0,0 +1,88 @@
+from collections import deque
+from typing import Tuple, List, Optional, Callable, Iterator
+
+_UNVISITED = -1
+_BLOCKED = -2
+
+
+# A flow field holds the distance (in number of steps) from each cell around a target cell to the target. It is
+# computed with one breadth-first search out from the target. Any number of agents that are heading for the same
+# target can then share that search: an agent finds its way by walking "downhill" in the field.
+#
+# The search is run with compute_incrementally(), so that it can be spread out over several frames.
+class FlowField:
+
+    def __init__(self, is_cell_free: Callable[[int, int], bool], target_cells: List[Tuple[int, int]],
+                 max_distance_from_target: int):
+        # The field is centered on the first of target_cells, but the first free cell among them is used as target
+        # (similar to how GlobalPathFinder falls back to cells next to the goal, when the goal cell itself is blocked).
+        # The target is set once the field has been computed, and stays None if none of the cells are free.
+        self.target_cell: Optional[Tuple[int, int]] = None
+        self._min_x = target_cells[0][0] - max_distance_from_target
+        self._min_y = target_cells[0][1] - max_distance_from_target
+        self._width = max_distance_from_target * 2 + 1
+        self._distances: List[int] = [_UNVISITED] * (self._width * self._width)
+        self._is_cell_free = is_cell_free
+        self._target_cells = target_cells
+
+    # Yields once for every cell that's expanded
+    def compute_incrementally(self) -> Iterator[int]:
+        is_cell_free = self._is_cell_free
+        distances = self._distances
+        width = self._width
+        min_x = self._min_x
+        min_y = self._min_y
+        queue = deque()
+        for (x, y) in self._target_cells:
+            if self.contains((x, y)) and is_cell_free(x, y):
+                distances[(x - min_x) * width + (y - min_y)] = 0
+                queue.append((x, y))
+                self.target_cell = (x, y)
+                break
+        while queue:
+            yield 1
+            x, y = queue.popleft()
+            next_distance = distances[(x - min_x) * width + (y - min_y)] + 1
+            for (nx, ny) in ((x, y - 1), (x - 1, y), (x + 1, y), (x, y + 1)):
+                i_x = nx - min_x
+                i_y = ny - min_y
+                if 0 <= i_x < width and 0 <= i_y < width:
+                    i = i_x * width + i_y
+                    if distances[i] == _UNVISITED:
+                        if is_cell_free(nx, ny):
+                            distances[i] = next_distance
+                            queue.append((nx, ny))
+                        else:
+                            distances[i] = _BLOCKED
+
+    def contains(self, cell: Tuple[int, int]) -> bool:
+        return 0 <= cell[0] - self._min_x < self._width and 0 <= cell[1] - self._min_y < self._width
+
+    # Returns the number of steps from the cell to the target, or None if the target can't be reached from the cell
+    def get_distance(self, cell: Tuple[int, int]) -> Optional[int]:
+        if not self.contains(cell):
+            return None
+        distance = self._distances[(cell[0] - self._min_x) * self._width + (cell[1] - self._min_y)]
+        return distance if distance >= 0 else None
+
+    # Follows the field downhill from the start cell, and returns the cells along the way (starting with the start
+    # cell, and ending with the target cell). Similar to A*, the start cell itself doesn't need to be free.
+    def get_path_from(self, start_cell: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        path = [start_cell]
+        current_cell = start_cell
+        current_distance = self.get_distance(start_cell)
+        while current_distance != 0:
+            x, y = current_cell
+            best_neighbor = None
+            best_distance = current_distance
+            for neighbor in ((x, y - 1), (x - 1, y), (x + 1, y), (x, y + 1)):
+                distance = self.get_distance(neighbor)
+                if distance is not None and (best_distance is None or distance < best_distance):
+                    best_neighbor = neighbor
+                    best_distance = distance
+            if best_neighbor is None:
+                return None
+            path.append(best_neighbor)
+            current_cell = best_neighbor
+            current_distance = best_distance
+        return path
@@ -1,31 +1,54 @@
-from typing import Tuple, Dict, List, Any, Optional
+import time
+from collections import OrderedDict
+from heapq import heappush, heappop
+from typing import Tuple, Dict, List, Any, Optional, Callable, Generator
 
 from pythongame.core.pathfinding.astar import AStar
+from pythongame.core.pathfinding.clearance_map import ClearanceMap, MAX_CLEARANCE
+from pythongame.core.pathfinding.flow_field import FlowField
+from pythongame.core.pathfinding.hierarchical_pathfinder import HierarchicalPathFinder
+from pythongame.core.pathfinding.path_smoothing import get_corner_waypoints
+
+# Flow fields cover this many cells in each direction from their target. That's enough to cover all NPCs that are
+# close enough to the camera to be active.
+FLOW_FIELD_MAX_DISTANCE_FROM_TARGET = 30
+
+# Most NPCs head for the player, but some head for a summon (or for an enemy, in the case of summons)
+MAX_NUM_CACHED_FLOW_FIELDS = 8
+
+# Path requests are served until either of these budgets runs out, and then the current search is resumed next frame.
+# (An expansion is roughly one cell visited by a search.)
+PATHFINDING_MAX_EXPANSIONS_PER_FRAME = 5000
+PATHFINDING_MAX_MILLIS_PER_FRAME = 3
 
 
 class GridBasedAStar(AStar):
 
-    def __init__(self, grid, agent_size: Tuple[int, int]):
-        # Grid is a 2d vector with 1s or 0s.
+    def __init__(self, clearance_map: ClearanceMap, agent_size: Tuple[int, int]):
+        # The clearance map is built from a grid, which is a 2d vector with 1s or 0s.
         # 1 == cell is blocked
         # 0 == cell is free
         # We can create the grid based on wall positions
         # Wall size is (50, 50) and all walls are placed on the (50, 50) grid
-        self.grid = grid
+        self.clearance_map = clearance_map
         self.agent_size = agent_size
-        self._cache_is_cell_free: Dict[Tuple[int, int], bool] = {}
+        self._is_cell_free_anywhere = clearance_map.create_is_free_function(agent_size)
 
         # Need to be initialized before running pathfinder
         self.min_x = 0
         self.min_y = 0
         self.max_x = 0
         self.max_y = 0
+        self._is_cell_free = None
+        self.set_pathfinding_bounds(0, 0, 0, 0)
 
     def set_pathfinding_bounds(self, min_x, min_y, max_x, max_y):
         self.min_x = min_x
         self.min_y = min_y
         self.max_x = max_x
         self.max_y = max_y
+        # Ignore cells that are too far out, to save resources. If agent strays too far, the path is aborted.
+        self._is_cell_free = self.clearance_map.create_is_free_function(self.agent_size, min_x, min_y, max_x, max_y)
 
     def heuristic_cost_estimate(self, current, goal):
         return abs(current[0] - goal[0]) + abs(current[1] - goal[1])
@@ -43,69 +66,303 @@ class GridBasedAStar(AStar):
         ]
         return [cell for cell in adjacent_cells if self._is_cell_free(cell[0], cell[1])]
 
-    def _is_cell_free(self, x, y):
-        # Ignore cells that are too far out, to save resources. If agent strays too far, the path is aborted.
-        if not (self.min_x <= x <= self.max_x and self.min_y <= y <= self.max_y):
-            return False
-
-        if (x, y) in self._cache_is_cell_free:
-            return self._cache_is_cell_free[(x, y)]
-        else:
-            is_free = self._compute_is_cell_free(x, y)
-            self._cache_is_cell_free[(x, y)] = is_free
-            return is_free
-
-    def _compute_is_cell_free(self, x, y):
-        # Check that all relevant cells are within the map
-        if x < 0 or y < 0 or x + self.agent_size[0] >= len(self.grid) or y + self.agent_size[1] >= len(self.grid[x]):
-            return False
-        for _x in range(x, x + self.agent_size[0]):
-            for _y in range(y, y + self.agent_size[1]):
-                # Check if there is a wall at cell: if so, it's not free
-                if self.grid[_x][_y] == 1:
-                    return False
-        return True
+    # Unlike _is_cell_free, this doesn't depend on the current pathfinding bounds
+    def is_cell_free_for_agent(self, x, y):
+        return self._is_cell_free_anywhere(x, y)
+
+    def find_path_within_bounds(self, start, goal, bounds: Tuple[int, int, int, int]) -> Optional[List[Any]]:
+        self.set_pathfinding_bounds(*bounds)
+        result = self.astar(start, goal)
+        if result is None:
+            return None
+        return list(result)
+
+
+# Jump Point Search for the 4-connected uniform-cost grid. Rather than adding every neighbouring cell to the open set,
+# the search "jumps" along straight lines and only stops at cells where the path might need to turn (jump points).
+# Paths have the same lengths as with a breadth-first search, but long corridors and open areas only cost a few search
+# nodes.
+#
+# Among the shortest paths, there's always one that only turns from a horizontal move to a vertical move where it
+# couldn't have turned one step earlier (the cell diagonally behind it is blocked). Otherwise the two moves could be
+# swapped without making the path longer. So horizontal jumps only stop where a vertical passage opens up, while
+# vertical jumps look for horizontal jump points at every step. (This is the same pruning as the "never move
+# diagonally" JPS variant in PathFinding.js)
+#
+# As the directions that are searched from a jump point depend on the direction that it was reached from, the search
+# nodes are (cell, direction) pairs rather than cells. Otherwise, reaching a cell from one direction would hide an
+# equally short path that reaches it from another direction and needs to continue in a way that the first one doesn't.
+class GridBasedJumpPointSearch(GridBasedAStar):
+
+    def astar(self, start, goal, reverse_path=False):
+        if start == goal:
+            return [start]
+        start_node = (start, None)
+        gscores = {start_node: 0}
+        came_from = {}
+        closed = set()
+        # Entries are (fscore, entry number, gscore, node). A node is pushed again whenever its gscore improves, and
+        # the stale entries are skipped when they're popped.
+        open_set = [(self.heuristic_cost_estimate(start, goal), 0, 0, start_node)]
+        num_entries = 1
+        while open_set:
+            _, _, gscore, node = heappop(open_set)
+            if node in closed or gscore > gscores[node]:
+                continue
+            cell, direction = node
+            if cell == goal:
+                jump_points = [cell]
+                while node in came_from:
+                    node = came_from[node]
+                    jump_points.append(node[0])
+                return self._expand_path(list(reversed(jump_points)))
+            closed.add(node)
+            for next_direction in self._pruned_directions(direction):
+                jump_point = self._jump(cell, next_direction, goal)
+                if jump_point is None:
+                    continue
+                neighbor = (jump_point, next_direction)
+                if neighbor in closed:
+                    continue
+                tentative_gscore = gscore + self.heuristic_cost_estimate(cell, jump_point)
+                if tentative_gscore >= gscores.get(neighbor, tentative_gscore + 1):
+                    continue
+                came_from[neighbor] = node
+                gscores[neighbor] = tentative_gscore
+                heappush(open_set, (tentative_gscore + self.heuristic_cost_estimate(jump_point, goal), num_entries,
+                                    tentative_gscore, neighbor))
+                num_entries += 1
+        return None
+
+    @staticmethod
+    def _pruned_directions(direction) -> List[Tuple[int, int]]:
+        if direction is None:
+            return [(0, -1), (-1, 0), (1, 0), (0, 1)]
+        if direction[0] != 0:
+            return [(0, -1), (0, 1), direction]
+        return [(-1, 0), (1, 0), direction]
+
+    def _jump(self, node, direction, goal) -> Optional[Tuple[int, int]]:
+        if direction[0] != 0:
+            return self._jump_horizontally(node[0], node[1], direction[0], goal)
+        return self._jump_vertically(node[0], node[1], direction[1], goal)
+
+    def _jump_horizontally(self, x, y, dx, goal) -> Optional[Tuple[int, int]]:
+        is_free = self._is_cell_free
+        while True:
+            x += dx
+            if not is_free(x, y):
+                return None
+            if (x, y) == goal:
+                return x, y
+            # Forced neighbour: a vertical passage opens up, that couldn't be reached as cheaply from the previous cell
+            if (is_free(x, y - 1) and not is_free(x - dx, y - 1)) or (is_free(x, y + 1) and not is_free(x - dx, y + 1)):
+                return x, y
+
+    def _jump_vertically(self, x, y, dy, goal) -> Optional[Tuple[int, int]]:
+        is_free = self._is_cell_free
+        while True:
+            y += dy
+            if not is_free(x, y):
+                return None
+            if (x, y) == goal:
+                return x, y
+            if (is_free(x - 1, y) and not is_free(x - 1, y - dy)) or (is_free(x + 1, y) and not is_free(x + 1, y - dy)):
+                return x, y
+            if self._jump_horizontally(x, y, 1, goal) or self._jump_horizontally(x, y, -1, goal):
+                return x, y
+
+    @staticmethod
+    def _expand_path(jump_points: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        # Consecutive jump points are always on a straight line. Callers expect every cell along the path.
+        path = [jump_points[0]]
+        for (x, y) in jump_points[1:]:
+            prev_x, prev_y = path[-1]
+            dx = _sign(x - prev_x)
+            dy = _sign(y - prev_y)
+            while (prev_x, prev_y) != (x, y):
+                prev_x += dx
+                prev_y += dy
+                path.append((prev_x, prev_y))
+        return path
+
+
+class _PathRequest:
+    def __init__(self, requester: Any, entity_size: Tuple[int, int], start_cell: Tuple[int, int],
+                 goal_cell: Tuple[int, int], on_path_found: Callable[[Optional[List[Any]]], None]):
+        self.requester = requester
+        self.entity_size = entity_size
+        self.start_cell = start_cell
+        self.goal_cell = goal_cell
+        self.on_path_found = on_path_found
+        self.is_cancelled = False
 
 
 # One instance of this class is shared by all enemies. This should allow for better caching of computations
+#
+# Rather than searching right away, NPCs request paths, and the requests are then served with a limited budget per
+# frame (see serve_path_requests). This prevents hitches when many NPCs need new paths in the same frame.
 class GlobalPathFinder:
-    def __init__(self):
+    def __init__(self, use_flow_fields: bool = True, use_jump_point_search: bool = False,
+                 max_expansions_per_frame: int = PATHFINDING_MAX_EXPANSIONS_PER_FRAME,
+                 max_millis_per_frame: float = PATHFINDING_MAX_MILLIS_PER_FRAME):
         self.grid = None  # grid must be set before you can use the pathfinder
+        self.clearance_map: ClearanceMap = None
         self.astars_by_entity_size: Dict[Tuple[int, int], GridBasedAStar] = {}
+        # Paths that don't fit in a flow field are found with HPA*, which uses the grid A* within small clusters
+        self._hierarchical_pathfinders_by_entity_size: Dict[Tuple[int, int], HierarchicalPathFinder] = {}
+        # When enabled, agents that are heading for the same cell share one flow field instead of each running A*
+        self.use_flow_fields = use_flow_fields
+        self._flow_fields: Dict[Tuple[Tuple[int, int], Tuple[int, int]], FlowField] = OrderedDict()
+        # Jump Point Search finds paths of the same length as A* while visiting far fewer nodes. Within the small
+        # bounding box that paths are searched in, plain A* still tends to be faster in wall-clock time though.
+        self.use_jump_point_search = use_jump_point_search
+        self.max_expansions_per_frame = max_expansions_per_frame
+        self.max_millis_per_frame = max_millis_per_frame
+        # Heap of (priority, request number, request). Lower priority values are served first.
+        self._path_requests: List[Tuple[float, int, _PathRequest]] = []
+        self._path_requests_by_requester: Dict[Any, _PathRequest] = {}
+        self._num_path_requests = 0
+        self._current_request: Optional[_PathRequest] = None
+        self._current_search: Optional[Generator[int, None, Optional[List[Any]]]] = None
 
     def set_grid(self, grid):
         self.grid = grid
+        self.clearance_map = ClearanceMap(grid)
+        self.astars_by_entity_size.clear()
+        self._hierarchical_pathfinders_by_entity_size.clear()
+        self._flow_fields.clear()
+        self._path_requests.clear()
+        self._path_requests_by_requester.clear()
+        self._current_request = None
+        self._current_search = None
+
+    # Releases any resources held by the path finder (see WorkerPoolGlobalPathFinder). There's nothing to release here.
+    def close(self):
+        pass
+
+    # Use this when a wall is added or removed, rather than changing the grid directly
+    def set_cell_blocked(self, cell: Tuple[int, int], is_blocked: bool):
+        x, y = cell
+        self.clearance_map.set_cell_blocked(x, y, is_blocked)
+        self._flow_fields.clear()
+        for (w, h), hierarchical_pathfinder in self._hierarchical_pathfinders_by_entity_size.items():
+            # Agents that overlap with the cell (and agents that are placed at cells whose clearance was recomputed)
+            # may now fit, or not fit, where they did before
+            margin = max(w, h, MAX_CLEARANCE) - 1
+            hierarchical_pathfinder.update_area(x - margin, y - margin, x, y)
 
     def register_entity_size(self, size: Tuple[int, int]):
         if not size in self.astars_by_entity_size:
-            self.astars_by_entity_size[size] = GridBasedAStar(self.grid, size)
+            astar_class = GridBasedJumpPointSearch if self.use_jump_point_search else GridBasedAStar
+            astar = astar_class(self.clearance_map, size)
+            self.astars_by_entity_size[size] = astar
+            self._hierarchical_pathfinders_by_entity_size[size] = self._create_hierarchical_pathfinder(astar)
+
+    def _create_hierarchical_pathfinder(self, astar: GridBasedAStar) -> HierarchicalPathFinder:
+        return HierarchicalPathFinder(astar.is_cell_free_for_agent, astar.find_path_within_bounds,
+                                      self.clearance_map.width, self.clearance_map.height)
+
+    # The path is passed to on_path_found once it has been found (which may take a few frames). A new request from the
+    # same requester replaces the old one. Requests with lower priority values are served first.
+    def request_path(self, requester: Any, entity_size: Tuple[int, int], start_cell: Tuple[int, int],
+                     goal_cell: Tuple[int, int], priority: float,
+                     on_path_found: Callable[[Optional[List[Any]]], None]):
+        if requester in self._path_requests_by_requester:
+            self._path_requests_by_requester[requester].is_cancelled = True
+        request = _PathRequest(requester, entity_size, start_cell, goal_cell, on_path_found)
+        self._path_requests_by_requester[requester] = request
+        heappush(self._path_requests, (priority, self._num_path_requests, request))
+        self._num_path_requests += 1
+
+    def has_pending_path_requests(self) -> bool:
+        return self._current_search is not None or bool(self._path_requests)
+
+    # Should be called once per frame
+    def serve_path_requests(self):
+        deadline = time.perf_counter() + self.max_millis_per_frame / 1000
+        expansions_left = self.max_expansions_per_frame
+        while expansions_left > 0 and time.perf_counter() < deadline:
+            if self._current_search is None or self._current_request.is_cancelled:
+                if not self._start_next_search():
+                    return
+            try:
+                expansions_left -= next(self._current_search)
+            except StopIteration as e:
+                request = self._current_request
+                self._current_request = None
+                self._current_search = None
+                if self._path_requests_by_requester.get(request.requester) is request:
+                    del self._path_requests_by_requester[request.requester]
+                request.on_path_found(e.value)
+
+    def _start_next_search(self) -> bool:
+        self._current_request = None
+        self._current_search = None
+        while self._path_requests:
+            _, _, request = heappop(self._path_requests)
+            if not request.is_cancelled:
+                self._current_request = request
+                self._current_search = self._find_path_incrementally(
+                    request.entity_size, request.start_cell, request.goal_cell)
+                return True
+        return False
 
+    # Reduces a path to the cells where the agent needs to turn (see path_smoothing.py)
+    def get_corner_waypoints(self, entity_size: Tuple[int, int], path: List[Any]) -> List[Any]:
+        return get_corner_waypoints(path, self.astars_by_entity_size[entity_size].is_cell_free_for_agent)
+
+    # Finds the path right away, regardless of the per-frame budget
     def run(self, entity_size: Tuple[int, int], start_cell: Tuple[int, int], goal_cell: Tuple[int, int]) \
             -> Optional[List[Any]]:
+        search = self._find_path_incrementally(entity_size, start_cell, goal_cell)
+        try:
+            while True:
+                next(search)
+        except StopIteration as e:
+            return e.value
+
+    def _find_path_incrementally(self, entity_size: Tuple[int, int], start_cell: Tuple[int, int],
+                                 goal_cell: Tuple[int, int]) -> Generator[int, None, Optional[List[Any]]]:
+        if self.use_flow_fields:
+            flow_field = yield from self._get_flow_field(entity_size, goal_cell)
+            if flow_field.contains(start_cell):
+                path = flow_field.get_path_from(start_cell)
+                # The field only reaches so far from the target, so it may not have a path even though one exists
+                if path is not None:
+                    return path
 
+        # The goal cell is often blocked for the agent (for example when the player stands next to a wall). In that
+        # case we head for a cell next to it instead.
         astar = self.astars_by_entity_size[entity_size]
-        path_max_distance_from_start = 20
-        astar.set_pathfinding_bounds(start_cell[0] - path_max_distance_from_start,
-                                     start_cell[1] - path_max_distance_from_start,
-                                     start_cell[0] + path_max_distance_from_start,
-                                     start_cell[1] + path_max_distance_from_start)
-        result = astar.astar(start_cell, goal_cell)
-
-        # TODO: Handle this in a better way
-        # HACK:
-        if result is None:
-            # print("Couldn't find path. Trying with position right above player instead.")
-            goal_cell_2 = (goal_cell[0], goal_cell[1] - 1)
-            result = astar.astar(start_cell, goal_cell_2)
-            if result is None:
-                goal_cell_3 = (goal_cell[0] - 1, goal_cell[1])
-                result = astar.astar(start_cell, goal_cell_3)
+        for target_cell in _get_target_cells(goal_cell):
+            if astar.is_cell_free_for_agent(target_cell[0], target_cell[1]):
+                hierarchical_pathfinder = self._hierarchical_pathfinders_by_entity_size[entity_size]
+                return (yield from hierarchical_pathfinder.find_path_incrementally(start_cell, target_cell))
+        return None
 
-        if result is None:
-            return None
+    def _get_flow_field(self, entity_size: Tuple[int, int], goal_cell: Tuple[int, int]) \
+            -> Generator[int, None, FlowField]:
+        # A new field is only computed when the goal has moved to another cell
+        key = (entity_size, goal_cell)
+        if key in self._flow_fields:
+            self._flow_fields.move_to_end(key)
+            return self._flow_fields[key]
+        astar = self.astars_by_entity_size[entity_size]
+        flow_field = FlowField(astar.is_cell_free_for_agent, _get_target_cells(goal_cell),
+                               FLOW_FIELD_MAX_DISTANCE_FROM_TARGET)
+        yield from flow_field.compute_incrementally()
+        # Only fields that have been computed completely are put in the cache
+        self._flow_fields[key] = flow_field
+        if len(self._flow_fields) > MAX_NUM_CACHED_FLOW_FIELDS:
+            self._flow_fields.popitem(last=False)
+        return flow_field
+
+
+# The goal cell, followed by the cells that we fall back to if the goal cell is blocked
+def _get_target_cells(goal_cell: Tuple[int, int]) -> List[Tuple[int, int]]:
+    return [goal_cell, (goal_cell[0], goal_cell[1] - 1), (goal_cell[0] - 1, goal_cell[1])]
 
-        path_list = []
-        for x in result:
-            path_list.append(x)
 
-        return path_list
+def _sign(value: int) -> int:
+    return (value > 0) - (value < 0)
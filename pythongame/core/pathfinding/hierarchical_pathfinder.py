@@ -0,0 +1,258 @@
+from collections import deque, defaultdict
+from heapq import heappush, heappop
+from typing import Tuple, Dict, List, Optional, Callable, Generator
+
+# The grid is divided into square clusters with this many cells per side
+CLUSTER_SIZE = 10
+
+# An entrance that's wider than this gets a transition at each end, rather than a single one in the middle
+MAX_ENTRANCE_WIDTH_WITH_SINGLE_TRANSITION = 6
+
+Cell = Tuple[int, int]
+
+# (start_cell, goal_cell, (min_x, min_y, max_x, max_y)) -> path, or None if there's no path within the bounds
+FindPathWithinBounds = Callable[[Cell, Cell, Tuple[int, int, int, int]], Optional[List[Cell]]]
+
+
+# Hierarchical pathfinding (HPA*) on top of a grid pathfinder. The grid is divided into clusters, and the cells where
+# an agent can pass from one cluster to the next ("transitions") form an abstract graph. A long path is first found
+# in the abstract graph, and then refined by running the grid pathfinder within one cluster at a time.
+#
+# Transitions are found up front, as that only involves looking at the borders between clusters. Distances between
+# the transitions within a cluster are computed the first time that a search passes through the cluster. When walls
+# change, only the clusters around the change are updated (see update_area).
+#
+# Searches are run with find_path_incrementally(), so that they can be spread out over several frames.
+class HierarchicalPathFinder:
+
+    def __init__(self, is_cell_free: Callable[[int, int], bool], find_path_within_bounds: FindPathWithinBounds,
+                 grid_width: int, grid_height: int):
+        self._is_cell_free = is_cell_free
+        self._find_path_within_bounds = find_path_within_bounds
+        self._grid_width = grid_width
+        self._grid_height = grid_height
+        self._transitions_by_cluster: Dict[Cell, List[Cell]] = defaultdict(list)
+        self._inter_cluster_edges: Dict[Cell, List[Cell]] = defaultdict(list)
+        self._intra_cluster_edges_by_cluster: Dict[Cell, Dict[Cell, List[Tuple[Cell, int]]]] = {}
+        self._find_transitions()
+
+    def _find_transitions(self):
+        # Vertical borders (between a cluster and the cluster to the right of it)
+        for border_x in range(CLUSTER_SIZE - 1, self._grid_width - 1, CLUSTER_SIZE):
+            for cluster_y in range(0, self._grid_height, CLUSTER_SIZE):
+                cells_along_border = [(border_x, y) for y in range(cluster_y, min(cluster_y + CLUSTER_SIZE,
+                                                                                  self._grid_height))]
+                self._find_transitions_along_border(cells_along_border, (1, 0))
+        # Horizontal borders (between a cluster and the cluster below it)
+        for border_y in range(CLUSTER_SIZE - 1, self._grid_height - 1, CLUSTER_SIZE):
+            for cluster_x in range(0, self._grid_width, CLUSTER_SIZE):
+                cells_along_border = [(x, border_y) for x in range(cluster_x, min(cluster_x + CLUSTER_SIZE,
+                                                                                  self._grid_width))]
+                self._find_transitions_along_border(cells_along_border, (0, 1))
+
+    def _find_transitions_along_border(self, cells_along_border: List[Cell], offset_across_border: Cell):
+        entrance = []
+        for (x, y) in cells_along_border:
+            if self._is_cell_free(x, y) and self._is_cell_free(x + offset_across_border[0],
+                                                               y + offset_across_border[1]):
+                entrance.append((x, y))
+            else:
+                self._add_transitions_for_entrance(entrance, offset_across_border)
+                entrance = []
+        self._add_transitions_for_entrance(entrance, offset_across_border)
+
+    def _add_transitions_for_entrance(self, entrance: List[Cell], offset_across_border: Cell):
+        if not entrance:
+            return
+        if len(entrance) > MAX_ENTRANCE_WIDTH_WITH_SINGLE_TRANSITION:
+            cells = [entrance[0], entrance[-1]]
+        else:
+            cells = [entrance[len(entrance) // 2]]
+        for cell in cells:
+            other_cell = (cell[0] + offset_across_border[0], cell[1] + offset_across_border[1])
+            self._add_transition(cell, other_cell)
+            self._add_transition(other_cell, cell)
+
+    # Call this when cells within the area may have become free or blocked for the agent. The transitions along the
+    # borders of the clusters that overlap with the area are found again, and the distances within those clusters (and
+    # their neighbours, whose transitions may have changed) are computed again the next time they're needed.
+    def update_area(self, min_x: int, min_y: int, max_x: int, max_y: int):
+        min_x, min_y = max(min_x, 0), max(min_y, 0)
+        max_x, max_y = min(max_x, self._grid_width - 1), min(max_y, self._grid_height - 1)
+        if min_x > max_x or min_y > max_y:
+            return
+        min_cluster_x, min_cluster_y = _get_cluster((min_x, min_y))
+        max_cluster_x, max_cluster_y = _get_cluster((max_x, max_y))
+        updated_borders = set()
+        for cluster_x in range(min_cluster_x, max_cluster_x + 1):
+            for cluster_y in range(min_cluster_y, max_cluster_y + 1):
+                # Borders are identified by the cluster on their left / top side
+                for border in (((cluster_x, cluster_y), (1, 0)), ((cluster_x - 1, cluster_y), (1, 0)),
+                               ((cluster_x, cluster_y), (0, 1)), ((cluster_x, cluster_y - 1), (0, 1))):
+                    if border in updated_borders:
+                        continue
+                    updated_borders.add(border)
+                    cells_along_border = self._get_cells_along_border(*border)
+                    if cells_along_border:
+                        self._remove_transitions_along_border(cells_along_border, border[1])
+                        self._find_transitions_along_border(cells_along_border, border[1])
+                for neighbor_cluster in ((cluster_x, cluster_y), (cluster_x - 1, cluster_y), (cluster_x + 1, cluster_y),
+                                         (cluster_x, cluster_y - 1), (cluster_x, cluster_y + 1)):
+                    self._intra_cluster_edges_by_cluster.pop(neighbor_cluster, None)
+
+    # The cells on the cluster's side of the border between the cluster and the one to the right of it (offset (1, 0))
+    # or below it (offset (0, 1)). Empty if there's no such border.
+    def _get_cells_along_border(self, cluster: Cell, offset_across_border: Cell) -> List[Cell]:
+        if cluster[0] < 0 or cluster[1] < 0:
+            return []
+        min_x, min_y, max_x, max_y = self._get_cluster_bounds(cluster)
+        if offset_across_border == (1, 0):
+            if max_x != min_x + CLUSTER_SIZE - 1 or max_x >= self._grid_width - 1 or min_y >= self._grid_height:
+                return []
+            return [(max_x, y) for y in range(min_y, max_y + 1)]
+        if max_y != min_y + CLUSTER_SIZE - 1 or max_y >= self._grid_height - 1 or min_x >= self._grid_width:
+            return []
+        return [(x, max_y) for x in range(min_x, max_x + 1)]
+
+    def _remove_transitions_along_border(self, cells_along_border: List[Cell], offset_across_border: Cell):
+        for cell in cells_along_border:
+            other_cell = (cell[0] + offset_across_border[0], cell[1] + offset_across_border[1])
+            self._remove_transition(cell, other_cell)
+            self._remove_transition(other_cell, cell)
+
+    def _remove_transition(self, cell: Cell, other_cell: Cell):
+        edges = self._inter_cluster_edges.get(cell)
+        if not edges or other_cell not in edges:
+            return
+        edges.remove(other_cell)
+        # A cell in the corner of a cluster can also be a transition across another border
+        if not edges:
+            del self._inter_cluster_edges[cell]
+            self._transitions_by_cluster[_get_cluster(cell)].remove(cell)
+
+    def _add_transition(self, cell: Cell, other_cell: Cell):
+        transitions = self._transitions_by_cluster[_get_cluster(cell)]
+        if cell not in transitions:
+            transitions.append(cell)
+        self._inter_cluster_edges[cell].append(other_cell)
+
+    # Returns the number of cells that were expanded
+    def _compute_intra_cluster_edges(self, cluster: Cell) -> int:
+        num_expanded_cells = 0
+        transitions = self._transitions_by_cluster.get(cluster, [])
+        edges = {}
+        for transition in transitions:
+            distances = self._get_distances_within_cluster(transition)
+            num_expanded_cells += len(distances)
+            edges[transition] = [(other, distances[other]) for other in transitions
+                                 if other != transition and other in distances]
+        self._intra_cluster_edges_by_cluster[cluster] = edges
+        return num_expanded_cells
+
+    # Breadth-first search from the cell, that doesn't leave the cell's cluster. Like A*, the cell itself doesn't need
+    # to be free.
+    def _get_distances_within_cluster(self, cell: Cell) -> Dict[Cell, int]:
+        min_x, min_y, max_x, max_y = self._get_cluster_bounds(_get_cluster(cell))
+        is_cell_free = self._is_cell_free
+        distances = {cell: 0}
+        queue = deque([cell])
+        while queue:
+            x, y = queue.popleft()
+            next_distance = distances[(x, y)] + 1
+            for neighbor in ((x, y - 1), (x - 1, y), (x + 1, y), (x, y + 1)):
+                if neighbor not in distances and min_x <= neighbor[0] <= max_x and min_y <= neighbor[1] <= max_y \
+                        and is_cell_free(neighbor[0], neighbor[1]):
+                    distances[neighbor] = next_distance
+                    queue.append(neighbor)
+        return distances
+
+    def _get_cluster_bounds(self, cluster: Cell) -> Tuple[int, int, int, int]:
+        min_x = cluster[0] * CLUSTER_SIZE
+        min_y = cluster[1] * CLUSTER_SIZE
+        return min_x, min_y, min(min_x + CLUSTER_SIZE, self._grid_width) - 1, \
+               min(min_y + CLUSTER_SIZE, self._grid_height) - 1
+
+    # Yields the number of cells that have been expanded since the last yield, and returns the path (or None)
+    def find_path_incrementally(self, start_cell: Cell, goal_cell: Cell) \
+            -> Generator[int, None, Optional[List[Cell]]]:
+        if not (0 <= start_cell[0] < self._grid_width and 0 <= start_cell[1] < self._grid_height):
+            return None
+        if not self._is_cell_free(goal_cell[0], goal_cell[1]):
+            return None
+        abstract_path = yield from self._find_abstract_path(start_cell, goal_cell)
+        if abstract_path is None:
+            return None
+        return (yield from self._refine_abstract_path(abstract_path))
+
+    def _find_abstract_path(self, start_cell: Cell, goal_cell: Cell) -> Generator[int, None, Optional[List[Cell]]]:
+        # Start and goal are temporarily connected to the transitions of their clusters
+        start_cluster = _get_cluster(start_cell)
+        goal_cluster = _get_cluster(goal_cell)
+        distances_from_start = self._get_distances_within_cluster(start_cell)
+        distances_to_goal = self._get_distances_within_cluster(goal_cell)
+        yield len(distances_from_start) + len(distances_to_goal)
+        edges_from_start = [(transition, distances_from_start[transition])
+                            for transition in self._transitions_by_cluster.get(start_cluster, [])
+                            if transition in distances_from_start]
+        if start_cluster == goal_cluster and goal_cell in distances_from_start:
+            edges_from_start.append((goal_cell, distances_from_start[goal_cell]))
+
+        came_from: Dict[Cell, Cell] = {}
+        gscores = {start_cell: 0}
+        open_set = [(_manhattan_distance(start_cell, goal_cell), start_cell)]
+        closed = set()
+        while open_set:
+            _, current = heappop(open_set)
+            if current == goal_cell:
+                path = [current]
+                while current in came_from:
+                    current = came_from[current]
+                    path.append(current)
+                return list(reversed(path))
+            if current in closed:
+                continue
+            closed.add(current)
+            yield 1
+            if current == start_cell:
+                edges = edges_from_start + [(other, 1) for other in self._inter_cluster_edges.get(current, [])]
+            else:
+                cluster = _get_cluster(current)
+                if cluster not in self._intra_cluster_edges_by_cluster:
+                    yield self._compute_intra_cluster_edges(cluster)
+                edges = self._intra_cluster_edges_by_cluster[cluster].get(current, []) + \
+                        [(other, 1) for other in self._inter_cluster_edges.get(current, [])]
+                if current in distances_to_goal and cluster == goal_cluster:
+                    edges.append((goal_cell, distances_to_goal[current]))
+            for (neighbor, cost) in edges:
+                if neighbor in closed:
+                    continue
+                tentative_gscore = gscores[current] + cost
+                if tentative_gscore < gscores.get(neighbor, tentative_gscore + 1):
+                    gscores[neighbor] = tentative_gscore
+                    came_from[neighbor] = current
+                    heappush(open_set, (tentative_gscore + _manhattan_distance(neighbor, goal_cell), neighbor))
+        return None
+
+    def _refine_abstract_path(self, abstract_path: List[Cell]) -> Generator[int, None, Optional[List[Cell]]]:
+        path = [abstract_path[0]]
+        for next_cell in abstract_path[1:]:
+            current_cell = path[-1]
+            if _get_cluster(current_cell) != _get_cluster(next_cell):
+                # Crossing a border between two clusters
+                path.append(next_cell)
+                continue
+            path_within_cluster = self._find_path_within_bounds(
+                current_cell, next_cell, self._get_cluster_bounds(_get_cluster(current_cell)))
+            if path_within_cluster is None:
+                return None
+            yield len(path_within_cluster)
+            path += path_within_cluster[1:]
+        return path
+
+
+def _get_cluster(cell: Cell) -> Cell:
+    return cell[0] // CLUSTER_SIZE, cell[1] // CLUSTER_SIZE
+
+
+def _manhattan_distance(a: Cell, b: Cell) -> int:
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
@@ -1,10 +1,12 @@
-from typing import Tuple, Optional, List
+from collections import deque
+from typing import Tuple, Optional, List, Deque
 
 from pygame.rect import Rect
 
 from pythongame.core.common import Millis, Direction
 from pythongame.core.game_state import GRID_CELL_WIDTH, GameState
-from pythongame.core.math import get_directions_to_position, get_opposite_direction, is_x_and_y_within_distance
+from pythongame.core.math import get_directions_to_position, get_opposite_direction, is_x_and_y_within_distance, \
+    get_manhattan_distance
 from pythongame.core.pathfinding.grid_astar_pathfinder import GlobalPathFinder
 from pythongame.core.visual_effects import VisualLine, VisualRect
 from pythongame.core.world_entity import WorldEntity
@@ -16,7 +18,8 @@ DEBUG_PATHFINDER_INTERVAL = 900
 class NpcPathfinder:
 
     def __init__(self, global_path_finder: GlobalPathFinder):
-        self.path: List[Tuple[int, int]] = None  # This is expressed in game world coordinates (can be negative)
+        # Waypoints where the agent needs to turn. This is expressed in game world coordinates (can be negative)
+        self.path: Deque[Tuple[int, int]] = None
         self.global_path_finder: GlobalPathFinder = global_path_finder
 
     def update_path_towards_target(self, agent_entity: WorldEntity, game_state: GameState, target_entity: WorldEntity):
@@ -28,16 +31,25 @@ class NpcPathfinder:
         agent_cell_size = (agent_entity.pygame_collision_rect.w // GRID_CELL_WIDTH + 1,
                            agent_entity.pygame_collision_rect.h // GRID_CELL_WIDTH + 1)
         self.global_path_finder.register_entity_size(agent_cell_size)
-        path_with_cells = self.global_path_finder.run(agent_cell_size, agent_cell, target_cell)
-        if path_with_cells:
-            # Note: Cells are expressed in non-negative values (and need to be translated to game world coordinates)
-            path = [_translate_cell_to_world_position(cell, game_state.game_world.entire_world_area) for cell in
-                    path_with_cells]
-            if DEBUG_RENDER_PATHFINDING:
-                _add_visual_lines_along_path(game_state, path)
-            self.path = path
-        else:
-            self.path = None
+
+        def on_path_found(path_with_cells: Optional[List[Tuple[int, int]]]):
+            if path_with_cells:
+                # Only keeping the corners of the path means fewer waypoint changes (and collision checks) per path
+                path_with_cells = self.global_path_finder.get_corner_waypoints(agent_cell_size, path_with_cells)
+                # Note: Cells are expressed in non-negative values (and need to be translated to game world coordinates)
+                path = deque(_translate_cell_to_world_position(cell, game_state.game_world.entire_world_area)
+                             for cell in path_with_cells)
+                if DEBUG_RENDER_PATHFINDING:
+                    _add_visual_lines_along_path(game_state, path)
+                self.path = path
+            else:
+                self.path = None
+
+        # The agent keeps following its current path until the new one has been found. NPCs that are close to the
+        # player get their paths first, as they're the ones that the player is most likely to notice.
+        priority = get_manhattan_distance(agent_entity.get_position(),
+                                          game_state.game_world.player_entity.get_position())
+        self.global_path_finder.request_path(self, agent_cell_size, agent_cell, target_cell, priority, on_path_found)
 
     def get_next_waypoint_along_path(self, agent_entity: WorldEntity) -> Optional[Tuple[int, int]]:
         if self.path:
@@ -48,7 +60,7 @@ class NpcPathfinder:
             closeness_margin = 50
             if is_x_and_y_within_distance(agent_entity.get_position(), self.path[0], closeness_margin):
                 # print("Popping " + str(self.path[0]) + " as I'm so close to it.")
-                self.path.pop(0)
+                self.path.popleft()
                 if self.path:
                     # print("After popping, returning " + str(self.path[0]))
                     return self.path[0]
@@ -64,7 +76,7 @@ class NpcPathfinder:
                 dir_to_waypoint_1 = get_directions_to_position(agent_entity, self.path[1])[0]
                 if dir_to_waypoint_0 == get_opposite_direction(dir_to_waypoint_1):
                     # print("Not gonna go back. Popping " + str(self.path[0]))
-                    self.path.pop(0)
+                    self.path.popleft()
                     # print("Popped first position. Next waypoint: " + str(self.path[0]))
                     return self.path[0]
                 if self.path:
@@ -0,0 +1,63 @@
+from typing import Tuple, List, Callable, Optional
+
+Cell = Tuple[int, int]
+
+
+# Agents move in one of the four directions at a time, and the paths that we find often look like staircases, with a
+# turn at every cell. As long as the cells along it are free, any part of a path can be replaced by an "L" (a single
+# turn), without making the path longer. Here we do that greedily from the start of the path, and only keep the
+# cells where the agent needs to turn.
+#
+# The first cell of the path is where the agent is standing, so it's not checked for being free.
+def get_corner_waypoints(path: List[Cell], is_cell_free: Callable[[int, int], bool]) -> List[Cell]:
+    if len(path) <= 2:
+        return list(path)
+    waypoints = [path[0]]
+    i = 0
+    while i < len(path) - 1:
+        # Neighbouring cells along the path can always be connected
+        best_j = i + 1
+        best_waypoints = [path[i + 1]]
+        for j in range(i + 2, len(path)):
+            l_shaped_waypoints = _get_free_l_shape(path[i], path[j], is_cell_free)
+            if l_shaped_waypoints is None:
+                break
+            best_j = j
+            best_waypoints = l_shaped_waypoints
+        for waypoint in best_waypoints:
+            _add_waypoint(waypoints, waypoint)
+        i = best_j
+    return waypoints
+
+
+# Returns the waypoints after the start cell (the corner, if there is one, followed by the end cell), or None if no L
+# between the cells is free
+def _get_free_l_shape(start: Cell, end: Cell, is_cell_free: Callable[[int, int], bool]) -> Optional[List[Cell]]:
+    if start[0] == end[0] or start[1] == end[1]:
+        return [end] if _is_straight_line_free(start, end, is_cell_free) else None
+    for corner in [(end[0], start[1]), (start[0], end[1])]:
+        if _is_straight_line_free(start, corner, is_cell_free) and _is_straight_line_free(corner, end, is_cell_free):
+            return [corner, end]
+    return None
+
+
+# Checks the cells between start (exclusive) and end (inclusive), which must be on the same row or column
+def _is_straight_line_free(start: Cell, end: Cell, is_cell_free: Callable[[int, int], bool]) -> bool:
+    dx = (end[0] > start[0]) - (end[0] < start[0])
+    dy = (end[1] > start[1]) - (end[1] < start[1])
+    x, y = start
+    while (x, y) != end:
+        x += dx
+        y += dy
+        if not is_cell_free(x, y):
+            return False
+    return True
+
+
+def _add_waypoint(waypoints: List[Cell], waypoint: Cell):
+    # The previous waypoint isn't needed if it's on a straight line between the one before it and the new one
+    if len(waypoints) >= 2:
+        (x1, y1), (x2, y2) = waypoints[-2], waypoints[-1]
+        if (x1 == x2 == waypoint[0]) or (y1 == y2 == waypoint[1]):
+            waypoints.pop()
+    waypoints.append(waypoint)
@@ -0,0 +1,27 @@
+import multiprocessing
+
+from pythongame.core.pathfinding.grid_astar_pathfinder import GlobalPathFinder
+
+# This module is what the pathfinding worker processes import (see WorkerPoolGlobalPathFinder), so it should only
+# depend on the pathfinding code, and not on pygame or the game data
+
+MESSAGE_SET_GRID = "set_grid"
+MESSAGE_SET_CELL_BLOCKED = "set_cell_blocked"
+MESSAGE_FIND_PATH = "find_path"
+
+
+def run_worker(request_queue: multiprocessing.Queue, result_queue: multiprocessing.Queue, use_flow_fields: bool,
+               use_jump_point_search: bool):
+    path_finder = GlobalPathFinder(use_flow_fields, use_jump_point_search)
+    while True:
+        message = request_queue.get()
+        if message is None:
+            return
+        if message[0] == MESSAGE_SET_GRID:
+            path_finder.set_grid(message[1])
+        elif message[0] == MESSAGE_SET_CELL_BLOCKED:
+            path_finder.set_cell_blocked(message[1], message[2])
+        elif message[0] == MESSAGE_FIND_PATH:
+            _, request_number, entity_size, start_cell, goal_cell = message
+            path_finder.register_entity_size(entity_size)
+            result_queue.put((request_number, path_finder.run(entity_size, start_cell, goal_cell)))
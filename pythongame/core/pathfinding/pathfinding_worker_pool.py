@@ -0,0 +1,83 @@
+import multiprocessing
+import queue
+from heapq import heappop
+from typing import Tuple, Dict
+
+from pythongame.core.pathfinding.grid_astar_pathfinder import GlobalPathFinder, _PathRequest
+from pythongame.core.pathfinding.pathfinding_worker import run_worker, MESSAGE_SET_GRID, MESSAGE_SET_CELL_BLOCKED, \
+    MESSAGE_FIND_PATH
+
+
+# Same interface as GlobalPathFinder, but the searches run in worker processes, so that they don't take any time from
+# the main loop. Each worker holds its own copy of the wall grid. The grid is sent once per map, and after that only
+# the cells that change are sent.
+#
+# Requests are sent to workers in priority order, and the results are delivered in serve_path_requests, so the
+# callbacks still run on the main thread. Requests with the same goal cell always go to the same worker, so that
+# the workers' flow field caches stay useful.
+class WorkerPoolGlobalPathFinder(GlobalPathFinder):
+    def __init__(self, num_workers: int, use_flow_fields: bool = True, use_jump_point_search: bool = False):
+        super().__init__(use_flow_fields, use_jump_point_search)
+        # Forked workers would inherit pygame's signal handlers (and then ignore being terminated when the game exits)
+        context = multiprocessing.get_context("spawn")
+        self._result_queue = context.Queue()
+        self._request_queues = []
+        self._workers = []
+        for _ in range(num_workers):
+            request_queue = context.Queue()
+            worker = context.Process(
+                target=run_worker, args=(request_queue, self._result_queue, use_flow_fields, use_jump_point_search),
+                daemon=True)
+            worker.start()
+            self._request_queues.append(request_queue)
+            self._workers.append(worker)
+        self._requests_in_flight: Dict[int, _PathRequest] = {}
+
+    def set_grid(self, grid):
+        super().set_grid(grid)
+        # Results for requests that were sent before this point belong to the old grid, and are ignored
+        self._requests_in_flight.clear()
+        for request_queue in self._request_queues:
+            request_queue.put((MESSAGE_SET_GRID, grid))
+
+    def set_cell_blocked(self, cell: Tuple[int, int], is_blocked: bool):
+        super().set_cell_blocked(cell, is_blocked)
+        for request_queue in self._request_queues:
+            request_queue.put((MESSAGE_SET_CELL_BLOCKED, cell, is_blocked))
+
+    def has_pending_path_requests(self) -> bool:
+        return bool(self._path_requests) or bool(self._requests_in_flight)
+
+    # Should be called once per frame. Unlike for GlobalPathFinder, this doesn't run any searches.
+    def serve_path_requests(self):
+        while self._path_requests:
+            _, request_number, request = heappop(self._path_requests)
+            if request.is_cancelled:
+                continue
+            self._requests_in_flight[request_number] = request
+            worker_index = hash(request.goal_cell) % len(self._request_queues)
+            self._request_queues[worker_index].put(
+                (MESSAGE_FIND_PATH, request_number, request.entity_size, request.start_cell, request.goal_cell))
+
+        while True:
+            try:
+                request_number, path = self._result_queue.get_nowait()
+            except queue.Empty:
+                return
+            request = self._requests_in_flight.pop(request_number, None)
+            if request is None or request.is_cancelled:
+                continue
+            if self._path_requests_by_requester.get(request.requester) is request:
+                del self._path_requests_by_requester[request.requester]
+            request.on_path_found(path)
+
+    def close(self):
+        for request_queue in self._request_queues:
+            request_queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout=1)
+            if worker.is_alive():
+                worker.terminate()
+        self._request_queues.clear()
+        self._workers.clear()
+        self._requests_in_flight.clear()
@@ -9,6 +9,9 @@ _sounds_by_id: Dict[SoundId, List[Any]] = {}
 
 muted = False
 
+# When running without an audio device (see headless_simulation.py), sounds are never loaded or played
+_is_silent = False
+
 LOOPING_SOUNDS = [SoundId.FOOTSTEPS]
 
 
@@ -98,9 +101,14 @@ def init_sound_player():
     }
 
 
+def init_silent_sound_player():
+    global _is_silent
+    _is_silent = True
+
+
 def play_sound(sound_id: SoundId):
     global muted
-    if muted:
+    if muted or _is_silent:
         return
     if not _sounds_by_id:
         raise Exception("Initialize sound player before playing sounds!")
@@ -118,6 +126,8 @@ def play_sound(sound_id: SoundId):
 def stop_looping_sound(sound_id: SoundId):
     if sound_id not in LOOPING_SOUNDS:
         raise Exception("Only use this method for looping sounds!")
+    if _is_silent:
+        return
     if not _sounds_by_id:
         raise Exception("Initialize sound player before playing sounds!")
     if sound_id in _sounds_by_id:
@@ -0,0 +1,143 @@
+from array import array
+from typing import List, Tuple, Dict, Any, Iterator, Set
+
+from pygame.rect import Rect
+
+from pythongame.core.common import Sprite
+
+# What the view needs to render a piece of static geometry: (sprite, x, y, w, h). The size is only used when rendering
+# collision boxes.
+StaticSprite = Tuple[Sprite, int, int, int, int]
+
+
+# Walls and floor decorations never move, and there are thousands of them on a map, so rather than giving each of them
+# an object (with its own rect, animation state, etc) they are stored as (kind, x, y) records in packed arrays. The
+# kind is an index into a small table with the data that's shared by all records of that kind: the key that it was
+# added with (a WallType for example), its sprite and its size. Collision rects are derived from the position and the
+# size whenever they're needed.
+#
+# Records are indexed by the bucket that contains their top-left corner, so that queries only look at the records
+# that are close to an area.
+class StaticGeometry:
+    _BUCKET_WIDTH = 100
+    _BUCKET_HEIGHT = 100
+
+    def __init__(self, entire_world_area: Rect):
+        self._entire_world_area = entire_world_area
+        self._kind_keys: List[Any] = []
+        self._kind_sprites: List[Sprite] = []
+        self._kind_sizes: List[Tuple[int, int]] = []
+        self._kind_index_by_key: Dict[Any, int] = {}
+        self._kinds = array('H')
+        self._xs = array('i')
+        self._ys = array('i')
+        self._buckets: Dict[Tuple[int, int], array] = {}
+        # Collision queries need to look this far up and to the left of the query area
+        self._max_w = 0
+        self._max_h = 0
+
+    def __len__(self):
+        return len(self._xs)
+
+    def add(self, kind_key: Any, sprite: Sprite, size: Tuple[int, int], position: Tuple[int, int]):
+        kind = self._kind_index_by_key.get(kind_key)
+        if kind is None:
+            kind = len(self._kind_keys)
+            self._kind_index_by_key[kind_key] = kind
+            self._kind_keys.append(kind_key)
+            self._kind_sprites.append(sprite)
+            self._kind_sizes.append(size)
+            self._max_w = max(self._max_w, size[0])
+            self._max_h = max(self._max_h, size[1])
+        x, y = int(position[0]), int(position[1])
+        record = len(self._xs)
+        self._kinds.append(kind)
+        self._xs.append(x)
+        self._ys.append(y)
+        self._buckets.setdefault(self._bucket_index_for_world_position(x, y), array('i')).append(record)
+
+    # Returns whether anything was removed
+    def remove_all_at_position(self, position: Tuple[int, int]) -> bool:
+        records = self._get_records_at_position(position)
+        # Records are removed starting with the highest index, as removing one moves the last record into its place
+        for record in sorted(records, reverse=True):
+            self._remove(record)
+        return len(records) > 0
+
+    def clear(self):
+        del self._kinds[:]
+        del self._xs[:]
+        del self._ys[:]
+        self._buckets.clear()
+
+    def get_kind_keys_at_position(self, position: Tuple[int, int]) -> List[Any]:
+        return [self._kind_keys[self._kinds[record]] for record in self._get_records_at_position(position)]
+
+    # (kind key, x, y) for every record
+    def get_all(self) -> List[Tuple[Any, int, int]]:
+        kind_keys = self._kind_keys
+        return [(kind_keys[kind], x, y) for kind, x, y in zip(self._kinds, self._xs, self._ys)]
+
+    def get_all_positions(self) -> List[Tuple[int, int]]:
+        return list(zip(self._xs, self._ys))
+
+    def get_all_sprites(self) -> Set[Sprite]:
+        return {self._kind_sprites[kind] for kind in set(self._kinds)}
+
+    # Sprites may extend outside of the records' collision rects, so this includes records in the buckets around the
+    # area, and it's up to the caller to skip the ones that aren't visible
+    def get_sprites_close_to_world_area(self, world_area: Rect) -> List[StaticSprite]:
+        kinds, xs, ys, sprites, sizes = self._kinds, self._xs, self._ys, self._kind_sprites, self._kind_sizes
+        return [(sprites[kinds[record]], xs[record], ys[record]) + sizes[kinds[record]]
+                for record in self._get_records_close_to_world_area(world_area)]
+
+    def get_positions_close_to_world_area(self, world_area: Rect) -> List[Tuple[int, int]]:
+        xs, ys = self._xs, self._ys
+        return [(xs[record], ys[record]) for record in self._get_records_close_to_world_area(world_area)]
+
+    def does_rect_intersect(self, rect: Rect) -> bool:
+        x0_bucket, y0_bucket = self._bucket_index_for_world_position(rect.x - self._max_w, rect.y - self._max_h)
+        x1_bucket, y1_bucket = self._bucket_index_for_world_position(rect.right, rect.bottom)
+        kinds, xs, ys, sizes = self._kinds, self._xs, self._ys, self._kind_sizes
+        for record in self._get_records_in_buckets(x0_bucket, x1_bucket, y0_bucket, y1_bucket):
+            w, h = sizes[kinds[record]]
+            if rect.colliderect((xs[record], ys[record], w, h)):
+                return True
+        return False
+
+    def _get_records_at_position(self, position: Tuple[int, int]) -> List[int]:
+        x, y = int(position[0]), int(position[1])
+        bucket = self._buckets.get(self._bucket_index_for_world_position(x, y), ())
+        return [record for record in bucket if self._xs[record] == x and self._ys[record] == y]
+
+    def _get_records_close_to_world_area(self, world_area: Rect) -> Iterator[int]:
+        x0_bucket, y0_bucket = self._bucket_index_for_world_position(world_area.x, world_area.y)
+        x1_bucket, y1_bucket = self._bucket_index_for_world_position(world_area.right, world_area.bottom)
+        return self._get_records_in_buckets(x0_bucket - 1, x1_bucket + 1, y0_bucket - 1, y1_bucket + 1)
+
+    def _get_records_in_buckets(self, x0: int, x1: int, y0: int, y1: int) -> Iterator[int]:
+        buckets = self._buckets
+        for x_bucket in range(x0, x1 + 1):
+            for y_bucket in range(y0, y1 + 1):
+                bucket = buckets.get((x_bucket, y_bucket))
+                if bucket:
+                    yield from bucket
+
+    def _remove(self, record: int):
+        xs, ys, kinds = self._xs, self._ys, self._kinds
+        self._buckets[self._bucket_index_for_world_position(xs[record], ys[record])].remove(record)
+        last = len(xs) - 1
+        if record != last:
+            # The last record takes the place of the removed one, so that the arrays stay packed
+            last_bucket = self._buckets[self._bucket_index_for_world_position(xs[last], ys[last])]
+            last_bucket[last_bucket.index(last)] = record
+            xs[record] = xs[last]
+            ys[record] = ys[last]
+            kinds[record] = kinds[last]
+        xs.pop()
+        ys.pop()
+        kinds.pop()
+
+    def _bucket_index_for_world_position(self, x: int, y: int) -> Tuple[int, int]:
+        return ((int(x) - self._entire_world_area.x) // StaticGeometry._BUCKET_WIDTH,
+                (int(y) - self._entire_world_area.y) // StaticGeometry._BUCKET_HEIGHT)
@@ -0,0 +1,70 @@
+from heapq import heappush, heappop
+from typing import Callable, Any, Optional, List, Tuple
+
+from pythongame.core.common import Millis
+
+
+# A callback that is run once when it's due, or repeatedly with a fixed interval
+class ScheduledTimer:
+    def __init__(self, callback: Callable[[Any], None], interval: Optional[Millis]):
+        self.callback = callback
+        self.interval = interval
+        self.due_time: Millis = Millis(0)
+        self.is_cancelled = False
+        # Entries in the heap that were pushed before the timer was last rescheduled are ignored
+        self._version = 0
+
+    def cancel(self):
+        self.is_cancelled = True
+
+
+# Keeps track of game time, and runs timers when they are due. The timers are kept in a heap ordered by due time, so
+# the work done per frame is proportional to the number of timers that fire, not to the number of timers that exist.
+#
+# The argument given to advance() is passed on to the callbacks. (The game engine passes the current GameState, as
+# the timers can outlive the game state that they were created in.)
+class TimerScheduler:
+    def __init__(self):
+        self.now = Millis(0)
+        # (due time, order in which it was pushed, version, timer). Timers that are due at the same time are run in
+        # the order that they were scheduled.
+        self._heap: List[Tuple[Millis, int, int, ScheduledTimer]] = []
+        self._num_pushed = 0
+
+    def schedule(self, delay: Millis, callback: Callable[[Any], None], interval: Optional[Millis] = None) \
+            -> ScheduledTimer:
+        timer = ScheduledTimer(callback, interval)
+        self._push(timer, Millis(self.now + delay))
+        return timer
+
+    def reschedule(self, timer: ScheduledTimer, delay: Millis):
+        timer._version += 1
+        self._push(timer, Millis(self.now + delay))
+
+    def get_time_remaining(self, timer: ScheduledTimer) -> Millis:
+        return Millis(max(0, timer.due_time - self.now))
+
+    # Runs the timer right away if it's due, rather than waiting for it to be popped from the heap
+    def run_if_due(self, timer: ScheduledTimer, callback_arg: Any):
+        if not timer.is_cancelled and timer.due_time <= self.now:
+            # The entry that's already in the heap is made stale
+            timer._version += 1
+            if timer.interval is not None:
+                self._push(timer, Millis(timer.due_time + timer.interval))
+            timer.callback(callback_arg)
+
+    def advance(self, time_passed: Millis, callback_arg: Any):
+        self.now += time_passed
+        heap = self._heap
+        while heap and heap[0][0] <= self.now:
+            due_time, _, version, timer = heappop(heap)
+            if timer.is_cancelled or version != timer._version:
+                continue
+            if timer.interval is not None:
+                self._push(timer, Millis(due_time + timer.interval))
+            timer.callback(callback_arg)
+
+    def _push(self, timer: ScheduledTimer, due_time: Millis):
+        timer.due_time = due_time
+        self._num_pushed += 1
+        heappush(self._heap, (due_time, self._num_pushed, timer._version, timer))
@@ -1,14 +1,17 @@
+from collections import OrderedDict
 from enum import Enum
-from typing import Dict, List, Tuple, Optional, Union
+from typing import Dict, List, Tuple, Optional, Iterable
 
 import pygame
 from pygame.rect import Rect
 
 from pythongame.core.common import Direction, Sprite
 from pythongame.core.game_data import ENTITY_SPRITE_INITIALIZERS, CHANNELING_BUFFS
-from pythongame.core.game_state import DecorationEntity, NonPlayerCharacter, BuffWithDuration, \
-    QuestGiverState
-from pythongame.core.view.image_loading import ImageWithRelativePosition
+from pythongame.core.game_state import NonPlayerCharacter, BuffWithDuration, QuestGiverState, WallsState, \
+    DecorationsState
+from pythongame.core.math import sum_of_vectors
+from pythongame.core.static_geometry import StaticSprite
+from pythongame.core.view.image_loading import ImageWithRelativePosition, LazyImages
 from pythongame.core.view.render_util import DrawableArea, split_text_into_lines
 from pythongame.core.visual_effects import VisualLine, VisualCircle, VisualRect, VisualText, VisualSprite, VisualCross, \
     VisualParticleSystem
@@ -20,6 +23,14 @@ COLOR_RED = (250, 0, 0)
 RENDER_WORLD_COORDINATES = False
 DIR_FONTS = './resources/fonts/'
 
+# The ground, decorations and walls are rendered into cached chunks of this size (see _static_world)
+STATIC_CHUNK_SIZE = 256
+# Each chunk uses STATIC_CHUNK_SIZE^2 * 4 bytes (256kB). Only around 15 chunks are visible at a time.
+MAX_CACHED_STATIC_CHUNKS = 64
+# Sprites of walls and decorations don't extend further than this from their positions. When one of them is added or
+# removed, the chunks within this distance are rendered again.
+STATIC_SPRITE_MAX_EXTENT = 100
+
 
 class EntityActionTextStyle(Enum):
     PLAIN = 1
@@ -41,7 +52,7 @@ class EntityActionText:
 class GameWorldView:
 
     def __init__(self, pygame_screen, camera_size: Tuple[int, int], screen_size: Tuple[int, int],
-                 images_by_sprite: Dict[Sprite, Dict[Direction, List[ImageWithRelativePosition]]]):
+                 images_by_sprite: LazyImages):
         pygame.font.init()
         self.screen_render = DrawableArea(pygame_screen)
         self.ui_render = DrawableArea(pygame_screen, self._translate_ui_position_to_screen)
@@ -50,6 +61,7 @@ class GameWorldView:
         self.ui_screen_area = Rect(0, camera_size[1], screen_size[0], screen_size[1] - camera_size[1])
         self.camera_size = camera_size
         self.screen_size = screen_size
+        self._screen_rect = Rect((0, 0), screen_size)
 
         self.font_npc_action = pygame.font.Font(DIR_FONTS + 'Monaco.dfont', 12)
         self.font_debug_info = pygame.font.Font(DIR_FONTS + 'Arial Rounded Bold.ttf', 19)
@@ -58,11 +70,26 @@ class GameWorldView:
         self.font_visual_text_large = pygame.font.Font(DIR_FONTS + 'Courier New Bold.ttf', 16)
         self.font_quest_giver_mark = pygame.font.Font(DIR_FONTS + 'Courier New Bold.ttf', 28)
 
-        self.images_by_sprite: Dict[Sprite, Dict[Direction, List[ImageWithRelativePosition]]] = images_by_sprite
+        # Dict[Sprite, Dict[Direction, List[ImageWithRelativePosition]]], with the images loaded on demand
+        self.images_by_sprite: LazyImages = images_by_sprite
 
         # This is updated every time the view is called
         self.camera_world_area = None
 
+        # Surfaces with the static parts of the game world that have been rendered, by chunk index. Least recently
+        # used first.
+        self._static_chunks: Dict[Tuple[int, int], pygame.Surface] = OrderedDict()
+        # The chunks are rendered from these, and need to be thrown away if they're replaced (i.e. a new map is loaded)
+        self._walls_state: Optional[WallsState] = None
+        self._decorations_state: Optional[DecorationsState] = None
+        self._is_sprite_in_static_chunks: Dict[Sprite, bool] = {}
+        # Images of entities and walls that are waiting to be blitted, with their world positions (see _queue_image)
+        self._queued_images: List[Tuple[pygame.Surface, Tuple[int, int]]] = []
+
+    # Loads the images of the sprites now, rather than the first time that they're rendered
+    def preload_images(self, sprites: Iterable[Sprite]):
+        self.images_by_sprite.preload(sprites)
+
     # ------------------------------------
     #         TRANSLATING COORDINATES
     # ------------------------------------
@@ -90,57 +117,167 @@ class GameWorldView:
     #       DRAWING THE GAME WORLD
     # ------------------------------------
 
-    def _world_ground(self, entire_world_area: Rect):
+    # The static parts of the game world (the ground, decorations and most walls) never move, so rather than drawing
+    # them piece by piece every frame, they're rendered once into fixed-size chunks. Each frame then only blits the
+    # handful of chunks that the camera can see. To bound the memory use on big maps, only the most recently used
+    # chunks are kept.
+    def _static_world(self, walls_state: WallsState, decorations_state: DecorationsState, entire_world_area: Rect):
+        if walls_state is not self._walls_state or decorations_state is not self._decorations_state:
+            self._walls_state = walls_state
+            self._decorations_state = decorations_state
+            self._static_chunks.clear()
+            walls_state.position_was_changed.register_observer(self._on_static_world_changed)
+            decorations_state.position_was_changed.register_observer(self._on_static_world_changed)
+        chunk_x0 = self.camera_world_area.x // STATIC_CHUNK_SIZE
+        chunk_y0 = self.camera_world_area.y // STATIC_CHUNK_SIZE
+        chunk_x1 = (self.camera_world_area.right - 1) // STATIC_CHUNK_SIZE
+        chunk_y1 = (self.camera_world_area.bottom - 1) // STATIC_CHUNK_SIZE
+        chunks_to_render: List[Tuple[pygame.Surface, Tuple[int, int]]] = []
+        for chunk_x in range(chunk_x0, chunk_x1 + 1):
+            for chunk_y in range(chunk_y0, chunk_y1 + 1):
+                chunk_index = (chunk_x, chunk_y)
+                chunk = self._static_chunks.get(chunk_index)
+                if chunk is None:
+                    chunk = self._render_static_chunk(chunk_index, entire_world_area)
+                    self._static_chunks[chunk_index] = chunk
+                    if len(self._static_chunks) > MAX_CACHED_STATIC_CHUNKS:
+                        self._static_chunks.popitem(last=False)
+                else:
+                    self._static_chunks.move_to_end(chunk_index)
+                chunks_to_render.append((chunk, (chunk_x * STATIC_CHUNK_SIZE, chunk_y * STATIC_CHUNK_SIZE)))
+        self.world_render.images(chunks_to_render)
+
+    def _render_static_chunk(self, chunk_index: Tuple[int, int], entire_world_area: Rect) -> pygame.Surface:
+        chunk_world_area = Rect(chunk_index[0] * STATIC_CHUNK_SIZE, chunk_index[1] * STATIC_CHUNK_SIZE,
+                                STATIC_CHUNK_SIZE, STATIC_CHUNK_SIZE)
+        # Same pixel format as the screen, so that blitting the chunk is a plain copy
+        chunk = pygame.Surface(chunk_world_area.size, 0, self.screen_render.screen)
+        chunk_render = DrawableArea(
+            chunk, lambda world_pos: (int(world_pos[0] - chunk_world_area.x), int(world_pos[1] - chunk_world_area.y)))
+        chunk_render.fill(COLOR_BACKGROUND)
+        self._world_ground(chunk_render, chunk_world_area, entire_world_area)
+        for sprite, x, y, _w, _h in self._decorations_state.get_decoration_sprites_close_to_world_area(
+                chunk_world_area):
+            chunk_render.image_with_relative_pos(self._get_static_sprite_image(sprite), (x, y))
+        walls = [w for w in self._walls_state.get_wall_sprites_close_to_world_area(chunk_world_area)
+                 if self._is_wall_sprite_in_static_chunks(w[0])]
+        walls.sort(key=lambda wall: wall[2])
+        for sprite, x, y, _w, _h in walls:
+            chunk_render.image_with_relative_pos(self._get_static_sprite_image(sprite), (x, y))
+        return chunk
+
+    def _on_static_world_changed(self, position: Optional[Tuple[int, int]]):
+        if position is None:
+            self._static_chunks.clear()
+            return
+        chunk_x0 = (position[0] - STATIC_SPRITE_MAX_EXTENT) // STATIC_CHUNK_SIZE
+        chunk_y0 = (position[1] - STATIC_SPRITE_MAX_EXTENT) // STATIC_CHUNK_SIZE
+        chunk_x1 = (position[0] + STATIC_SPRITE_MAX_EXTENT) // STATIC_CHUNK_SIZE
+        chunk_y1 = (position[1] + STATIC_SPRITE_MAX_EXTENT) // STATIC_CHUNK_SIZE
+        for chunk_x in range(chunk_x0, chunk_x1 + 1):
+            for chunk_y in range(chunk_y0, chunk_y1 + 1):
+                self._static_chunks.pop((chunk_x, chunk_y), None)
+
+    # A wall is only included in the static chunks if drawing its image twice gives the same result as drawing it once
+    # (i.e. it has no partly transparent pixels). Then it can be drawn again on top of the chunk whenever something
+    # that should be behind it has been drawn over it (see _wall), and the result is the same as if it had been drawn in
+    # the right order to begin with.
+    def _is_wall_sprite_in_static_chunks(self, sprite: Sprite) -> bool:
+        if sprite not in self._is_sprite_in_static_chunks:
+            image = self._get_static_sprite_image(sprite).image
+            surface = pygame.Surface(image.get_size(), 0, self.screen_render.screen)
+            surface.fill((255, 0, 255))
+            surface.blit(image, (0, 0))
+            drawn_once = pygame.image.tostring(surface, 'RGB')
+            surface.blit(image, (0, 0))
+            self._is_sprite_in_static_chunks[sprite] = pygame.image.tostring(surface, 'RGB') == drawn_once
+        return self._is_sprite_in_static_chunks[sprite]
+
+    def _world_ground(self, render: DrawableArea, world_area: Rect, entire_world_area: Rect):
         grid_width = 35
         # TODO num squares should depend on map size. Ideally this dumb looping logic should change.
         num_squares = 200
-        column_screen_y_0 = self._translate_world_y_to_screen(self.camera_world_area.y)
-        column_screen_y_1 = self._translate_world_y_to_screen(
-            min(entire_world_area.y + entire_world_area.h, self.camera_world_area.y + self.camera_world_area.h))
-        for i_col in range(num_squares):
-            world_x = entire_world_area.x + i_col * grid_width
-            if entire_world_area.x < world_x < entire_world_area.x + entire_world_area.w:
-                screen_x = self._translate_world_x_to_screen(world_x)
-                self.screen_render.line(COLOR_BACKGROUND_LINES, (screen_x, column_screen_y_0),
-                                        (screen_x, column_screen_y_1),
-                                        1)
-        row_screen_x_0 = self._translate_world_x_to_screen(self.camera_world_area.x)
-        row_screen_x_1 = self._translate_world_x_to_screen(
-            min(entire_world_area.x + entire_world_area.w, self.camera_world_area.x + self.camera_world_area.w))
-        for i_row in range(num_squares):
-            world_y = entire_world_area.y + i_row * grid_width
-            if entire_world_area.y < world_y < entire_world_area.y + entire_world_area.h:
-                screen_y = self._translate_world_y_to_screen(world_y)
-                self.screen_render.line(COLOR_BACKGROUND_LINES, (row_screen_x_0, screen_y), (row_screen_x_1, screen_y),
-                                        1)
-
-        if RENDER_WORLD_COORDINATES:
+        column_y_1 = min(entire_world_area.y + entire_world_area.h, world_area.y + world_area.h)
+        if column_y_1 >= world_area.y:
             for i_col in range(num_squares):
-                for i_row in range(num_squares):
-                    if i_col % 4 == 0 and i_row % 4 == 0:
-                        world_x = entire_world_area.x + i_col * grid_width
-                        screen_x = self._translate_world_x_to_screen(world_x)
-                        world_y = entire_world_area.y + i_row * grid_width
-                        screen_y = self._translate_world_y_to_screen(world_y)
-                        self.screen_render.text(self.font_debug_info, str(world_x) + "," + str(world_y),
-                                                (screen_x, screen_y),
-                                                (250, 250, 250))
-
-    def _world_entity(self, entity: Union[WorldEntity, DecorationEntity]):
+                world_x = entire_world_area.x + i_col * grid_width
+                if entire_world_area.x < world_x < entire_world_area.x + entire_world_area.w and \
+                        world_area.x <= world_x < world_area.x + world_area.w:
+                    render.line(COLOR_BACKGROUND_LINES, (world_x, world_area.y), (world_x, column_y_1), 1)
+        row_x_1 = min(entire_world_area.x + entire_world_area.w, world_area.x + world_area.w)
+        if row_x_1 >= world_area.x:
+            for i_row in range(num_squares):
+                world_y = entire_world_area.y + i_row * grid_width
+                if entire_world_area.y < world_y < entire_world_area.y + entire_world_area.h and \
+                        world_area.y <= world_y < world_area.y + world_area.h:
+                    render.line(COLOR_BACKGROUND_LINES, (world_area.x, world_y), (row_x_1, world_y), 1)
+
+    def _world_coordinates(self, entire_world_area: Rect):
+        grid_width = 35
+        num_squares = 200
+        for i_col in range(num_squares):
+            for i_row in range(num_squares):
+                if i_col % 4 == 0 and i_row % 4 == 0:
+                    world_x = entire_world_area.x + i_col * grid_width
+                    screen_x = self._translate_world_x_to_screen(world_x)
+                    world_y = entire_world_area.y + i_row * grid_width
+                    screen_y = self._translate_world_y_to_screen(world_y)
+                    self.screen_render.text(self.font_debug_info, str(world_x) + "," + str(world_y),
+                                            (screen_x, screen_y),
+                                            (250, 250, 250))
+
+    # Returns the area of the screen that was drawn to, if any
+    def _world_entity(self, entity: WorldEntity) -> Optional[Rect]:
         if not entity.visible:
-            return
+            return None
         if entity.sprite is None:
             raise Exception("Entity has no sprite value: " + str(entity))
         elif entity.sprite in self.images_by_sprite:
             image_with_relative_position = self._get_image_for_sprite(
                 entity.sprite, entity.direction, entity.movement_animation_progress)
-            self.world_render.image_with_relative_pos(image_with_relative_position, entity.get_position())
+            return self._queue_image(image_with_relative_position, entity.get_position())
         elif entity.sprite == Sprite.NONE:
             # This value is used by entities that don't use sprites. They might have other graphics (like VisualEffects)
-            pass
+            return None
         else:
             raise Exception("Unhandled sprite: " + str(entity.sprite))
 
+    # Walls that are in the static chunks only need to be drawn if something that should be behind them has been drawn
+    # on top of them. Anything that's drawn is added to drawn_rects.
+    def _wall(self, wall: StaticSprite, drawn_rects: List[Rect]):
+        sprite, x, y, _w, _h = wall
+        image_with_relative_position = self._get_static_sprite_image(sprite)
+        if self._is_wall_sprite_in_static_chunks(sprite):
+            if not drawn_rects:
+                return
+            relative_x, relative_y = image_with_relative_position.position_relative_to_entity
+            screen_rect = Rect(self._translate_world_position_to_screen((x + relative_x, y + relative_y)),
+                               image_with_relative_position.image.get_size())
+            if screen_rect.collidelist(drawn_rects) == -1:
+                return
+        drawn_rects.append(self._queue_image(image_with_relative_position, (x, y)))
+
+    # Entities and walls are drawn with one call to Surface.blits (see _blit_queued_images) rather than one blit each.
+    # Returns the area of the screen that the image will be drawn to (which is empty if it's outside of the screen).
+    def _queue_image(self, image_with_relative_position: ImageWithRelativePosition,
+                     world_position: Tuple[int, int]) -> Rect:
+        image = image_with_relative_position.image
+        image_world_position = sum_of_vectors(world_position, image_with_relative_position.position_relative_to_entity)
+        self._queued_images.append((image, image_world_position))
+        screen_rect = Rect(self._translate_world_position_to_screen(image_world_position), image.get_size())
+        return screen_rect.clip(self._screen_rect)
+
+    def _blit_queued_images(self):
+        if self._queued_images:
+            self.world_render.images(self._queued_images)
+            self._queued_images.clear()
+
+    # Walls and decorations aren't animated and only have images for one direction
+    def _get_static_sprite_image(self, sprite: Sprite) -> ImageWithRelativePosition:
+        if sprite not in self.images_by_sprite:
+            raise Exception("Unhandled sprite: " + str(sprite))
+        return self._get_image_for_sprite(sprite, Direction.DOWN, 0)
+
     def _get_image_for_sprite(self, sprite: Sprite, direction: Direction,
                               animation_progress: float) -> ImageWithRelativePosition:
 
@@ -261,25 +398,39 @@ class GameWorldView:
         self.world_render.text(self.font_quest_giver_mark, mark, (entity_pos[0] - 8, entity_pos[1] - 64), (0, 0, 0))
         self.world_render.text(self.font_quest_giver_mark, mark, (entity_pos[0] - 9, entity_pos[1] - 65), color)
 
-    def render_world(self, all_entities_to_render: List[WorldEntity], decorations_to_render: List[DecorationEntity],
-                     camera_world_area, non_player_characters: List[NonPlayerCharacter], is_player_invisible: bool,
+    def render_world(self, all_entities_to_render: List[WorldEntity], walls_state: WallsState,
+                     decorations_state: DecorationsState, camera_world_area, non_player_characters: List[NonPlayerCharacter], is_player_invisible: bool,
                      player_active_buffs: List[BuffWithDuration],
                      player_entity: WorldEntity, visual_effects, render_hit_and_collision_boxes, player_health,
                      player_max_health, entire_world_area: Rect, entity_action_text: Optional[EntityActionText]):
         self.camera_world_area = camera_world_area
 
-        self.screen_render.fill(COLOR_BACKGROUND)
-        self._world_ground(entire_world_area)
+        self._static_world(walls_state, decorations_state, entire_world_area)
+        if RENDER_WORLD_COORDINATES:
+            self._world_coordinates(entire_world_area)
 
         all_entities_to_render.sort(key=lambda entry: (-entry.view_z, entry.y))
+        # Walls are ordered like entities with view_z 0, and are rendered before any entity that has the same order
+        walls_to_render = walls_state.get_wall_sprites_close_to_world_area(camera_world_area)
+        walls_to_render.sort(key=lambda wall: wall[2])
 
-        for decoration_entity in decorations_to_render:
-            self._world_entity(decoration_entity)
-
+        # What has been drawn on top of the static chunks so far
+        drawn_rects: List[Rect] = []
+        i_wall = 0
         for entity in all_entities_to_render:
-            self._world_entity(entity)
+            entity_order = (-entity.view_z, entity.y)
+            while i_wall < len(walls_to_render) and (0, walls_to_render[i_wall][2]) <= entity_order:
+                self._wall(walls_to_render[i_wall], drawn_rects)
+                i_wall += 1
+            drawn_rect = self._world_entity(entity)
+            if drawn_rect:
+                drawn_rects.append(drawn_rect)
             if entity == player_entity and is_player_invisible:
-                self.world_render.rect((200, 100, 250), player_entity.rect(), 2)
+                self._blit_queued_images()
+                drawn_rects.append(self.world_render.rect((200, 100, 250), player_entity.rect(), 2))
+        for wall in walls_to_render[i_wall:]:
+            self._wall(wall, drawn_rects)
+        self._blit_queued_images()
 
         player_sprite_y_relative_to_entity = \
             ENTITY_SPRITE_INITIALIZERS[player_entity.sprite][Direction.DOWN].position_relative_to_entity[1]
@@ -297,6 +448,8 @@ class GameWorldView:
         if render_hit_and_collision_boxes:
             for entity in all_entities_to_render:
                 self.world_render.rect((250, 250, 250), entity.rect(), 1)
+            for _sprite, x, y, w, h in walls_to_render:
+                self.world_render.rect((250, 250, 250), Rect(x, y, w, h), 1)
 
         for npc in non_player_characters:
             if npc.is_enemy:
@@ -1,9 +1,17 @@
-from typing import Tuple, Optional, List, Any, Dict
+import weakref
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Tuple, Optional, List, Any, Dict, Callable, Iterable, MutableMapping
 
 import pygame
 from pygame.rect import Rect
 
 from pythongame.core.common import Direction, Sprite, UiIconSprite, PortraitIconSprite
+from pythongame.core.view.sprite_frame_cache import SpriteFrameDiskCache
+
+# Many SpriteSheet objects refer to the same image file. A file is only loaded once for as long as anything is using
+# it. (Sheets are only needed while frames are cut out from them, and are big, so they aren't kept around after that.)
+_loaded_sprite_sheets: MutableMapping[str, Any] = weakref.WeakValueDictionary()
 
 
 class SpriteInitializer:
@@ -15,19 +23,23 @@ class SpriteInitializer:
 class SpriteSheet(object):
     def __init__(self, file_path: str):
         self.file_path = file_path
-        self.sheet = None
 
-    def _load_sheet(self):
-        self.sheet = pygame.image.load(self.file_path).convert_alpha()
+    # The caller should keep a reference to the returned sheet while it's cutting out frames from it, so that the file
+    # isn't loaded again for every frame
+    def load(self):
+        sheet = _loaded_sprite_sheets.get(self.file_path)
+        if sheet is None:
+            sheet = pygame.image.load(self.file_path).convert_alpha()
+            _loaded_sprite_sheets[self.file_path] = sheet
+        return sheet
 
     def image_at(self, rect: Rect):
-        if self.sheet is None:
-            self._load_sheet()
+        sheet = self.load()
 
         # noinspection PyArgumentList
         image = pygame.Surface(rect.size, pygame.SRCALPHA)
         destination_in_image = (0, 0)
-        image.blit(self.sheet, destination_in_image, rect)
+        image.blit(sheet, destination_in_image, rect)
         transparent_color_in_image = (0, 0, 0)
         image.set_colorkey(transparent_color_in_image, pygame.RLEACCEL)
         return image
@@ -63,15 +75,30 @@ def load_and_scale_sprite(sprite_initializer: SpriteInitializer):
     return _load_and_scale_sprite(sprite_initializer.image_file_path, sprite_initializer.scaling_size)
 
 
+# Frames that are identical (same file, same part of it, same scaling) are only loaded once if the same
+# scaled_images_by_key is given. If a disk cache is given, frames are loaded from it rather than created from the source
+# images whenever possible.
+#
+# The sprite sheets that frames are cut out from are kept in sprite_sheets_in_use. If it's not given, they are let go of
+# once all frames of these sprites have been created.
 def load_and_scale_directional_sprites(
-        animations_by_dir: Dict[Direction, Animation]) -> Dict[Direction, List[ImageWithRelativePosition]]:
+        animations_by_dir: Dict[Direction, Animation],
+        scaled_images_by_key: Optional[MutableMapping[Any, Any]] = None,
+        disk_cache: Optional[SpriteFrameDiskCache] = None,
+        sprite_sheets_in_use: Optional[Dict[str, Any]] = None) -> Dict[Direction, List[ImageWithRelativePosition]]:
+    if scaled_images_by_key is None:
+        scaled_images_by_key = {}
+    if sprite_sheets_in_use is None:
+        sprite_sheets_in_use = {}
     images: Dict[Direction, List[ImageWithRelativePosition]] = {}
     for direction in animations_by_dir:
         animation = animations_by_dir[direction]
         images_for_dir: List[ImageWithRelativePosition] = []
         if animation.sprite_initializers:
             for sprite_init in animation.sprite_initializers:
-                scaled_image = load_and_scale_sprite(sprite_init)
+                key = (sprite_init.image_file_path, tuple(sprite_init.scaling_size))
+                scaled_image = _get_or_create_frame(
+                    key, lambda: load_and_scale_sprite(sprite_init), scaled_images_by_key, disk_cache)
                 images_for_dir.append(ImageWithRelativePosition(scaled_image, animation.position_relative_to_entity))
         elif animation.sprite_map_initializers:
             for sprite_map_init in animation.sprite_map_initializers:
@@ -82,8 +109,11 @@ def load_and_scale_directional_sprites(
                                  index_position_within_map[1] * original_sprite_size[1],
                                  original_sprite_size[0],
                                  original_sprite_size[1])
-                image = sprite_sheet.image_at(rectangle)
-                scaled_image = pygame.transform.scale(image, sprite_map_init.scaling_size)
+                key = (sprite_sheet.file_path, tuple(rectangle), tuple(sprite_map_init.scaling_size))
+                scaled_image = _get_or_create_frame(
+                    key, lambda: _create_frame_from_sheet(sprite_sheet, rectangle, sprite_map_init.scaling_size,
+                                                          sprite_sheets_in_use),
+                    scaled_images_by_key, disk_cache)
                 images_for_dir.append(ImageWithRelativePosition(scaled_image, animation.position_relative_to_entity))
         else:
             raise Exception("Invalid animation: " + str(animation))
@@ -91,22 +121,134 @@ def load_and_scale_directional_sprites(
     return images
 
 
+# The key starts with the path of the source image, and the rest of it is what the frame is created from that image
+def _get_or_create_frame(key: Tuple[Any, ...], create_frame: Callable[[], Any],
+                         scaled_images_by_key: MutableMapping[Any, Any], disk_cache: Optional[SpriteFrameDiskCache]):
+    scaled_image = scaled_images_by_key.get(key)
+    if scaled_image is None:
+        if disk_cache:
+            scaled_image = disk_cache.get_frame(key[0], key[1:], create_frame)
+        else:
+            scaled_image = create_frame()
+        scaled_images_by_key[key] = scaled_image
+    return scaled_image
+
+
+def _create_frame_from_sheet(sprite_sheet: SpriteSheet, rect: Rect, scaling_size: Tuple[int, int],
+                             sprite_sheets_in_use: Dict[str, Any]):
+    if sprite_sheet.file_path not in sprite_sheets_in_use:
+        sprite_sheets_in_use[sprite_sheet.file_path] = sprite_sheet.load()
+    return pygame.transform.scale(sprite_sheet.image_at(rect), scaling_size)
+
+
 def _load_and_scale_sprite(image_file_path: str, scaling_size: Tuple[int, int]):
     image = pygame.image.load(image_file_path).convert_alpha()
     return pygame.transform.scale(image, scaling_size)
 
 
-def load_images_by_sprite(dictionary: Dict[Sprite, Dict[Direction, Animation]]) \
-        -> Dict[Sprite, Dict[Direction, List[ImageWithRelativePosition]]]:
-    return {sprite: load_and_scale_directional_sprites(dictionary[sprite]) for sprite in dictionary}
+# Works like a dict from keys (sprites) to images, but an image is only loaded (decoded and scaled) the first time
+# that it's asked for. Most of the registered sprites (bosses, other heroes, items, etc) are never shown in a
+# game session, so loading all of them up front would mostly slow down the start of the game.
+#
+# If a memory budget is given, the least recently used images are thrown away when the loaded ones take up more
+# memory than that, and are loaded again if they're needed later.
+class LazyImages(Mapping):
+    def __init__(self, keys: Mapping, load_image: Callable[[Any], Any], get_size_in_bytes: Callable[[Any], int],
+                 memory_budget_in_bytes: Optional[int] = None):
+        # The images that can be loaded. This is typically one of the game data dicts (like ENTITY_SPRITE_INITIALIZERS)
+        self._keys = keys
+        self._load_image = load_image
+        self._get_size_in_bytes = get_size_in_bytes
+        self._memory_budget_in_bytes = memory_budget_in_bytes
+        # Least recently used first
+        self._loaded_images: Dict[Any, Any] = OrderedDict()
+        self._sizes_in_bytes: Dict[Any, int] = {}
+        self.loaded_size_in_bytes = 0
+        self.num_loads = 0
+        self.num_evictions = 0
+
+    def __getitem__(self, key):
+        image = self._loaded_images.get(key)
+        if image is None:
+            if key not in self._keys:
+                raise KeyError(key)
+            return self._load(key)
+        if self._memory_budget_in_bytes is not None:
+            self._loaded_images.move_to_end(key)
+        return image
+
+    # Checking if there is an image for a key doesn't load it
+    def __contains__(self, key) -> bool:
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def is_loaded(self, key) -> bool:
+        return key in self._loaded_images
+
+    # A hint that the images will be needed soon (for example the ones that are used by a map that's being loaded), so
+    # that they can be loaded before the game starts rather than in the middle of it. Unknown keys are ignored.
+    def preload(self, keys: Iterable[Any]):
+        for key in keys:
+            if key in self._keys:
+                # Loads the image if needed, and marks it as recently used
+                self[key]
+
+    def _load(self, key):
+        image = self._load_image(key)
+        size_in_bytes = self._get_size_in_bytes(image)
+        self._loaded_images[key] = image
+        self._sizes_in_bytes[key] = size_in_bytes
+        self.loaded_size_in_bytes += size_in_bytes
+        self.num_loads += 1
+        if self._memory_budget_in_bytes is not None:
+            # The image that was just loaded is kept even if it alone is bigger than the budget
+            while self.loaded_size_in_bytes > self._memory_budget_in_bytes and len(self._loaded_images) > 1:
+                evicted_key, _ = self._loaded_images.popitem(last=False)
+                self.loaded_size_in_bytes -= self._sizes_in_bytes.pop(evicted_key)
+                self.num_evictions += 1
+        return image
+
+
+def _get_surface_size_in_bytes(surface) -> int:
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+# Frames that are shared by several sprites are counted once for each of them
+def _get_directional_images_size_in_bytes(images: Dict[Direction, List[ImageWithRelativePosition]]) -> int:
+    return sum(_get_surface_size_in_bytes(image.image)
+               for images_for_dir in images.values() for image in images_for_dir)
+
+
+def load_images_by_sprite(dictionary: Dict[Sprite, Dict[Direction, Animation]],
+                          memory_budget_in_bytes: Optional[int] = None,
+                          disk_cache: Optional[SpriteFrameDiskCache] = None) -> LazyImages:
+    # Identical frames are shared between sprites for as long as any of the sprites that use them are loaded
+    scaled_images_by_key = weakref.WeakValueDictionary()
+    # Without a memory budget, sprite sheets are kept so that they're only decoded once. With a budget, they're dropped
+    # as soon as the frames of a sprite have been cut out from them (the budget only counts the frames, and sheets are
+    # often bigger than all of the frames that are loaded at a time). Loading the frames from the disk cache doesn't
+    # need the sheets at all.
+    sprite_sheets_in_use = {} if memory_budget_in_bytes is None else None
+    return LazyImages(dictionary,
+                      lambda sprite: load_and_scale_directional_sprites(
+                          dictionary[sprite], scaled_images_by_key, disk_cache, sprite_sheets_in_use),
+                      _get_directional_images_size_in_bytes,
+                      memory_budget_in_bytes)
 
 
-def load_images_by_ui_sprite(dictionary: Dict[UiIconSprite, str], icon_size: Tuple[int, int]) \
-        -> Dict[UiIconSprite, Any]:
-    return {sprite: load_and_scale_sprite(SpriteInitializer(dictionary[sprite], icon_size)) for sprite in dictionary
-            }
+def load_images_by_ui_sprite(dictionary: Dict[UiIconSprite, str], icon_size: Tuple[int, int]) -> LazyImages:
+    return LazyImages(dictionary,
+                      lambda sprite: load_and_scale_sprite(SpriteInitializer(dictionary[sprite], icon_size)),
+                      _get_surface_size_in_bytes)
 
 
 def load_images_by_portrait_sprite(dictionary: Dict[PortraitIconSprite, str], icon_size: Tuple[int, int]) \
-        -> Dict[PortraitIconSprite, Any]:
-    return {sprite: load_and_scale_sprite(SpriteInitializer(dictionary[sprite], icon_size)) for sprite in dictionary}
+        -> LazyImages:
+    return LazyImages(dictionary,
+                      lambda sprite: load_and_scale_sprite(SpriteInitializer(dictionary[sprite], icon_size)),
+                      _get_surface_size_in_bytes)
@@ -1,13 +1,22 @@
-from typing import Tuple, Callable, List, Optional
+from collections import OrderedDict
+from typing import Tuple, Callable, List, Optional, Dict, Any
 
 import pygame
 from pygame.rect import Rect
 
 from pythongame.core.math import sum_of_vectors
 from pythongame.core.view.image_loading import ImageWithRelativePosition
+from pythongame.core.view.text_cache import text_cache
 
 COLOR_WHITE = (250, 250, 250)
 
+# Tooltips, dialogs, windows, etc use a handful of different overlay sizes. Particles use a few more.
+MAX_CACHED_TRANSLUCENT_SURFACES = 128
+
+# Translucent surfaces that are filled with a color, keyed by (size, alpha, color). They are never drawn onto, so they
+# can be reused from one frame to the next rather than being allocated and filled on every call.
+_translucent_surfaces: Dict[Tuple[Tuple[int, int], int, Tuple[int, ...]], pygame.Surface] = OrderedDict()
+
 
 class DrawableArea:
     def __init__(self, screen, translate_coordinates: Callable[[Tuple[int, int]], Tuple[int, int]] = lambda pos: pos):
@@ -17,17 +26,15 @@ class DrawableArea:
     def fill(self, color: Tuple[int, int, int]):
         self.screen.fill(color)
 
-    def rect(self, color: Tuple[int, int, int], rect: Rect, line_width: int):
-        pygame.draw.rect(self.screen, color, self._translate_rect(rect), line_width)
+    def rect(self, color: Tuple[int, int, int], rect: Rect, line_width: int) -> Rect:
+        return pygame.draw.rect(self.screen, color, self._translate_rect(rect), line_width)
 
     def rect_filled(self, color: Tuple[int, int, int], rect: Rect):
         pygame.draw.rect(self.screen, color, self._translate_rect(rect))
 
     def rect_transparent(self, rect: Rect, alpha: int, color):
         # Using a separate surface is the only way to render a transparent rectangle
-        surface = pygame.Surface((rect[2], rect[3]))
-        surface.set_alpha(alpha)
-        surface.fill(color)
+        surface = _get_translucent_surface((rect[2], rect[3]), alpha, color)
         self.screen.blit(surface, self._translate_pos((rect[0], rect[1])))
 
     def line(self, color, start_pos: Tuple[int, int], end_pos: Tuple[int, int], line_width: int):
@@ -44,19 +51,25 @@ class DrawableArea:
         self.rect_filled(color, Rect(x, y, max(w * ratio_filled, 0), h))
 
     def text(self, font, text: str, pos: Tuple[int, int], color=COLOR_WHITE):
-        self.screen.blit(font.render(text, True, color), self._translate_pos(pos))
+        text_cache.blit_text(self.screen, font, text, self._translate_pos(pos), color)
 
     def text_centered(self, font, text: str, center_pos: Tuple[int, int], color=COLOR_WHITE):
         width = font.size(text)[0]
         pos = (int(center_pos[0] - width / 2), center_pos[1])
         self.text(font, text, pos, color)
 
-    def image(self, image, pos: Tuple[int, int]):
-        self.screen.blit(image, self._translate_pos(pos))
+    # Returns the area of the screen that was drawn to
+    def image(self, image, pos: Tuple[int, int]) -> Rect:
+        return self.screen.blit(image, self._translate_pos(pos))
+
+    # Blits all the images with one call, which is cheaper than blitting them one by one
+    def images(self, images_and_positions: List[Tuple[Any, Tuple[int, int]]]):
+        self.screen.blits([(image, self._translate_pos(pos)) for image, pos in images_and_positions], False)
 
-    def image_with_relative_pos(self, image_with_relative_position: ImageWithRelativePosition, pos: Tuple[int, int]):
+    def image_with_relative_pos(self, image_with_relative_position: ImageWithRelativePosition,
+                                pos: Tuple[int, int]) -> Rect:
         translated_pos = sum_of_vectors(pos, image_with_relative_position.position_relative_to_entity)
-        self.image(image_with_relative_position.image, translated_pos)
+        return self.image(image_with_relative_position.image, translated_pos)
 
     def _translate_rect(self, rect: Rect):
         translated_pos = self.translate_coordinates((rect[0], rect[1]))
@@ -67,6 +80,21 @@ class DrawableArea:
         return self.translate_coordinates((pos[0], pos[1]))
 
 
+def _get_translucent_surface(size: Tuple[int, int], alpha: int, color) -> pygame.Surface:
+    key = (size, alpha, tuple(color))
+    surface = _translucent_surfaces.get(key)
+    if surface is not None:
+        _translucent_surfaces.move_to_end(key)
+        return surface
+    surface = pygame.Surface(size)
+    surface.set_alpha(alpha)
+    surface.fill(color)
+    _translucent_surfaces[key] = surface
+    if len(_translucent_surfaces) > MAX_CACHED_TRANSLUCENT_SURFACES:
+        _translucent_surfaces.popitem(last=False)
+    return surface
+
+
 def split_text_into_lines(full_text: str, max_line_length: int) -> List[str]:
     if len(full_text) == 0:
         return []
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import struct
+from typing import Dict, Callable, Tuple, Optional, Any
+
+import pygame
+
+SPRITE_FRAME_CACHE_DIR = "sprite_cache"
+
+# Bump this whenever the way that frames are created (cut out from sprite sheets, scaled, etc) changes, so that frames
+# that were cached by an older version of the game aren't used
+SPRITE_FRAME_CACHE_VERSION = 1
+
+# magic, version, width, height, flags, colorkey (r, g, b), color masks (r, g, b, a)
+_HEADER = struct.Struct("<4sHIIBBBBIIII")
+_MAGIC = b"SPRF"
+_FLAG_COLORKEY = 1
+_FLAG_RLEACCEL = 2
+
+
+# Decoding the sprite sheets and scaling the frames is what makes loading sprites slow, so the final frames are stored
+# on disk as raw pixels (in the frame's own 32-bit format, along with its colorkey settings) that can be loaded again
+# much faster, and that give the exact same result when blitted.
+#
+# A cache file is named after a hash of everything that the frame depends on: the contents of the source image file
+# and the parameters that were used to create the frame from it (the part that's cut out, the scaling, etc). If any of
+# that changes, the old file is simply never asked for again.
+class SpriteFrameDiskCache:
+    def __init__(self, directory: str = SPRITE_FRAME_CACHE_DIR):
+        self._directory = directory
+        self._source_file_hashes: Dict[str, str] = {}
+        self._failed_to_write = False
+        self.hits = 0
+        self.misses = 0
+
+    # Returns the cached frame if there is one. Otherwise the frame is created and stored in the cache.
+    def get_frame(self, source_file_path: str, parameters: Tuple[Any, ...],
+                  create_frame: Callable[[], pygame.Surface]) -> pygame.Surface:
+        file_path = self._get_cache_file_path(source_file_path, parameters)
+        frame = self._read_frame(file_path)
+        if frame is not None:
+            self.hits += 1
+            return frame
+        self.misses += 1
+        frame = create_frame()
+        self._write_frame(file_path, frame)
+        return frame
+
+    def _get_cache_file_path(self, source_file_path: str, parameters: Tuple[Any, ...]) -> str:
+        if source_file_path not in self._source_file_hashes:
+            with open(source_file_path, 'rb') as file:
+                self._source_file_hashes[source_file_path] = hashlib.md5(file.read()).hexdigest()
+        source_file_hash = self._source_file_hashes[source_file_path]
+        key = repr((SPRITE_FRAME_CACHE_VERSION, source_file_hash, parameters))
+        return os.path.join(self._directory, hashlib.md5(key.encode()).hexdigest() + ".frame")
+
+    @staticmethod
+    def _read_frame(file_path: str) -> Optional[pygame.Surface]:
+        try:
+            with open(file_path, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < _HEADER.size:
+            return None
+        magic, version, w, h, flags, r, g, b, *masks = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != SPRITE_FRAME_CACHE_VERSION or len(data) != _HEADER.size + w * h * 4:
+            return None
+        frame = pygame.Surface((w, h), pygame.SRCALPHA, 32, masks)
+        if frame.get_pitch() != w * 4:
+            return None
+        frame.get_buffer().write(data[_HEADER.size:])
+        if flags & _FLAG_COLORKEY:
+            frame.set_colorkey((r, g, b), pygame.RLEACCEL if flags & _FLAG_RLEACCEL else 0)
+        return frame
+
+    def _write_frame(self, file_path: str, frame: pygame.Surface):
+        if frame.get_bitsize() != 32 or frame.get_pitch() != frame.get_width() * 4:
+            return
+        flags = 0
+        colorkey = frame.get_colorkey()
+        if colorkey is not None:
+            flags |= _FLAG_COLORKEY
+            # RLEACCELOK means that RLE acceleration was asked for. (RLEACCEL is only set once the surface is encoded.)
+            if frame.get_flags() & pygame.RLEACCELOK:
+                flags |= _FLAG_RLEACCEL
+        r, g, b = colorkey[:3] if colorkey is not None else (0, 0, 0)
+        w, h = frame.get_size()
+        header = _HEADER.pack(_MAGIC, SPRITE_FRAME_CACHE_VERSION, w, h, flags, r, g, b, *frame.get_masks())
+        # The pixels are copied as they are. (Converting them with pygame.image.tostring would lose information, as it
+        # derives the alpha values of a surface with a colorkey from the colorkey.)
+        pixels = frame.get_buffer().raw
+        try:
+            os.makedirs(self._directory, exist_ok=True)
+            # Written to a temporary file first, so that a crash can't leave a partly written frame behind
+            temporary_file_path = file_path + ".tmp"
+            with open(temporary_file_path, 'wb') as file:
+                file.write(header + pixels)
+            os.replace(temporary_file_path, file_path)
+        except OSError as e:
+            # The game works fine without the cache (it's just slower to load), so this is only reported once
+            if not self._failed_to_write:
+                print("Failed to write to sprite frame cache: " + str(e))
+                self._failed_to_write = True
@@ -0,0 +1,128 @@
+from collections import OrderedDict
+from typing import Tuple, Dict, Any
+
+import pygame
+
+# Text surfaces are small (typically a few kB each), and only a few hundred different texts are visible at a time
+MAX_CACHED_TEXT_SURFACES = 512
+MAX_CACHED_GLYPH_ATLASES = 64
+
+# Texts that only consist of these characters (damage numbers, stat bar values, cooldowns, etc) change often, so
+# they are composed from pre-rendered glyphs instead of being cached as whole surfaces
+GLYPH_CHARACTERS = "0123456789+-/%.,: "
+
+# A string that contains every glyph character, and is used to check if a font can be composed from glyphs
+_GLYPH_PROBE_TEXT = "-0123456789 +/%.,: 0"
+
+
+# Rendering text with a TTF font is expensive, and most of the texts that we show are the same from one frame to the
+# next, so rendered text surfaces are kept in an LRU cache keyed by (font, text, color).
+#
+# Numbers change all the time, and would push everything else out of the cache. If a font has the same width for all
+# glyph characters (and composing text from its glyphs gives the exact same pixels as rendering the text all at once),
+# numbers are instead drawn by blitting one pre-rendered glyph per character. The glyphs are kept in per (font, color)
+# "atlases".
+class TextCache:
+    def __init__(self, max_cached_surfaces: int = MAX_CACHED_TEXT_SURFACES,
+                 max_cached_glyph_atlases: int = MAX_CACHED_GLYPH_ATLASES):
+        self._max_cached_surfaces = max_cached_surfaces
+        self._max_cached_glyph_atlases = max_cached_glyph_atlases
+        self._surfaces: Dict[Tuple[Any, str, Tuple[int, ...]], pygame.Surface] = OrderedDict()
+        self._glyph_atlases: Dict[Tuple[Any, Tuple[int, ...]], Dict[str, pygame.Surface]] = OrderedDict()
+        # Whether texts in the font can be composed from glyphs
+        self._is_glyph_font: Dict[Any, bool] = {}
+        self.surface_hits = 0
+        self.surface_misses = 0
+        self.glyph_text_hits = 0
+        self.glyph_misses = 0
+
+    def blit_text(self, screen, font, text: str, pos: Tuple[int, int], color: Tuple[int, int, int]):
+        color = tuple(color)
+        if text and self._can_be_composed_from_glyphs(font, text):
+            self.glyph_text_hits += 1
+            atlas = self._get_glyph_atlas(font, color)
+            # Positions are truncated in the same way as when blitting the whole text
+            x, y = int(pos[0]), int(pos[1])
+            for character in text:
+                glyph = atlas[character]
+                screen.blit(glyph, (x, y))
+                x += glyph.get_width()
+        else:
+            screen.blit(self.render(font, text, color), pos)
+
+    def render(self, font, text: str, color: Tuple[int, int, int]) -> pygame.Surface:
+        key = (font, text, tuple(color))
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.surface_hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+        self.surface_misses += 1
+        surface = font.render(text, True, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self._max_cached_surfaces:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"surface_hits": self.surface_hits,
+                "surface_misses": self.surface_misses,
+                "glyph_text_hits": self.glyph_text_hits,
+                "glyph_misses": self.glyph_misses,
+                "cached_surfaces": len(self._surfaces),
+                "cached_glyph_atlases": len(self._glyph_atlases)}
+
+    def reset_stats(self):
+        self.surface_hits = 0
+        self.surface_misses = 0
+        self.glyph_text_hits = 0
+        self.glyph_misses = 0
+
+    def clear(self):
+        self._surfaces.clear()
+        self._glyph_atlases.clear()
+        self._is_glyph_font.clear()
+
+    def _can_be_composed_from_glyphs(self, font, text: str) -> bool:
+        for character in text:
+            if character not in GLYPH_CHARACTERS:
+                return False
+        is_glyph_font = self._is_glyph_font.get(font)
+        if is_glyph_font is None:
+            is_glyph_font = self._check_if_glyph_font(font)
+            self._is_glyph_font[font] = is_glyph_font
+        return is_glyph_font
+
+    def _get_glyph_atlas(self, font, color: Tuple[int, ...]) -> Dict[str, pygame.Surface]:
+        key = (font, color)
+        atlas = self._glyph_atlases.get(key)
+        if atlas is not None:
+            self._glyph_atlases.move_to_end(key)
+            return atlas
+        self.glyph_misses += len(GLYPH_CHARACTERS)
+        atlas = {character: font.render(character, True, color) for character in GLYPH_CHARACTERS}
+        self._glyph_atlases[key] = atlas
+        if len(self._glyph_atlases) > self._max_cached_glyph_atlases:
+            self._glyph_atlases.popitem(last=False)
+        return atlas
+
+    @staticmethod
+    def _check_if_glyph_font(font) -> bool:
+        color = (250, 250, 250)
+        glyphs = [font.render(character, True, color) for character in _GLYPH_PROBE_TEXT]
+        if len(set(glyph.get_size() for glyph in glyphs)) > 1:
+            return False
+        rendered = font.render(_GLYPH_PROBE_TEXT, True, color)
+        glyph_w, glyph_h = glyphs[0].get_size()
+        if rendered.get_size() != (glyph_w * len(glyphs), glyph_h):
+            return False
+        composed = pygame.Surface(rendered.get_size())
+        for i, glyph in enumerate(glyphs):
+            composed.blit(glyph, (i * glyph_w, 0))
+        expected = pygame.Surface(rendered.get_size())
+        expected.blit(rendered, (0, 0))
+        return pygame.image.tostring(composed, "RGB") == pygame.image.tostring(expected, "RGB")
+
+
+# Shared by all DrawableAreas
+text_cache = TextCache()
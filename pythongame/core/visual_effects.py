@@ -9,6 +9,8 @@ from pythongame.core.game_state import WorldEntity
 
 
 class VisualEffect:
+    __slots__ = ('_age', '_max_age', 'has_expired', 'attached_to_entity')
+
     def __init__(self, max_age: Millis, attached_to_entity: Optional[WorldEntity]):
         self._age = 0
         self._max_age = max_age
@@ -25,6 +27,8 @@ class VisualEffect:
 
 
 class Particle:
+    __slots__ = ('rect', 'velocity', 'color', 'alpha', 'time_left')
+
     def __init__(self, rect: Rect, velocity: Tuple[int, int], color: Tuple[int, int, int], alpha: int,
                  time_left: Millis):
         self.rect = rect
@@ -40,6 +44,7 @@ class Particle:
 
 
 class VisualParticleSystem(VisualEffect):
+    __slots__ = ('_particles',)
 
     def __init__(self, num_particles: int, position: Tuple[int, int], colors: List[Tuple[int, int, int]], alpha: int,
                  duration_interval: Tuple[Millis, Millis]):
@@ -68,6 +73,8 @@ class VisualParticleSystem(VisualEffect):
 
 
 class VisualLine(VisualEffect):
+    __slots__ = ('color', 'start_position', 'end_position', 'line_width')
+
     def __init__(self, color: Tuple[int, int, int], start_position: Tuple[int, int], end_position: Tuple[int, int],
                  max_age: Millis, line_width: int):
         super().__init__(max_age, None)
@@ -78,6 +85,8 @@ class VisualLine(VisualEffect):
 
 
 class VisualCircle(VisualEffect):
+    __slots__ = ('color', 'center_position', 'start_radius', 'end_radius', 'line_width')
+
     def __init__(self, color: Tuple[int, int, int], center_position: Tuple[int, int], start_radius: int,
                  end_radius: int, max_age: Millis, line_width: int, attached_to_entity: WorldEntity = None):
         super().__init__(max_age, attached_to_entity)
@@ -98,6 +107,8 @@ class VisualCircle(VisualEffect):
 
 
 class VisualCross(VisualEffect):
+    __slots__ = ('radius', 'color', 'center_position', 'line_width')
+
     def __init__(self, color: Tuple[int, int, int], center_position: Tuple[int, int], radius: int, max_age: Millis,
                  line_width: int, attached_to_entity: WorldEntity = None):
         super().__init__(max_age, attached_to_entity)
@@ -121,6 +132,8 @@ class VisualCross(VisualEffect):
 
 
 class VisualRect(VisualEffect):
+    __slots__ = ('color', 'center_position', 'start_width', 'end_width', 'line_width')
+
     def __init__(self, color: Tuple[int, int, int], center_position: Tuple[int, int], start_width: int, end_width: int,
                  max_age: Millis, line_width: int, attached_to_entity: WorldEntity = None):
         super().__init__(max_age, attached_to_entity)
@@ -140,6 +153,8 @@ class VisualRect(VisualEffect):
 
 
 class VisualText(VisualEffect):
+    __slots__ = ('text', 'color', 'start_position', 'end_position', 'emphasis')
+
     def __init__(self, text: str, color: Tuple[int, int, int], start_position: Tuple[int, int],
                  end_position: Tuple[int, int], max_age: Millis, emphasis: bool = False):
         super().__init__(max_age, None)
@@ -156,6 +171,8 @@ class VisualText(VisualEffect):
 
 
 class VisualSprite(VisualEffect):
+    __slots__ = ('sprite', 'position', '_animation_progress', 'max_age')
+
     def __init__(self, sprite: Sprite, position: Tuple[int, int], max_age: Millis, attached_to_entity: WorldEntity):
         super().__init__(max_age, attached_to_entity)
         self.sprite = sprite
@@ -1,4 +1,4 @@
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Iterable
 
 from pygame.rect import Rect
 
@@ -6,7 +6,12 @@ from pythongame.core.common import Sprite, Direction, Observable, Millis
 from pythongame.core.math import translate_in_direction
 
 
+# There are thousands of these on a map (most of them walls), so __slots__ is used to keep them small
 class WorldEntity:
+    __slots__ = ('x', 'y', 'sprite', 'direction', '_speed', '_speed_multiplier', '_effective_speed', '_is_moving',
+                 'pygame_collision_rect', 'movement_animation_progress', 'visible', 'view_z', 'movement_changed',
+                 'position_changed', 'dynamic_buckets')
+
     def __init__(self, pos: Tuple[int, int], size: Tuple[int, int], sprite: Sprite, direction=Direction.LEFT, speed=0):
         self.x: int = pos[0]
         self.y: int = pos[1]
@@ -22,6 +27,7 @@ class WorldEntity:
         self.view_z = 0  # increasing Z values = moving into the screen
         self.movement_changed: Observable = None  # space optimization: Only allocate when needed (i.e. for player entity)
         self.position_changed: Observable = None  # space optimization: Only allocate when needed (i.e. for player entity)
+        self.dynamic_buckets = None  # Only set while the entity is indexed by the game world (i.e. for NPCs)
 
     def set_moving_in_dir(self, direction: Direction):
         if direction is None:
@@ -50,6 +56,23 @@ class WorldEntity:
             return translate_in_direction((self.x, self.y), self.direction, distance)
         return None
 
+    # Equivalent to calling get_new_position_according_to_dir_and_speed() and then set_position() on each of the moving
+    # entities, but done in a single pass with fewer calls per entity. This is meant for entities that don't collide
+    # with anything while moving, like projectiles.
+    @staticmethod
+    def move_all_according_to_dir_and_speed(entities: Iterable['WorldEntity'], time_passed: Millis):
+        for entity in entities:
+            if entity._is_moving:
+                entity.x, entity.y = translate_in_direction(
+                    (entity.x, entity.y), entity.direction, entity._effective_speed * time_passed)
+                rect = entity.pygame_collision_rect
+                rect.x = entity.x
+                rect.y = entity.y
+                if entity.dynamic_buckets is not None:
+                    entity.dynamic_buckets.update_entity(entity)
+                if entity.position_changed is not None:
+                    entity.notify_position_observers()
+
     def update_movement_animation(self, time_passed: Millis):
         if self._is_moving:
             self.update_animation(time_passed)
@@ -89,6 +112,8 @@ class WorldEntity:
         self.y = new_position[1]
         self.pygame_collision_rect.x = self.x
         self.pygame_collision_rect.y = self.y
+        if self.dynamic_buckets is not None:
+            self.dynamic_buckets.update_entity(self)
         self.notify_position_observers()
 
     def rotate_right(self):
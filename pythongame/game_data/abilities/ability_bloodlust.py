@@ -4,7 +4,7 @@ from pythongame.core.abilities import AbilityData, ABILITIES, register_ability_d
 from pythongame.core.ability_effects import register_ability_effect, AbilityResult, AbilityWasUsedSuccessfully
 from pythongame.core.buff_effects import register_buff_effect, get_buff_effect, \
     StatModifyingBuffEffect
-from pythongame.core.common import BuffType, Millis, AbilityType, UiIconSprite, SoundId, PeriodicTimer, HeroUpgradeId, \
+from pythongame.core.common import BuffType, Millis, AbilityType, UiIconSprite, SoundId, HeroUpgradeId, \
     HeroStat
 from pythongame.core.game_data import register_ui_icon_sprite_path, \
     register_buff_text
@@ -36,19 +36,19 @@ class BloodLust(StatModifyingBuffEffect):
 
     def __init__(self):
         super().__init__(BUFF_TYPE, {HeroStat.LIFE_STEAL: LIFE_STEAL_BONUS_RATIO, HeroStat.MOVEMENT_SPEED: SPEED_BONUS})
-        self.timer = PeriodicTimer(Millis(250))
 
     def apply_start_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
         super().apply_start_effect(game_state, buffed_entity, buffed_npc)
         sword_slash_data = ABILITIES[AbilityType.SWORD_SLASH]
         sword_slash_data.cooldown -= SWORD_SLASH_CD_BONUS
 
-    def apply_middle_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter,
-                            time_passed: Millis):
-        if self.timer.update_and_check_if_ready(time_passed):
-            visual_effect = VisualCircle(
-                (250, 0, 0,), buffed_entity.get_center_position(), 25, 30, Millis(350), 1, buffed_entity)
-            game_state.game_world.visual_effects.append(visual_effect)
+    def get_periodic_effect_interval(self) -> Optional[Millis]:
+        return Millis(250)
+
+    def apply_periodic_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
+        visual_effect = VisualCircle(
+            (250, 0, 0,), buffed_entity.get_center_position(), 25, 30, Millis(350), 1, buffed_entity)
+        game_state.game_world.visual_effects.append(visual_effect)
 
     def apply_end_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
         super().apply_end_effect(game_state, buffed_entity, buffed_npc)
@@ -1,8 +1,10 @@
+from typing import Optional
+
 from pythongame.core.abilities import AbilityData, ABILITIES, register_ability_data
 from pythongame.core.ability_effects import register_ability_effect, AbilityResult, AbilityWasUsedSuccessfully
 from pythongame.core.buff_effects import register_buff_effect, AbstractBuffEffect, get_buff_effect
 from pythongame.core.common import Sprite, ProjectileType, AbilityType, Millis, \
-    Direction, BuffType, SoundId, UiIconSprite, PeriodicTimer, HeroUpgradeId
+    Direction, BuffType, SoundId, UiIconSprite, HeroUpgradeId
 from pythongame.core.damage_interactions import deal_player_damage_to_enemy, DamageType
 from pythongame.core.game_data import register_ui_icon_sprite_path, \
     register_entity_sprite_map
@@ -70,20 +72,18 @@ def _apply_ability(game_state: GameState) -> AbilityResult:
 
 class Rooted(AbstractBuffEffect):
 
-    def __init__(self):
-        self.timer = PeriodicTimer(DEBUFF_DAMAGE_INTERVAL)
-
     def apply_start_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
         buffed_npc.stun_status.add_one()
         buffed_entity.set_not_moving()
         game_state.game_world.visual_effects.append(create_visual_stun_text(buffed_entity))
 
-    def apply_middle_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter,
-                            time_passed: Millis):
-        if self.timer.update_and_check_if_ready(time_passed):
-            deal_player_damage_to_enemy(game_state, buffed_npc, 1, DamageType.MAGIC)
-            game_state.game_world.visual_effects.append(
-                VisualCircle((0, 150, 0), buffed_entity.get_center_position(), 30, 55, Millis(150), 2, buffed_entity))
+    def get_periodic_effect_interval(self) -> Optional[Millis]:
+        return DEBUFF_DAMAGE_INTERVAL
+
+    def apply_periodic_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
+        deal_player_damage_to_enemy(game_state, buffed_npc, 1, DamageType.MAGIC)
+        game_state.game_world.visual_effects.append(
+            VisualCircle((0, 150, 0), buffed_entity.get_center_position(), 30, 55, Millis(150), 2, buffed_entity))
 
     def apply_end_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
         buffed_npc.stun_status.remove_one()
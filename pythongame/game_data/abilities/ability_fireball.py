@@ -1,11 +1,11 @@
 import random
-from typing import Tuple
+from typing import Tuple, Optional
 
 from pythongame.core.abilities import AbilityData, ABILITIES, register_ability_data
 from pythongame.core.ability_effects import register_ability_effect, AbilityWasUsedSuccessfully, AbilityResult
 from pythongame.core.buff_effects import get_buff_effect, AbstractBuffEffect, register_buff_effect
 from pythongame.core.common import Sprite, ProjectileType, AbilityType, Millis, \
-    Direction, SoundId, BuffType, PeriodicTimer, HeroUpgradeId
+    Direction, SoundId, BuffType, HeroUpgradeId
 from pythongame.core.damage_interactions import deal_player_damage_to_enemy, DamageType
 from pythongame.core.game_data import UiIconSprite, \
     register_ui_icon_sprite_path, register_entity_sprite_map
@@ -69,16 +69,14 @@ class ProjectileController(AbstractProjectileController):
 
 
 class BurntByFireball(AbstractBuffEffect):
-    def __init__(self):
-        self.timer = PeriodicTimer(FIREBALL_TALENT_BURN_INTERVAL)
-
-    def apply_middle_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter,
-                            time_passed: Millis):
-        if self.timer.update_and_check_if_ready(time_passed):
-            deal_player_damage_to_enemy(game_state, buffed_npc, 1, DamageType.MAGIC)
-            game_state.game_world.visual_effects.append(
-                VisualCircle((180, 50, 50), buffed_npc.world_entity.get_center_position(), 10, 20, Millis(50), 0,
-                             buffed_entity))
+    def get_periodic_effect_interval(self) -> Optional[Millis]:
+        return FIREBALL_TALENT_BURN_INTERVAL
+
+    def apply_periodic_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
+        deal_player_damage_to_enemy(game_state, buffed_npc, 1, DamageType.MAGIC)
+        game_state.game_world.visual_effects.append(
+            VisualCircle((180, 50, 50), buffed_npc.world_entity.get_center_position(), 10, 20, Millis(50), 0,
+                         buffed_entity))
 
     def get_buff_type(self):
         return BUFF_TYPE
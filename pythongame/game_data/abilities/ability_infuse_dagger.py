@@ -1,10 +1,12 @@
+from typing import Optional
+
 from pygame.rect import Rect
 
 from pythongame.core.abilities import AbilityData, register_ability_data
 from pythongame.core.ability_effects import register_ability_effect, AbilityWasUsedSuccessfully, AbilityFailedToExecute, \
     AbilityResult
 from pythongame.core.buff_effects import get_buff_effect, AbstractBuffEffect, register_buff_effect
-from pythongame.core.common import AbilityType, Millis, BuffType, UiIconSprite, SoundId, PeriodicTimer, \
+from pythongame.core.common import AbilityType, Millis, BuffType, UiIconSprite, SoundId, \
     PLAYER_ENTITY_SIZE
 from pythongame.core.damage_interactions import deal_player_damage_to_enemy, DamageType
 from pythongame.core.game_data import register_ui_icon_sprite_path
@@ -50,7 +52,6 @@ def _apply_ability(game_state: GameState) -> AbilityResult:
 class DamagedByInfusedDagger(AbstractBuffEffect):
 
     def __init__(self, should_stun: bool):
-        self.timer = PeriodicTimer(DAMAGE_TICK_INTERVAL)
         self.should_stun = should_stun
 
     def apply_start_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
@@ -59,14 +60,15 @@ class DamagedByInfusedDagger(AbstractBuffEffect):
             buffed_entity.set_not_moving()
             game_state.game_world.visual_effects.append(create_visual_stun_text(buffed_entity))
 
-    def apply_middle_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter,
-                            time_passed: Millis):
-        if self.timer.update_and_check_if_ready(time_passed):
-            deal_player_damage_to_enemy(game_state, buffed_npc, DAMAGE_PER_TICK, DamageType.PHYSICAL)
-            if self.should_stun:
-                effect_position = buffed_entity.get_center_position()
-                game_state.game_world.visual_effects.append(
-                    VisualRect((250, 250, 50), effect_position, 30, 40, Millis(100), 1, buffed_entity))
+    def get_periodic_effect_interval(self) -> Optional[Millis]:
+        return DAMAGE_TICK_INTERVAL
+
+    def apply_periodic_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
+        deal_player_damage_to_enemy(game_state, buffed_npc, DAMAGE_PER_TICK, DamageType.PHYSICAL)
+        if self.should_stun:
+            effect_position = buffed_entity.get_center_position()
+            game_state.game_world.visual_effects.append(
+                VisualRect((250, 250, 50), effect_position, 30, 40, Millis(100), 1, buffed_entity))
 
     def apply_end_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
         if self.should_stun:
@@ -1,5 +1,7 @@
+from typing import Optional
+
 from pythongame.core.buff_effects import AbstractBuffEffect, get_buff_effect, register_buff_effect
-from pythongame.core.common import ConsumableType, Sprite, UiIconSprite, SoundId, Millis, BuffType, PeriodicTimer
+from pythongame.core.common import ConsumableType, Sprite, UiIconSprite, SoundId, Millis, BuffType
 from pythongame.core.consumable_effects import register_consumable_effect, ConsumableWasConsumed
 from pythongame.core.damage_interactions import deal_player_damage_to_enemy, DamageType
 from pythongame.core.game_data import register_entity_sprite_initializer, register_ui_icon_sprite_path, \
@@ -18,16 +20,14 @@ DEBUFF_TOTAL_DAMAGE = int(round(DEBUFF_DURATION / DEBUFF_DAMAGE_INTERVAL))
 
 class BuffEffect(AbstractBuffEffect):
 
-    def __init__(self):
-        self._timer = PeriodicTimer(DEBUFF_DAMAGE_INTERVAL)
+    def get_periodic_effect_interval(self) -> Optional[Millis]:
+        return DEBUFF_DAMAGE_INTERVAL
 
-    def apply_middle_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter,
-                            time_passed: Millis):
-        if self._timer.update_and_check_if_ready(time_passed):
-            deal_player_damage_to_enemy(game_state, buffed_npc, DAMAGE, DamageType.MAGIC)
-            pos = buffed_entity.get_center_position()
-            effect = VisualCircle((100, 150, 100), pos, 40, 50, Millis(500), 1)
-            game_state.game_world.visual_effects += [effect]
+    def apply_periodic_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
+        deal_player_damage_to_enemy(game_state, buffed_npc, DAMAGE, DamageType.MAGIC)
+        pos = buffed_entity.get_center_position()
+        effect = VisualCircle((100, 150, 100), pos, 40, 50, Millis(500), 1)
+        game_state.game_world.visual_effects += [effect]
 
     def get_buff_type(self):
         return BUFF_TYPE
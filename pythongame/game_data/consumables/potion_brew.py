@@ -1,7 +1,7 @@
 from typing import Optional
 
 from pythongame.core.buff_effects import AbstractBuffEffect, get_buff_effect, register_buff_effect
-from pythongame.core.common import ConsumableType, Sprite, UiIconSprite, Millis, BuffType, PeriodicTimer, SoundId
+from pythongame.core.common import ConsumableType, Sprite, UiIconSprite, Millis, BuffType, SoundId
 from pythongame.core.consumable_effects import ConsumableWasConsumed, \
     register_consumable_effect, ConsumableFailedToBeConsumed
 from pythongame.core.damage_interactions import player_receive_healing, player_receive_mana
@@ -27,14 +27,12 @@ def _apply(game_state: GameState):
 
 
 class RestoringHealthFromBrew(AbstractBuffEffect):
-    def __init__(self):
-        self.timer = PeriodicTimer(Millis(600))
-
-    def apply_middle_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter,
-                            time_passed: Millis):
-        if self.timer.update_and_check_if_ready(time_passed):
-            player_receive_healing(3, game_state)
-            player_receive_mana(3, game_state)
+    def get_periodic_effect_interval(self) -> Optional[Millis]:
+        return Millis(600)
+
+    def apply_periodic_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
+        player_receive_healing(3, game_state)
+        player_receive_mana(3, game_state)
 
     def get_buff_type(self):
         return BUFF_TYPE
@@ -1,5 +1,7 @@
+from typing import Optional
+
 from pythongame.core.buff_effects import AbstractBuffEffect, register_buff_effect, get_buff_effect
-from pythongame.core.common import ConsumableType, BuffType, Millis, Sprite, PeriodicTimer, SoundId
+from pythongame.core.common import ConsumableType, BuffType, Millis, Sprite, SoundId
 from pythongame.core.consumable_effects import create_potion_visual_effect_at_player, ConsumableWasConsumed, \
     register_consumable_effect
 from pythongame.core.game_data import register_ui_icon_sprite_path, UiIconSprite, register_buff_text, ConsumableData, \
@@ -20,18 +22,16 @@ def _apply_invis(game_state: GameState):
 
 
 class Invisibility(AbstractBuffEffect):
-    def __init__(self):
-        self.timer = PeriodicTimer(Millis(320))
-
     def apply_start_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
         game_state.player_state.is_invisible = True
 
-    def apply_middle_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter,
-                            time_passed: Millis):
-        if self.timer.update_and_check_if_ready(time_passed):
-            game_state.game_world.visual_effects.append(
-                VisualRect((0, 0, 250), game_state.game_world.player_entity.get_center_position(), 45, 60, Millis(400),
-                           1, game_state.game_world.player_entity))
+    def get_periodic_effect_interval(self) -> Optional[Millis]:
+        return Millis(320)
+
+    def apply_periodic_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
+        game_state.game_world.visual_effects.append(
+            VisualRect((0, 0, 250), game_state.game_world.player_entity.get_center_position(), 45, 60, Millis(400),
+                       1, game_state.game_world.player_entity))
 
     def apply_end_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
         game_state.player_state.is_invisible = False
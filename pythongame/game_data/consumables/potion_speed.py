@@ -1,6 +1,8 @@
+from typing import Optional
+
 from pythongame.core.buff_effects import register_buff_effect, get_buff_effect, \
     StatModifyingBuffEffect
-from pythongame.core.common import ConsumableType, BuffType, Millis, UiIconSprite, Sprite, PeriodicTimer, SoundId, \
+from pythongame.core.common import ConsumableType, BuffType, Millis, UiIconSprite, Sprite, SoundId, \
     HeroStat
 from pythongame.core.consumable_effects import create_potion_visual_effect_at_player, ConsumableWasConsumed, \
     register_consumable_effect
@@ -27,14 +29,14 @@ def _apply_speed(game_state: GameState):
 class IncreasedMoveSpeed(StatModifyingBuffEffect):
     def __init__(self):
         super().__init__(BUFF_TYPE, {HeroStat.MOVEMENT_SPEED: SPEED_INCREASE})
-        self.timer = PeriodicTimer(Millis(100))
-
-    def apply_middle_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter,
-                            time_passed: Millis):
-        if self.timer.update_and_check_if_ready(time_passed):
-            game_state.game_world.visual_effects.append(
-                VisualCircle((150, 200, 250), game_state.game_world.player_entity.get_center_position(), 5, 10,
-                             Millis(200), 0))
+
+    def get_periodic_effect_interval(self) -> Optional[Millis]:
+        return Millis(100)
+
+    def apply_periodic_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
+        game_state.game_world.visual_effects.append(
+            VisualCircle((150, 200, 250), game_state.game_world.player_entity.get_center_position(), 5, 10,
+                         Millis(200), 0))
 
     def get_buff_type(self):
         return BUFF_TYPE
@@ -6,8 +6,8 @@ from pythongame.core.damage_interactions import deal_damage_to_player, DamageTyp
 from pythongame.core.entity_creation import create_npc
 from pythongame.core.game_data import NpcData
 from pythongame.core.game_state import GameState, NonPlayerCharacter, Projectile
-from pythongame.core.math import get_position_from_center_position, is_x_and_y_within_distance, \
-    get_directions_to_position, translate_in_direction
+from pythongame.core.math import get_position_from_center_position, get_directions_to_position, \
+    translate_in_direction
 from pythongame.core.npc_behaviors import AbstractNpcMind, EnemySummonTrait, EnemyRandomWalkTrait
 from pythongame.core.pathfinding.grid_astar_pathfinder import GlobalPathFinder
 from pythongame.core.projectile_controllers import AbstractProjectileController, register_projectile_controller, \
@@ -48,10 +48,8 @@ class NpcMind(AbstractNpcMind):
             self._healing_cooldown = self._random_healing_cooldown()
             necro_center_pos = npc.world_entity.get_center_position()
             nearby_hurt_enemies = [
-                e for e in game_state.game_world.non_player_characters
-                if e.is_enemy
-                   and is_x_and_y_within_distance(necro_center_pos, e.world_entity.get_center_position(), 200)
-                   and e != npc and not e.health_resource.is_at_max()
+                e for e in game_state.game_world.get_enemies_within_x_y_distance_of(200, necro_center_pos)
+                if e != npc and not e.health_resource.is_at_max()
             ]
             if nearby_hurt_enemies:
                 healing_target = nearby_hurt_enemies[0]
@@ -1,7 +1,8 @@
 import random
+from typing import Optional
 
 from pythongame.core.buff_effects import get_buff_effect, register_buff_effect, AbstractBuffEffect
-from pythongame.core.common import ItemType, Sprite, UiIconSprite, HeroStat, BuffType, Millis, PeriodicTimer, \
+from pythongame.core.common import ItemType, Sprite, UiIconSprite, HeroStat, BuffType, Millis, \
     StatModifierInterval
 from pythongame.core.damage_interactions import deal_player_damage_to_enemy, DamageType
 from pythongame.core.game_state import Event, GameState, PlayerDamagedEnemy, NonPlayerCharacter
@@ -31,14 +32,12 @@ class ItemEffect(AbstractItemEffect):
 
 class BuffEffect(AbstractBuffEffect):
 
-    def __init__(self):
-        self.timer = PeriodicTimer(DAMAGE_INTERVAL)
+    def get_periodic_effect_interval(self) -> Optional[Millis]:
+        return DAMAGE_INTERVAL
 
-    def apply_middle_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter,
-                            time_passed: Millis):
-        if self.timer.update_and_check_if_ready(time_passed):
-            deal_player_damage_to_enemy(game_state, buffed_npc, DAMAGE, DamageType.PHYSICAL,
-                                        damage_source=DAMAGE_SOURCE)
+    def apply_periodic_effect(self, game_state: GameState, buffed_entity: WorldEntity, buffed_npc: NonPlayerCharacter):
+        deal_player_damage_to_enemy(game_state, buffed_npc, DAMAGE, DamageType.PHYSICAL,
+                                    damage_source=DAMAGE_SOURCE)
 
     def get_buff_type(self):
         return BUFF_TYPE
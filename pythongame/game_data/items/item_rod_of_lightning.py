@@ -7,6 +7,7 @@ from pythongame.core.damage_interactions import deal_player_damage_to_enemy, Dam
 from pythongame.core.game_state import GameState
 from pythongame.core.item_effects import AbstractItemEffect
 from pythongame.core.item_inventory import ItemEquipmentCategory
+from pythongame.core.math import get_euclidean_distance
 from pythongame.core.visual_effects import VisualCircle, VisualLine
 from pythongame.game_data.items.register_items_util import register_custom_effect_item
 
@@ -23,6 +24,9 @@ def strike_enemies(game_state: GameState, num_enemies: int):
     player_entity = game_state.game_world.player_entity
     player_center_position = player_entity.get_center_position()
     close_enemies = game_state.game_world.get_enemies_within_x_y_distance_of(140, player_center_position)
+    # The closest ones are struck first
+    close_enemies.sort(
+        key=lambda enemy: get_euclidean_distance(enemy.world_entity.get_center_position(), player_center_position))
     # TODO: sound effect
     for enemy in close_enemies[0: num_enemies]:
         damage_amount: float = MIN_DMG + random.random() * (MAX_DMG - MIN_DMG)
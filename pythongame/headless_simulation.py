@@ -0,0 +1,83 @@
+import time
+
+from pythongame.core.common import HeroId, Millis, EngineEvent
+from pythongame.core.entity_creation import create_hero_world_entity, create_player_state_as_initial
+from pythongame.core.game_state import GameState
+from pythongame.core.global_path_finder import init_global_path_finder
+from pythongame.core.sound_player import init_silent_sound_player
+from pythongame.map_file import load_map_from_json_file
+from pythongame.scenes.scenes_game.game_engine import GameEngine
+from pythongame.scenes.scenes_game.game_ui_view import InfoMessage
+
+# Same as in the real game (see main.py). It affects which NPCs are close enough to the camera to be simulated.
+CAMERA_SIZE = (800, 430)
+
+
+class SimulationResult:
+    def __init__(self, num_frames: int, simulated_time: Millis, wall_clock_seconds: float, player_died: bool):
+        self.num_frames = num_frames
+        self.simulated_time = simulated_time
+        self.wall_clock_seconds = wall_clock_seconds
+        self.player_died = player_died
+
+    def get_simulated_seconds_per_wall_clock_second(self) -> float:
+        if self.wall_clock_seconds == 0:
+            return float('inf')
+        return self.simulated_time / 1000 / self.wall_clock_seconds
+
+
+# Runs the game engine without a display or audio device, stepping time in fixed increments as fast as possible.
+# This is meant for balance testing and soak testing. There is no world behavior (quests, dungeons, respawning) and
+# nobody controls the player, but the game_engine can be used directly between calls to run_one_frame.
+class HeadlessSimulation:
+    def __init__(self, map_file_path: str, hero_id: HeroId, time_per_frame: Millis = Millis(16)):
+        init_silent_sound_player()
+        self.time_per_frame = time_per_frame
+        # Messages that would normally be shown in the UI are simply dropped
+        self.info_message = InfoMessage()
+
+        # NPC's share a "global path finder" that needs to be initialized before we start creating NPCs.
+        path_finder = init_global_path_finder()
+        map_data = load_map_from_json_file(map_file_path)
+        game_world = map_data.game_world
+        game_world.player_entity = create_hero_world_entity(hero_id, map_data.player_position)
+        enabled_portals = {portal.portal_id: portal.world_entity.sprite for portal in game_world.portals
+                           if portal.is_enabled}
+        self.game_state = GameState(game_world=game_world,
+                                    camera_size=CAMERA_SIZE,
+                                    player_state=create_player_state_as_initial(hero_id, enabled_portals),
+                                    is_dungeon=False,
+                                    player_spawn_position=map_data.player_position)
+        path_finder.set_grid(self.game_state.pathfinder_wall_grid)
+        self.game_state.pathfinder_wall_grid_changed.register_observer(
+            lambda change: path_finder.set_cell_blocked(*change))
+        self.game_state.center_camera_on_player()
+        self.game_engine = GameEngine(self.game_state, self.info_message)
+        self.game_engine.on_abilities_updated()
+
+        self.num_frames = 0
+        self.simulated_time = Millis(0)
+        self.player_died = False
+
+    def run_one_frame(self):
+        engine_events = self.game_engine.run_one_frame(self.time_per_frame)
+        self.info_message.clear_messages()
+        self.num_frames += 1
+        self.simulated_time += self.time_per_frame
+        if EngineEvent.PLAYER_DIED in engine_events:
+            self.player_died = True
+
+    # Runs until the given amount of time has been simulated, or until the player dies
+    def run(self, simulated_time: Millis, stop_if_player_dies: bool = True) -> SimulationResult:
+        start_num_frames = self.num_frames
+        start_simulated_time = self.simulated_time
+        end_simulated_time = self.simulated_time + simulated_time
+        start_time = time.perf_counter()
+        while self.simulated_time < end_simulated_time:
+            self.run_one_frame()
+            if self.player_died and stop_if_player_dies:
+                break
+        return SimulationResult(num_frames=self.num_frames - start_num_frames,
+                                simulated_time=Millis(self.simulated_time - start_simulated_time),
+                                wall_clock_seconds=time.perf_counter() - start_time,
+                                player_died=self.player_died)
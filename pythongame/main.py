@@ -7,10 +7,12 @@ from pythongame.core.common import Millis, SceneTransition, AbstractScene, Abstr
 from pythongame.core.game_data import ENTITY_SPRITE_INITIALIZERS, \
     UI_ICON_SPRITE_PATHS, PORTRAIT_ICON_SPRITE_PATHS
 from pythongame.core.game_state import GameState
+from pythongame.core.global_path_finder import configure_pathfinding_worker_processes, close_global_path_finder
 from pythongame.core.sound_player import init_sound_player
 from pythongame.core.view.game_world_view import GameWorldView
 from pythongame.core.view.image_loading import load_images_by_sprite, \
     load_images_by_ui_sprite, load_images_by_portrait_sprite
+from pythongame.core.view.sprite_frame_cache import SpriteFrameDiskCache
 from pythongame.player_file import SaveFileHandler
 from pythongame.register_game_data import register_all_game_data
 from pythongame.scenes.scene_challenge_complete_screen.scene_challenge_complete_screen import \
@@ -32,6 +34,12 @@ ABILITY_KEY_LABELS = ["Q", "W", "E", "R", "T"]
 SCREEN_SIZE = (800, 600)  # If this is not a supported resolution, performance takes a big hit
 CAMERA_SIZE = (800, 430)
 
+# The game is simulated in fixed time steps, regardless of how often the screen is rendered
+DEFAULT_SIMULATION_RATE = 60  # frames per second
+DEFAULT_MAX_RENDER_RATE = 60  # frames per second (0 == no limit)
+# If rendering falls far behind, the game is slowed down rather than simulating ever more frames to catch up
+MAX_SIMULATION_STEPS_PER_RENDER = 5
+
 register_all_game_data()
 
 
@@ -53,7 +61,7 @@ class SceneFactory(AbstractSceneFactory):
             self.save_file_handler, self, flags, view)
 
     def creating_world_scene(self, flags: InitFlags) -> AbstractScene:
-        return CreatingWorldScene(self, self.camera_size, self.ui_view, flags)
+        return CreatingWorldScene(self, self.camera_size, self.ui_view, self.world_view, flags)
 
     def picking_hero_scene(self, init_flags: InitFlags) -> AbstractScene:
         view = PickingHeroView(self.pygame_screen, self.images_by_portrait_sprite)
@@ -80,13 +88,15 @@ class SceneFactory(AbstractSceneFactory):
             total_time_played_on_character: Millis,
             create_new_game_engine_and_behavior: Callable[[GameEngine], Tuple[GameEngine, AbstractWorldBehavior]]) \
             -> AbstractScene:
-        return SwitchingGameWorldScene(self, game_engine, self.ui_view, character_file, total_time_played_on_character,
-                                       create_new_game_engine_and_behavior)
+        return SwitchingGameWorldScene(self, game_engine, self.ui_view, self.world_view, character_file,
+                                       total_time_played_on_character, create_new_game_engine_and_behavior)
 
 
 class Main:
     def __init__(self, map_file_name: Optional[str], chosen_hero_id: Optional[str], hero_start_level: Optional[int],
-                 start_money: Optional[int], save_file_name: Optional[str], fullscreen: bool):
+                 start_money: Optional[int], save_file_name: Optional[str], fullscreen: bool,
+                 simulation_rate: int = DEFAULT_SIMULATION_RATE, max_render_rate: int = DEFAULT_MAX_RENDER_RATE,
+                 sprite_memory_budget_mb: Optional[int] = None, use_sprite_cache: bool = True):
 
         cmd_flags = CommandlineFlags(map_file_name, chosen_hero_id, hero_start_level, start_money, save_file_name)
 
@@ -96,7 +106,12 @@ class Main:
 
         self.fullscreen = fullscreen
         self.pygame_screen = self.setup_screen()
-        images_by_sprite = load_images_by_sprite(ENTITY_SPRITE_INITIALIZERS)
+        # Images are loaded the first time they're used. With a memory budget, the least recently used sprites are
+        # thrown away (and loaded again if needed) to stay within it.
+        sprite_memory_budget = sprite_memory_budget_mb * 1024 * 1024 if sprite_memory_budget_mb else None
+        # Scaled sprite frames are stored on disk, so that they don't need to be created again on the next launch
+        sprite_frame_cache = SpriteFrameDiskCache() if use_sprite_cache else None
+        images_by_sprite = load_images_by_sprite(ENTITY_SPRITE_INITIALIZERS, sprite_memory_budget, sprite_frame_cache)
         images_by_ui_sprite = load_images_by_ui_sprite(UI_ICON_SPRITE_PATHS, UI_ICON_SIZE)
         big_images_by_ui_sprite = load_images_by_ui_sprite(UI_ICON_SPRITE_PATHS, UI_ICON_BIG_SIZE)
         self.images_by_portrait_sprite = load_images_by_portrait_sprite(PORTRAIT_ICON_SPRITE_PATHS, PORTRAIT_ICON_SIZE)
@@ -108,6 +123,9 @@ class Main:
         self.save_file_handler = SaveFileHandler()
         init_sound_player()
         self.clock = pygame.time.Clock()
+        self.simulation_time_step = Millis(round(1000 / simulation_rate))
+        self.max_render_rate = max_render_rate
+        self._unsimulated_time = 0
 
         self.scene_factory = SceneFactory(self.pygame_screen, self.images_by_portrait_sprite, self.save_file_handler,
                                           self.ui_view, self.world_view, self.toggle_fullscreen, CAMERA_SIZE)
@@ -129,8 +147,9 @@ class Main:
 
     def _main_loop(self):
         while True:
-            self.clock.tick()
-            time_passed = Millis(self.clock.get_time())
+            self.clock.tick(self.max_render_rate)
+            self._unsimulated_time = min(self._unsimulated_time + self.clock.get_time(),
+                                         self.simulation_time_step * MAX_SIMULATION_STEPS_PER_RENDER)
             fps_string = str(int(self.clock.get_fps()))
             self.ui_view.update_fps_string(fps_string)
 
@@ -140,24 +159,31 @@ class Main:
                     self.quit_game()
                 elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE and self.fullscreen:
                     self.toggle_fullscreen()
-                    self.ui_view.on_fullscreen_changed(self.fullscreen)
 
             transition: Optional[SceneTransition] = self.scene.handle_user_input(input_events)
             if transition:
                 self.change_scene(transition)
                 continue
 
-            transition: Optional[SceneTransition] = self.scene.run_one_frame(time_passed)
+            transition: Optional[SceneTransition] = None
+            while self._unsimulated_time >= self.simulation_time_step and transition is None:
+                self._unsimulated_time -= self.simulation_time_step
+                transition = self.scene.run_one_frame(self.simulation_time_step)
             if transition:
                 self.change_scene(transition)
                 continue
 
-            self.scene.render()
-            pygame.display.update()
+            self.scene.set_render_interpolation(self._unsimulated_time / self.simulation_time_step)
+            changed_screen_areas = self.scene.render()
+            if changed_screen_areas is None:
+                pygame.display.update()
+            else:
+                pygame.display.update(changed_screen_areas)
 
     def toggle_fullscreen(self):
         self.fullscreen = not self.fullscreen
         self.pygame_screen = self.setup_screen()
+        self.ui_view.on_fullscreen_changed(self.fullscreen)
 
     def setup_screen(self):
         flags = pygame.DOUBLEBUF
@@ -167,6 +193,7 @@ class Main:
 
     @staticmethod
     def quit_game():
+        close_global_path_finder()
         pygame.quit()
         sys.exit()
 
@@ -176,6 +203,11 @@ class Main:
 
 
 def start(map_file_name: Optional[str], chosen_hero_id: Optional[str], hero_start_level: Optional[int],
-          start_money: Optional[int], save_file_name: Optional[str], fullscreen: bool):
-    main = Main(map_file_name, chosen_hero_id, hero_start_level, start_money, save_file_name, fullscreen)
+          start_money: Optional[int], save_file_name: Optional[str], fullscreen: bool,
+          num_pathfinding_workers: int = 0, simulation_rate: int = DEFAULT_SIMULATION_RATE,
+          max_render_rate: int = DEFAULT_MAX_RENDER_RATE, sprite_memory_budget_mb: Optional[int] = None,
+          use_sprite_cache: bool = True):
+    configure_pathfinding_worker_processes(num_pathfinding_workers)
+    main = Main(map_file_name, chosen_hero_id, hero_start_level, start_money, save_file_name, fullscreen,
+                simulation_rate, max_render_rate, sprite_memory_budget_mb, use_sprite_cache)
     main.main_loop()
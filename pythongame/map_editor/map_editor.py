@@ -19,6 +19,7 @@ from pythongame.core.math import sum_of_vectors
 from pythongame.core.view.game_world_view import GameWorldView
 from pythongame.core.view.image_loading import load_images_by_sprite, load_images_by_ui_sprite, \
     load_images_by_portrait_sprite
+from pythongame.core.view.sprite_frame_cache import SpriteFrameDiskCache
 from pythongame.dungeon_generator import DungeonGenerator, Grid
 from pythongame.map_editor.map_editor_ui_view import MapEditorView, PORTRAIT_ICON_SIZE, MAP_EDITOR_UI_ICON_SIZE, \
     EntityTab, GenerateRandomMap, SetCameraPosition, AddEntity, DeleteEntities, DeleteDecorations, MapEditorAction, \
@@ -128,7 +129,7 @@ class MapEditor:
         pygame.init()
 
         pygame_screen = pygame.display.set_mode(SCREEN_SIZE)
-        images_by_sprite = load_images_by_sprite(ENTITY_SPRITE_INITIALIZERS)
+        images_by_sprite = load_images_by_sprite(ENTITY_SPRITE_INITIALIZERS, disk_cache=SpriteFrameDiskCache())
         images_by_ui_sprite = load_images_by_ui_sprite(UI_ICON_SPRITE_PATHS, MAP_EDITOR_UI_ICON_SIZE)
         images_by_portrait_sprite = load_images_by_portrait_sprite(PORTRAIT_ICON_SPRITE_PATHS, PORTRAIT_ICON_SIZE)
         world_view = GameWorldView(pygame_screen, CAMERA_SIZE, SCREEN_SIZE, images_by_sprite)
@@ -220,12 +221,13 @@ class MapEditor:
 
             world_view.render_world(
                 all_entities_to_render=self.game_state.get_all_entities_to_render(),
-                decorations_to_render=self.game_state.get_decorations_to_render(),
+                walls_state=self.game_state.game_world.walls_state,
+                decorations_state=self.game_state.game_world.decorations_state,
                 player_entity=self.game_state.game_world.player_entity,
                 is_player_invisible=self.game_state.player_state.is_invisible,
                 player_active_buffs=self.game_state.player_state.active_buffs,
                 camera_world_area=self.game_state.camera_world_area,
-                non_player_characters=self.game_state.game_world.non_player_characters,
+                non_player_characters=self.game_state.get_npcs_to_render(),
                 visual_effects=self.game_state.game_world.visual_effects,
                 render_hit_and_collision_boxes=self.render_outlines,
                 player_health=self.game_state.player_state.health_resource.value,
@@ -245,8 +247,8 @@ class MapEditor:
             fps_string = str(int(clock.get_fps()))
             self.ui_view.render(
                 num_enemies=len(self.game_state.game_world.non_player_characters),
-                num_walls=len(self.game_state.game_world.walls_state.walls),
-                num_decorations=len(self.game_state.game_world.decorations_state.decoration_entities),
+                num_walls=self.game_state.game_world.walls_state.get_num_walls(),
+                num_decorations=self.game_state.game_world.decorations_state.get_num_decorations(),
                 npc_positions=npc_positions,
                 player_position=self.game_state.game_world.player_entity.get_center_position(),
                 grid=self.grid,
@@ -256,7 +258,7 @@ class MapEditor:
             pygame.display.flip()
 
     def _notify_ui_of_new_wall_positions(self):
-        wall_positions = [w.world_entity.get_position() for w in self.game_state.game_world.walls_state.walls]
+        wall_positions = self.game_state.game_world.walls_state.get_all_wall_positions()
         self.ui_view.update_wall_positions(wall_positions)
 
     def save(self):
@@ -330,7 +332,7 @@ class MapEditor:
         print("Creating smart floor tiles ...")
         floor_cells = []
         world_area = self.game_state.game_world.entire_world_area
-        for decoration in self.game_state.game_world.decorations_state.decoration_entities:
+        for decoration in self.game_state.game_world.decorations_state.get_all_decorations():
             for x in range(int(decoration.x), int(decoration.x) + GRID_CELL_SIZE * 2, GRID_CELL_SIZE):
                 for y in range(int(decoration.y), int(decoration.y) + GRID_CELL_SIZE * 2, GRID_CELL_SIZE):
                     if len(self.game_state.game_world.walls_state.get_walls_at_position((x, y))) == 0:
@@ -428,8 +430,7 @@ class MapEditor:
         if len(existing_walls) > 0:
             if existing_walls[0].wall_type == wall_type:
                 return
-            for w in existing_walls:
-                self.game_state.game_world.walls_state.remove_wall(w)
+            self.game_state.game_world.walls_state.remove_all_from_position(world_pos)
         wall = create_wall(wall_type, world_pos)
         self.game_state.game_world.walls_state.add_wall(wall)
         self._notify_ui_of_new_wall_positions()
@@ -452,7 +453,7 @@ class MapEditor:
         self.game_state.game_world.walls_state.remove_all_from_position(snapped_mouse_world_position)
         for enemy in [e for e in self.game_state.game_world.non_player_characters if
                       e.world_entity.get_position() == snapped_mouse_world_position]:
-            self.game_state.game_world.non_player_characters.remove(enemy)
+            self.game_state.game_world.remove_non_player_character(enemy)
         for consumable in [p for p in self.game_state.game_world.consumables_on_ground
                            if p.world_entity.get_position() == snapped_mouse_world_position]:
             self.game_state.game_world.consumables_on_ground.remove(consumable)
@@ -536,5 +537,4 @@ def _add_decoration(decoration_sprite: Sprite, game_state: GameState, snapped_mo
 
 
 def _delete_map_decorations_from_position(game_state: GameState, world_pos: Tuple[int, int]):
-    for d in game_state.game_world.decorations_state.get_decorations_at_position(world_pos):
-        game_state.game_world.decorations_state.remove_decoration(d)
+    game_state.game_world.decorations_state.remove_all_from_position(world_pos)
@@ -1,9 +1,10 @@
 from typing import Optional, Tuple
 
 from pythongame.core.common import Sprite, WallType, NpcType, ConsumableType, PortalId, HeroId, ItemId
-from pythongame.core.entity_creation import create_portal, create_hero_world_entity, create_npc, create_wall, \
+from pythongame.core.entity_creation import create_portal, create_hero_world_entity, create_npc, \
     create_consumable_on_ground, create_item_on_ground, create_decoration_entity, create_money_pile_on_ground, \
     create_chest, create_shrine, create_dungeon_entrance
+from pythongame.core.game_data import WALLS
 
 
 class MapEditorWorldEntity:
@@ -54,8 +55,8 @@ class MapEditorWorldEntity:
 
     @staticmethod
     def wall(wall_type: WallType):
-        entity = create_wall(wall_type, (0, 0)).world_entity
-        e = MapEditorWorldEntity(entity.sprite, (entity.pygame_collision_rect.w, entity.pygame_collision_rect.h))
+        wall_data = WALLS[wall_type]
+        e = MapEditorWorldEntity(wall_data.sprite, wall_data.size)
         e.wall_type = wall_type
         return e
 
@@ -64,10 +64,9 @@ class MapJson:
             "items_on_ground": [ItemJson.serialize(i) for i in game_world.items_on_ground],
             "money_piles_on_ground": [MoneyJson.serialize(m) for m in game_world.money_piles_on_ground],
             "non_player_characters": [NpcJson.serialize(npc) for npc in game_world.non_player_characters],
-            "walls": [WallJson.serialize(wall) for wall in game_world.walls_state.walls],
+            "walls": [WallJson.serialize(wall) for wall in game_world.walls_state.get_all_walls()],
             "entire_world_area": WorldAreaJson.serialize(game_world.entire_world_area),
-            "decorations": [DecorationJson.serialize(d) for d in
-                            game_world.decorations_state.decoration_entities],
+            "decorations": [DecorationJson.serialize(d) for d in game_world.decorations_state.get_all_decorations()],
             "portals": [PortalJson.serialize(p) for p in game_world.portals],
             "chests": [ChestJson.serialize(c) for c in game_world.chests],
             "shrines": [ShrineJson.serialize(s) for s in game_world.shrines],
@@ -147,7 +146,7 @@ class NpcJson:
 class WallJson:
     @staticmethod
     def serialize(wall: Wall):
-        return {"wall_type": wall.wall_type.name, "position": wall.world_entity.get_position()}
+        return {"wall_type": wall.wall_type.name, "position": wall.get_position()}
 
     @staticmethod
     def deserialize(data) -> Wall:
@@ -9,6 +9,7 @@ from pythongame.core.global_path_finder import init_global_path_finder
 from pythongame.core.hero_upgrades import pick_talent
 from pythongame.core.npc_behaviors import get_quest
 from pythongame.core.quests import QuestId
+from pythongame.core.view.game_world_view import GameWorldView
 from pythongame.core.world_behavior import ChallengeBehavior, StoryBehavior
 from pythongame.map_file import load_map_from_json_file
 from pythongame.player_file import SavedPlayerState
@@ -43,11 +44,12 @@ class CreatingWorldScene(AbstractScene):
     def __init__(
             self,
             scene_factory: AbstractSceneFactory,
-            camera_size: Tuple[int, int], ui_view: GameUiView,
+            camera_size: Tuple[int, int], ui_view: GameUiView, world_view: GameWorldView,
             flags: InitFlags):
         self.scene_factory = scene_factory
         self.camera_size = camera_size
         self.ui_view = ui_view
+        self.world_view = world_view
 
         # map hero money level saved
         self.flags: InitFlags = flags
@@ -73,6 +75,12 @@ class CreatingWorldScene(AbstractScene):
         path_finder = init_global_path_finder()
         game_state = self._load_map_and_setup_game_state(map_file_path, picked_hero_id)
         path_finder.set_grid(game_state.pathfinder_wall_grid)
+        game_state.pathfinder_wall_grid_changed.register_observer(
+            lambda change: path_finder.set_cell_blocked(*change))
+
+        # Images are loaded the first time they're rendered. Loading the ones that the map uses right away avoids
+        # stutter once the game has started.
+        self.world_view.preload_images(game_state.game_world.get_all_sprites())
 
         # Must center camera before notifying player position as it affects which walls are shown on the minimap
         game_state.center_camera_on_player()
@@ -2,6 +2,7 @@ from typing import Optional, Callable, Tuple
 
 from pythongame.core.common import Millis, AbstractScene, SceneTransition, AbstractWorldBehavior
 from pythongame.core.global_path_finder import init_global_path_finder
+from pythongame.core.view.game_world_view import GameWorldView
 from pythongame.scenes.scene_factory import AbstractSceneFactory
 from pythongame.scenes.scenes_game.game_engine import GameEngine
 from pythongame.scenes.scenes_game.game_ui_view import GameUiView
@@ -14,12 +15,14 @@ class SwitchingGameWorldScene(AbstractScene):
             scene_factory: AbstractSceneFactory,
             game_engine: GameEngine,
             ui_view: GameUiView,
+            world_view: GameWorldView,
             character_file: str,
             total_time_played_on_character: Millis,
             create_new_game_engine_and_behavior: Callable[[GameEngine], Tuple[GameEngine, AbstractWorldBehavior]]):
         self.scene_factory = scene_factory
         self.previous_game_engine = game_engine
         self.ui_view = ui_view
+        self.world_view = world_view
         self.character_file = character_file
         self.total_time_played_on_character = total_time_played_on_character
         self.create_new_game_engine_and_behavior = create_new_game_engine_and_behavior
@@ -34,6 +37,10 @@ class SwitchingGameWorldScene(AbstractScene):
         new_game_engine, new_world_behavior = self.create_new_game_engine_and_behavior(self.previous_game_engine)
         new_game_state = new_game_engine.game_state
         path_finder.set_grid(new_game_state.pathfinder_wall_grid)
+        new_game_state.pathfinder_wall_grid_changed.register_observer(
+            lambda change: path_finder.set_cell_blocked(*change))
+
+        self.world_view.preload_images(new_game_state.game_world.get_all_sprites())
 
         # Must center camera before notifying player position as it affects which walls are shown on the minimap
         new_game_state.center_camera_on_player()
@@ -1,3 +1,4 @@
+import math
 from typing import Dict
 
 from pythongame.core.abilities import ABILITIES, allocate_input_keys_for_abilities, KEYS_BY_ABILITY_TYPE
@@ -9,22 +10,44 @@ from pythongame.core.entity_creation import create_money_pile_on_ground, create_
 from pythongame.core.game_data import CONSUMABLES, NON_PLAYER_CHARACTERS, NpcCategory, PORTALS
 from pythongame.core.game_state import GameState, ItemOnGround, ConsumableOnGround, LootableOnGround, BuffWithDuration, \
     EnemyDiedEvent, NonPlayerCharacter, Portal, PlayerLeveledUp, PlayerLearnedNewAbility, WarpPoint, Chest, \
-    PlayerUnlockedNewTalent, AgentBuffsUpdate, Shrine
+    PlayerUnlockedNewTalent, Shrine
+from pythongame.core.global_path_finder import get_global_path_finder
 from pythongame.core.item_data import ITEM_ENTITY_SIZE, get_item_data_by_type
 from pythongame.core.item_data import randomized_item_id, get_item_data
 from pythongame.core.item_effects import create_item_effect
 from pythongame.core.item_inventory import ItemWasDeactivated, ItemWasActivated, ItemActivationEvent
 from pythongame.core.loot import LootEntry, MoneyLootEntry, ItemLootEntry, ConsumableLootEntry, AffixedItemLootEntry
-from pythongame.core.math import boxes_intersect, rects_intersect, sum_of_vectors, \
+from pythongame.core.math import boxes_intersect, sum_of_vectors, \
     get_rect_with_increased_size_in_all_directions, translate_in_direction
 from pythongame.core.sound_player import play_sound
+from pythongame.core.timer_scheduler import TimerScheduler
 from pythongame.core.visual_effects import create_visual_exp_text, create_teleport_effects, VisualRect, VisualCircle
+from pythongame.core.world_entity import WorldEntity
 from pythongame.game_data.loot_tables import get_loot_table
 from pythongame.game_data.portals import PORTAL_DELAY
 from pythongame.game_data.shrines import apply_shrine_buff_to_player
 from pythongame.scenes.scenes_game.game_ui_view import InfoMessage
 from pythongame.scenes.scenes_game.player_controls import PlayerControls
 
+# NPCs close to the camera are fully simulated every frame. Further out, their AI and movement are run at a lower
+# frequency, and beyond that only their buffs and health regen are updated, for a few NPCs per frame. Whenever an NPC
+# is simulated, it's with all the time that has passed since it was last simulated.
+NPC_FULL_SIMULATION_CAMERA_MARGIN = 100
+NPC_COARSE_SIMULATION_CAMERA_MARGIN = 300
+NPC_COARSE_SIMULATION_INTERVAL = Millis(100)
+NPC_BACKGROUND_SIMULATION_INTERVAL = Millis(1000)
+# An NPC that comes back from far away shouldn't move a long distance in one step
+NPC_MAX_CONTROLLED_TIME_STEP = Millis(200)
+
+
+# An NPC that is due to be simulated in the current frame
+class _NpcToSimulate:
+    def __init__(self, npc: NonPlayerCharacter, time_passed: Millis, is_controlled: bool):
+        self.npc = npc
+        self.time_passed = time_passed
+        # Whether the NPC's AI and movement should run (otherwise only buffs and regen are updated)
+        self.is_controlled = is_controlled
+
 
 class GameEngine:
 
@@ -35,6 +58,7 @@ class GameEngine:
         self.ability_was_clicked = Observable()
         self.abilities_were_updated = Observable()
         self.consumable_was_clicked = Observable()
+        self._next_background_npc_index = 0
 
     def try_use_ability(self, ability_type: AbilityType):
         PlayerControls.try_use_ability(ability_type, self.game_state, self.info_message)
@@ -227,11 +251,18 @@ class GameEngine:
 
         events = []
 
-        for npc in self.game_state.game_world.non_player_characters:
-            # NonPlayerCharacter AI shouldn't run if enemy is too far out of sight
-            if self._is_npc_close_to_camera(npc):
+        self.game_state.timer_scheduler.advance(time_passed, self.game_state)
+        npcs_to_simulate = self._get_npcs_to_simulate(time_passed)
+
+        for npc_to_simulate in npcs_to_simulate:
+            if npc_to_simulate.is_controlled:
+                npc = npc_to_simulate.npc
                 npc.npc_mind.control_npc(self.game_state, npc, self.game_state.game_world.player_entity,
-                                         self.game_state.player_state.is_invisible, time_passed)
+                                         self.game_state.player_state.is_invisible,
+                                         min(npc_to_simulate.time_passed, NPC_MAX_CONTROLLED_TIME_STEP))
+
+        # NPCs only request new paths above. The searches are run here, under a per-frame budget.
+        get_global_path_finder().serve_path_requests()
 
         for projectile in self.game_state.game_world.projectile_entities:
             projectile.projectile_controller.notify_time_passed(self.game_state, projectile, time_passed)
@@ -264,66 +295,75 @@ class GameEngine:
                 self._put_loot_on_ground(enemy_death_position, loot)
                 self.game_state.player_state.notify_about_event(EnemyDiedEvent(), self.game_state)
             events.append(EngineEvent.ENEMY_DIED)
+        if npcs_that_died:
+            npcs_to_simulate = [n for n in npcs_to_simulate if n.npc not in npcs_that_died]
 
         self.game_state.game_world.remove_expired_projectiles()
         self.game_state.game_world.remove_expired_visual_effects()
         self.game_state.game_world.remove_opened_chests()
 
-        player_buffs_update = self.game_state.player_state.handle_buffs(time_passed)
-        for buff in player_buffs_update.buffs_that_started:
-            buff.buff_effect.apply_start_effect(self.game_state, self.game_state.game_world.player_entity, None)
-        for buff in player_buffs_update.buffs_that_were_active:
-            buff_should_end = buff.buff_effect.apply_middle_effect(
-                self.game_state, self.game_state.game_world.player_entity, None, time_passed)
-            if buff_should_end:
-                buff.force_cancel()
-
-        for buff in player_buffs_update.buffs_that_ended:
-            buff.buff_effect.apply_end_effect(self.game_state, self.game_state.game_world.player_entity, None)
-
-        for enemy in self.game_state.game_world.non_player_characters:
-            enemy.health_resource.regenerate(time_passed)
-            buffs_update = _handle_buffs(enemy.active_buffs, time_passed)
-            for buff in buffs_update.buffs_that_started:
-                buff.buff_effect.apply_start_effect(self.game_state, enemy.world_entity, enemy)
-            for buff in buffs_update.buffs_that_were_active:
-                buff.buff_effect.apply_middle_effect(self.game_state, enemy.world_entity, enemy, time_passed)
-            for buff in buffs_update.buffs_that_ended:
-                buff.buff_effect.apply_end_effect(self.game_state, enemy.world_entity, enemy)
+        # Buff expiration and periodic buff effects are handled by the timer schedulers. Here, new buffs are started
+        # and middle effects are applied.
+        player_state = self.game_state.player_state
+        player_state.timer_scheduler.advance(time_passed, self.game_state)
+        _start_buffs(self.game_state, player_state.buffs_to_start, player_state.timer_scheduler, None)
+        for buff in player_state.active_buffs:
+            if buff.has_applied_start_effect and not buff.has_been_force_cancelled \
+                    and buff.buff_effect.has_middle_effect():
+                buff_should_end = buff.buff_effect.apply_middle_effect(
+                    self.game_state, self.game_state.game_world.player_entity, None, time_passed)
+                if buff_should_end:
+                    buff.force_cancel()
+        if player_state.active_buffs:
+            # The UI shows the remaining duration of each buff
+            player_state.notify_buff_observers()
+
+        for npc_to_simulate in npcs_to_simulate:
+            enemy = npc_to_simulate.npc
+            enemy.health_resource.regenerate(npc_to_simulate.time_passed)
+            _start_buffs(self.game_state, enemy.buffs_to_start, self.game_state.timer_scheduler, enemy)
+            for buff in enemy.active_buffs:
+                if buff.has_applied_start_effect and not buff.has_been_force_cancelled \
+                        and buff.buff_effect.has_middle_effect():
+                    buff.buff_effect.apply_middle_effect(self.game_state, enemy.world_entity, enemy,
+                                                         npc_to_simulate.time_passed)
 
         for item_effect in self.game_state.player_state.item_inventory.get_all_active_item_effects():
             item_effect.apply_middle_effect(self.game_state, time_passed)
 
         self.game_state.player_state.health_resource.regenerate(time_passed)
         self.game_state.player_state.mana_resource.regenerate(time_passed)
-        self.game_state.player_state.recharge_ability_cooldowns(time_passed)
+        self.game_state.player_state.update_ability_cooldowns()
 
         self.game_state.game_world.player_entity.update_movement_animation(time_passed)
-        for npc in self.game_state.game_world.non_player_characters:
-            npc.world_entity.update_movement_animation(time_passed)
+        for npc_to_simulate in npcs_to_simulate:
+            if npc_to_simulate.is_controlled:
+                npc_to_simulate.npc.world_entity.update_movement_animation(npc_to_simulate.time_passed)
         for projectile in self.game_state.game_world.projectile_entities:
             projectile.world_entity.update_movement_animation(time_passed)
         for warp_point in self.game_state.game_world.warp_points:
             warp_point.world_entity.update_animation(time_passed)
 
-        for npc in self.game_state.game_world.non_player_characters:
-            # Enemies shouldn't move towards player when they are out of sight
-            if self._is_npc_close_to_camera(npc):
-                self.game_state.game_world.update_npc_position_within_game_world(npc, time_passed)
+        for npc_to_simulate in npcs_to_simulate:
+            if npc_to_simulate.is_controlled:
+                self.game_state.game_world.update_npc_position_within_game_world(
+                    npc_to_simulate.npc, min(npc_to_simulate.time_passed, NPC_MAX_CONTROLLED_TIME_STEP))
         # player can still move when stunned (could be charging)
         self.game_state.game_world.update_world_entity_position_within_game_world(
             self.game_state.game_world.player_entity, time_passed)
-        for projectile in self.game_state.game_world.projectile_entities:
-            new_pos = projectile.world_entity.get_new_position_according_to_dir_and_speed(time_passed)
-            projectile.world_entity.set_position(new_pos)
+        WorldEntity.move_all_according_to_dir_and_speed(
+            [projectile.world_entity for projectile in self.game_state.game_world.projectile_entities], time_passed)
 
+        entities_that_effects_can_attach_to = None
         for visual_effect in self.game_state.game_world.visual_effects:
             visual_effect.update_position_if_attached_to_entity()
             if visual_effect.attached_to_entity:
-                npcs = [e.world_entity for e in self.game_state.game_world.non_player_characters]
-                projectiles = [p.world_entity for p in self.game_state.game_world.projectile_entities]
-                if visual_effect.attached_to_entity not in npcs + projectiles + [
-                    self.game_state.game_world.player_entity]:
+                if entities_that_effects_can_attach_to is None:
+                    entities_that_effects_can_attach_to = \
+                        {e.world_entity for e in self.game_state.game_world.non_player_characters} | \
+                        {p.world_entity for p in self.game_state.game_world.projectile_entities} | \
+                        {self.game_state.game_world.player_entity}
+                if visual_effect.attached_to_entity not in entities_that_effects_can_attach_to:
                     visual_effect.has_expired = True
 
         # ------------------------------------
@@ -336,22 +376,25 @@ class GameEngine:
                 money_pile.has_been_picked_up_and_should_be_removed = True
                 self.game_state.player_state.modify_money(money_pile.amount)
 
-        for enemy in [e for e in self.game_state.game_world.non_player_characters if e.is_enemy]:
-            for projectile in self.game_state.game_world.get_projectiles_intersecting_with(enemy.world_entity):
-                if not projectile.has_collided_and_should_be_removed:
-                    projectile.projectile_controller.apply_enemy_collision(enemy, self.game_state, projectile)
-
-        for player_summon in [npc for npc in self.game_state.game_world.non_player_characters
-                              if npc.npc_category == NpcCategory.PLAYER_SUMMON]:
-            for projectile in self.game_state.game_world.get_projectiles_intersecting_with(player_summon.world_entity):
+        # All intersections are found in one pass. The callbacks are then run in the same order as if we had looped
+        # over all enemies, then all player summons, and lastly the player.
+        projectiles_by_entity = self.game_state.game_world.get_projectiles_by_intersecting_npc_or_player()
+        if projectiles_by_entity:
+            for enemy in [e for e in self.game_state.game_world.non_player_characters if e.is_enemy]:
+                for projectile in projectiles_by_entity.get(enemy.world_entity, []):
+                    if not projectile.has_collided_and_should_be_removed:
+                        projectile.projectile_controller.apply_enemy_collision(enemy, self.game_state, projectile)
+
+            for player_summon in [npc for npc in self.game_state.game_world.non_player_characters
+                                  if npc.npc_category == NpcCategory.PLAYER_SUMMON]:
+                for projectile in projectiles_by_entity.get(player_summon.world_entity, []):
+                    if not projectile.has_collided_and_should_be_removed:
+                        projectile.projectile_controller.apply_player_summon_collision(player_summon, self.game_state,
+                                                                                       projectile)
+
+            for projectile in projectiles_by_entity.get(self.game_state.game_world.player_entity, []):
                 if not projectile.has_collided_and_should_be_removed:
-                    projectile.projectile_controller.apply_player_summon_collision(player_summon, self.game_state,
-                                                                                   projectile)
-
-        for projectile in self.game_state.game_world.get_projectiles_intersecting_with(
-                self.game_state.game_world.player_entity):
-            if not projectile.has_collided_and_should_be_removed:
-                projectile.projectile_controller.apply_player_collision(self.game_state, projectile)
+                    projectile.projectile_controller.apply_player_collision(self.game_state, projectile)
 
         for projectile in self.game_state.game_world.projectile_entities:
             if not projectile.has_collided_and_should_be_removed:
@@ -407,10 +450,47 @@ class GameEngine:
             KEYS_BY_ABILITY_TYPE[ability_type].key_string: ability_type for ability_type in abilities}
         self.abilities_were_updated.notify(ability_types_by_key_string)
 
-    def _is_npc_close_to_camera(self, npc: NonPlayerCharacter):
-        camera_rect_with_margin = get_rect_with_increased_size_in_all_directions(
-            self.game_state.camera_world_area, 100)
-        return rects_intersect(npc.world_entity.rect(), camera_rect_with_margin)
+    def _get_npcs_to_simulate(self, time_passed: Millis) -> List[_NpcToSimulate]:
+        game_world = self.game_state.game_world
+        camera_world_area = self.game_state.camera_world_area
+        npcs_to_simulate: List[_NpcToSimulate] = []
+
+        for npc in game_world.get_npcs_intersecting_rect(get_rect_with_increased_size_in_all_directions(
+                camera_world_area, NPC_FULL_SIMULATION_CAMERA_MARGIN)):
+            npcs_to_simulate.append(self._start_simulating_npc(npc, time_passed, True))
+        fully_simulated_npcs = {n.npc for n in npcs_to_simulate}
+
+        npcs_close_to_camera = game_world.get_npcs_intersecting_rect(get_rect_with_increased_size_in_all_directions(
+            camera_world_area, NPC_COARSE_SIMULATION_CAMERA_MARGIN))
+        for npc in npcs_close_to_camera:
+            if npc not in fully_simulated_npcs and (
+                    npc.last_simulated_at is None
+                    or self.game_state.timer_scheduler.now - npc.last_simulated_at >= NPC_COARSE_SIMULATION_INTERVAL):
+                npcs_to_simulate.append(self._start_simulating_npc(npc, time_passed, True))
+
+        # The remaining NPCs are visited in turn, so that each of them is updated about once per interval
+        npcs = game_world.non_player_characters
+        if npcs:
+            num_background_npcs = min(len(npcs), math.ceil(len(npcs) * time_passed / NPC_BACKGROUND_SIMULATION_INTERVAL))
+            npcs_close_to_camera = set(npcs_close_to_camera)
+            for _ in range(num_background_npcs):
+                self._next_background_npc_index %= len(npcs)
+                npc = npcs[self._next_background_npc_index]
+                self._next_background_npc_index += 1
+                if npc not in npcs_close_to_camera:
+                    npcs_to_simulate.append(self._start_simulating_npc(npc, time_passed, False))
+
+        return npcs_to_simulate
+
+    def _start_simulating_npc(self, npc: NonPlayerCharacter, time_passed: Millis, is_controlled: bool) \
+            -> _NpcToSimulate:
+        # An NPC that hasn't been simulated before (for instance one that was just spawned) only gets this frame
+        if npc.last_simulated_at is None:
+            npc_time_passed = time_passed
+        else:
+            npc_time_passed = Millis(self.game_state.timer_scheduler.now - npc.last_simulated_at)
+        npc.last_simulated_at = self.game_state.timer_scheduler.now
+        return _NpcToSimulate(npc, npc_time_passed, is_controlled)
 
     def _put_loot_on_ground(self, enemy_death_position: Tuple[int, int], loot: List[LootEntry]):
         for loot_entry in loot:
@@ -442,20 +522,32 @@ class GameEngine:
                 self.game_state.game_world.consumables_on_ground.append(consumable_on_ground)
 
 
-def _handle_buffs(active_buffs: List[BuffWithDuration], time_passed: Millis) -> AgentBuffsUpdate:
-    # NOTE: duplication between NPC's and player's buff handling
-    copied_buffs_list = list(active_buffs)
-    buffs_that_started = []
-    buffs_that_ended = []
-    buffs_that_were_active = []
-    for buff in copied_buffs_list:
-        buff.notify_time_passed(time_passed)
-        if not buff.has_been_force_cancelled:
-            buffs_that_were_active.append(buff)
-        if not buff.has_applied_start_effect:
-            buffs_that_started.append(buff)
-            buff.has_applied_start_effect = True
-        elif buff.has_expired():
-            active_buffs.remove(buff)
-            buffs_that_ended.append(buff)
-    return AgentBuffsUpdate(buffs_that_started, buffs_that_were_active, buffs_that_ended)
+def _start_buffs(game_state: GameState, buffs_to_start: List[BuffWithDuration], timer_scheduler: TimerScheduler,
+                 buffed_npc: Optional[NonPlayerCharacter]):
+    # Start effects can give new buffs, so the list may grow while we're working through it
+    while buffs_to_start:
+        buff = buffs_to_start.pop(0)
+        buff.buff_effect.apply_start_effect(game_state, _get_buffed_entity(game_state, buffed_npc), buffed_npc)
+        buff.start(timer_scheduler, lambda current_game_state, b=buff: _end_buff(current_game_state, b, buffed_npc))
+        interval = buff.buff_effect.get_periodic_effect_interval()
+        if interval is not None:
+            buff.start_periodic_effect(
+                interval, lambda current_game_state, b=buff: b.buff_effect.apply_periodic_effect(
+                    current_game_state, _get_buffed_entity(current_game_state, buffed_npc), buffed_npc))
+
+
+def _end_buff(game_state: GameState, buff: BuffWithDuration, buffed_npc: Optional[NonPlayerCharacter]):
+    buff.stop(game_state)
+    if buffed_npc:
+        buffed_npc.active_buffs.remove(buff)
+    else:
+        game_state.player_state.active_buffs.remove(buff)
+    buff.buff_effect.apply_end_effect(game_state, _get_buffed_entity(game_state, buffed_npc), buffed_npc)
+    if not buffed_npc:
+        game_state.player_state.notify_buff_observers()
+
+
+# The player's buffs are applied to the player entity of the current game state (which changes when entering or
+# leaving a dungeon)
+def _get_buffed_entity(game_state: GameState, buffed_npc: Optional[NonPlayerCharacter]) -> WorldEntity:
+    return buffed_npc.world_entity if buffed_npc else game_state.game_world.player_entity
@@ -1,4 +1,4 @@
-from typing import List, Tuple, Optional, Dict, Any
+from typing import List, Tuple, Optional, Dict, Any, Callable
 
 import pygame
 from pygame.rect import Rect
@@ -27,6 +27,7 @@ from pythongame.scenes.scenes_game.ui_events import TrySwitchItemInInventory, Ev
 COLOR_WHITE = (250, 250, 250)
 COLOR_BLACK = (0, 0, 0)
 COLOR_BORDER = COLOR_WHITE
+COLOR_PANEL_BACKGROUND = (20, 10, 0)
 UI_ICON_SIZE = (32, 32)
 UI_ICON_BIG_SIZE = (36, 36)
 PORTRAIT_ICON_SIZE = (100, 70)
@@ -86,6 +87,15 @@ class GameUiView:
         self.screen_render = DrawableArea(pygame_screen)
         self.ui_render = DrawableArea(pygame_screen, self._translate_ui_position_to_screen)
         self.ui_screen_area = Rect(0, camera_size[1], screen_size[0], screen_size[1] - camera_size[1])
+        # Most of the UI panel (icons, stat bars, minimap, buttons, etc) rarely changes, so rather than drawing all of
+        # it every frame, it's kept on a separate surface and only the parts that have changed are drawn again. The
+        # panel surfaces' coordinates are the same as the UI coordinates. Things that are drawn outside of the panel
+        # (windows, tooltips, buffs, etc) use ui_render and are drawn directly onto the screen every frame.
+        self._panel_surface = pygame.Surface(self.ui_screen_area.size, 0, pygame_screen)
+        # Changed parts of the panel are drawn here, and then copied to the panel surface. (Drawing directly onto the
+        # panel surface with a clip area doesn't work, as pygame draws rect outlines along the edges of the clip area.)
+        self._panel_drawing_surface = pygame.Surface(self.ui_screen_area.size, 0, pygame_screen)
+        self.panel_render = DrawableArea(self._panel_drawing_surface)
         self.camera_size = camera_size
         self.screen_size = screen_size
         self.ability_key_labels = ability_key_labels
@@ -123,10 +133,10 @@ class GameUiView:
         self.consumable_icons: List[ConsumableIcon] = []
         self.inventory_icons_rect: Rect = Rect(0, 0, 0, 0)
         self.inventory_icons: List[ItemIcon] = []
-        self.exp_bar = ExpBar(self.ui_render, Rect(135, 8, 300, 2), self.font_level)
-        self.minimap = Minimap(self.ui_render, Rect(475, 52, 80, 80), Rect(0, 0, 1, 1), (0, 0))
+        self.exp_bar = ExpBar(self.panel_render, Rect(135, 8, 300, 2), self.font_level)
+        self.minimap = Minimap(self.panel_render, Rect(475, 52, 80, 80), Rect(0, 0, 1, 1), (0, 0))
         self.buffs = Buffs(self.ui_render, self.font_buff_texts, (10, -35))
-        self.money_text = Text(self.ui_render, self.font_ui_money, (24, 150), "NO MONEY")
+        self.money_text = Text(self.panel_render, self.font_ui_money, (24, 150), "NO MONEY")
         self.talents_window: TalentsWindow = None
         self.quests_window: QuestsWindow = None
         self.message = Message(self.screen_render, self.font_message, self.ui_screen_area.w // 2,
@@ -146,6 +156,7 @@ class GameUiView:
         self._setup_toggle_buttons()
         self._setup_portrait()
         self._setup_dialog()
+        self._setup_panel_parts()
 
         # QUICKLY CHANGING STATE
         self.hovered_component = None
@@ -182,7 +193,8 @@ class GameUiView:
         for i in range(max_num_abilities):
             x = x_0 + i * (UI_ICON_SIZE[0] + icon_space)
             rect = Rect(x, y, UI_ICON_SIZE[0], UI_ICON_SIZE[1])
-            icon = AbilityIcon(self.ui_render, rect, None, None, self.font_ui_icon_keys, None, None, 0)
+            icon = AbilityIcon(self.panel_render, self.ui_render, rect, None, None, self.font_ui_icon_keys, None, None,
+                               0)
             self.ability_icons.append(icon)
 
     def _setup_consumable_icons(self):
@@ -202,8 +214,8 @@ class GameUiView:
             x = x_0 + i * (UI_ICON_SIZE[0] + icon_space)
             rect = Rect(x, y, UI_ICON_SIZE[0], UI_ICON_SIZE[1])
             slot_number = i + 1
-            icon = ConsumableIcon(self.ui_render, rect, None, str(slot_number), self.font_ui_icon_keys, None, [],
-                                  slot_number)
+            icon = ConsumableIcon(self.panel_render, self.ui_render, rect, None, str(slot_number),
+                                  self.font_ui_icon_keys, None, [], slot_number)
             self.consumable_icons.append(icon)
 
     def _setup_inventory_icons(self):
@@ -222,15 +234,15 @@ class GameUiView:
             x = x_0 + (i % num_slots_per_row) * (UI_ICON_SIZE[0] + icon_space)
             y = y_0 + (i // num_slots_per_row) * (UI_ICON_SIZE[1] + icon_space)
             rect = Rect(x, y, UI_ICON_SIZE[0], UI_ICON_SIZE[1])
-            icon = ItemIcon(self.ui_render, rect, None, None, None, None, i)
+            icon = ItemIcon(self.panel_render, rect, None, None, None, None, i)
             self.inventory_icons.append(icon)
 
     def _setup_health_and_mana_bars(self):
         rect_healthbar = Rect(20, 111, 100, 14)
-        self.healthbar = StatBar(self.ui_render, rect_healthbar, (200, 0, 50), None, 0, 1,
+        self.healthbar = StatBar(self.panel_render, rect_healthbar, (200, 0, 50), None, 0, 1,
                                  show_numbers=True, font=self.font_ui_stat_bar_numbers)
         rect_manabar = Rect(20, 132, 100, 14)
-        self.manabar = StatBar(self.ui_render, rect_manabar, (50, 0, 200), None, 0, 1,
+        self.manabar = StatBar(self.panel_render, rect_manabar, (50, 0, 200), None, 0, 1,
                                show_numbers=True, font=self.font_ui_stat_bar_numbers)
 
     def _setup_toggle_buttons(self):
@@ -239,21 +251,21 @@ class GameUiView:
         w = 150
         h = 20
         font = self.font_buttons
-        self.stats_toggle = ToggleButton(self.ui_render, Rect(x, y_0, w, h), font, "STATS    [A]", ToggleButtonId.STATS,
-                                         False, self.stats_window)
-        self.talents_toggle = ToggleButton(self.ui_render, Rect(x, y_0 + 25, w, h), font, "TALENTS  [N]",
+        self.stats_toggle = ToggleButton(self.panel_render, Rect(x, y_0, w, h), font, "STATS    [A]",
+                                         ToggleButtonId.STATS, False, self.stats_window)
+        self.talents_toggle = ToggleButton(self.panel_render, Rect(x, y_0 + 25, w, h), font, "TALENTS  [N]",
                                            ToggleButtonId.TALENTS, False, self.talents_window)
         # TODO Add hotkey, and handle that user input in this module
-        self.quests_toggle = ToggleButton(self.ui_render, Rect(x, y_0 + 50, w, h), font, "QUESTS   [B]",
+        self.quests_toggle = ToggleButton(self.panel_render, Rect(x, y_0 + 50, w, h), font, "QUESTS   [B]",
                                           ToggleButtonId.QUESTS, False, self.quests_window)
 
-        self.controls_toggle = ToggleButton(self.ui_render, Rect(x, y_0 + 75, w, h), font, "HELP     [H]",
+        self.controls_toggle = ToggleButton(self.panel_render, Rect(x, y_0 + 75, w, h), font, "HELP     [H]",
                                             ToggleButtonId.HELP, False, self.controls_window)
         self.toggle_buttons = [self.stats_toggle, self.talents_toggle, self.quests_toggle, self.controls_toggle]
-        self.sound_checkbox = Checkbox(self.ui_render, Rect(x, y_0 + 100, 70, h), "SOUND", True,
+        self.sound_checkbox = Checkbox(self.panel_render, Rect(x, y_0 + 100, 70, h), "SOUND", True,
                                        lambda _: ToggleSound())
-        self.save_button = Button(self.ui_render, Rect(x + 80, y_0 + 100, 70, h), "SAVE [S]", lambda: SaveGame())
-        self.fullscreen_checkbox = Checkbox(self.ui_render, Rect(x, y_0 + 125, w, h), "FULLSCREEN",
+        self.save_button = Button(self.panel_render, Rect(x + 80, y_0 + 100, 70, h), "SAVE [S]", lambda: SaveGame())
+        self.fullscreen_checkbox = Checkbox(self.panel_render, Rect(x, y_0 + 125, w, h), "FULLSCREEN",
                                             True, lambda _: ToggleFullscreen())
 
     def _setup_stats_window(self):
@@ -278,11 +290,41 @@ class GameUiView:
 
     def _setup_portrait(self):
         rect = Rect(20, 18, PORTRAIT_ICON_SIZE[0], PORTRAIT_ICON_SIZE[1])
-        self.portrait = Portrait(self.ui_render, rect, None)
+        self.portrait = Portrait(self.panel_render, rect, None)
 
     def _setup_dialog(self):
         self.dialog = Dialog(self.screen_render, None, None, [], 0, PORTRAIT_ICON_SIZE, UI_ICON_SIZE)
 
+    # The panel is rendered part by part. Each part has an area that covers everything that it draws (including labels
+    # and highlight borders outside of the components' rects), so that any area of the panel can be rendered again by
+    # rendering only the parts that overlap it.
+    def _setup_panel_parts(self):
+        self._consumable_icons_area = Rect(self.consumable_icons_row.x, self.consumable_icons_row.y - 30,
+                                           self.consumable_icons_row.w, self.consumable_icons_row.h + 50)
+        self._ability_icons_area = Rect(self.ability_icons_row.x, self.ability_icons_row.y,
+                                        self.ability_icons_row.w, self.ability_icons_row.h + 20)
+        self._inventory_icons_area = self.inventory_icons_rect.inflate(4, 4)
+        self._exp_bar_area = Rect(self.exp_bar.rect.x - 2, self.exp_bar.rect.y - 2, self.exp_bar.rect.w + 4, 30)
+        self._money_text_area = Rect(self.money_text.ui_position, (150, 20))
+        self._panel_parts: List[Tuple[Rect, Callable[[], None]]] = [
+            (self._consumable_icons_area, self._render_consumable_icons),
+            (self._ability_icons_area, self._render_ability_icons),
+            (self._inventory_icons_area, self._render_inventory_icons),
+            (self._get_component_area(self.minimap), self.minimap.render),
+            (self._exp_bar_area, self.exp_bar.render),
+            (self._get_component_area(self.portrait), self.portrait.render),
+            (self._get_component_area(self.healthbar), self.healthbar.render),
+            (self._get_component_area(self.manabar), self.manabar.render),
+            (self._money_text_area, self.money_text.render)]
+        # noinspection PyTypeChecker
+        for button in [self.sound_checkbox, self.save_button, self.fullscreen_checkbox] + self.toggle_buttons:
+            self._panel_parts.append((self._get_component_area(button), button.render))
+        # Areas of the panel (in UI coordinates) that have changed since the panel was last rendered
+        self._changed_panel_areas: List[Rect] = []
+        self._redraw_entire_panel()
+        # If anything is drawn on top of the panel (such as a tooltip), all of the panel is sent to the display
+        self._was_panel_covered = True
+
     # --------------------------------------------------------------------------------------------------------
     #                                     HANDLE USER INPUT
     # --------------------------------------------------------------------------------------------------------
@@ -335,22 +377,29 @@ class GameUiView:
         self._set_currently_hovered_component_not_hovered()
 
     def _on_hover_component(self, component):
+        if component is self.hovered_component:
+            return
         self._set_currently_hovered_component_not_hovered()
         self.hovered_component = component
         self.hovered_component.hovered = True
+        self._redraw_component(component)
 
     def _set_currently_hovered_component_not_hovered(self):
         if self.hovered_component is not None:
             self.hovered_component.hovered = False
+            self._redraw_component(self.hovered_component)
             self.hovered_component = None
 
     def handle_mouse_click(self) -> List[EventTriggeredFromUi]:
         if self.hovered_component in self.toggle_buttons:
             self._on_click_toggle(self.hovered_component)
         elif self.hovered_component in [self.save_button, self.fullscreen_checkbox, self.sound_checkbox]:
+            self._redraw_component(self.hovered_component)
             return [self.hovered_component.on_click()]
         elif self.hovered_component in self.inventory_icons and self.hovered_component.item_id:
             self.item_slot_being_dragged = self.hovered_component
+            # Slots where the item can be equipped are highlighted
+            self._redraw_panel_area(self._inventory_icons_area)
             return [StartDraggingItemOrConsumable()]
         elif self.hovered_component in self.consumable_icons and self.hovered_component.consumable_types:
             self.consumable_slot_being_dragged = self.hovered_component
@@ -379,6 +428,7 @@ class GameUiView:
                 event = DropItemOnGround(self.item_slot_being_dragged.inventory_slot_index, self.mouse_screen_position)
                 triggered_events.append(event)
             self.item_slot_being_dragged = None
+            self._redraw_panel_area(self._inventory_icons_area)
 
         if self.consumable_slot_being_dragged:
             if self.hovered_component in self.consumable_icons and self.hovered_component != self.consumable_slot_being_dragged:
@@ -428,6 +478,9 @@ class GameUiView:
 
     def _on_click_toggle(self, clicked_toggle: ToggleButton):
         play_sound(SoundId.UI_TOGGLE)
+        if self.enabled_toggle is not None:
+            self._redraw_component(self.enabled_toggle)
+        self._redraw_component(clicked_toggle)
         if clicked_toggle.is_open:
             self.enabled_toggle.close()
             self.enabled_toggle = None
@@ -440,6 +493,7 @@ class GameUiView:
 
     def close_talent_window(self):
         if self.enabled_toggle == self.talents_toggle:
+            self._redraw_component(self.enabled_toggle)
             self.enabled_toggle.close()
             self.enabled_toggle = None
             self._check_for_hovered_components()
@@ -452,18 +506,22 @@ class GameUiView:
         self._setup_talents_window(talents_state)
         if talents_state.has_unpicked_talents() and not self.talents_toggle.is_open:
             self.talents_toggle.highlighted = True
+            self._redraw_component(self.talents_toggle)
 
     def on_talent_was_unlocked(self, _event):
         if self.enabled_toggle != self.talents_toggle:
             self.talents_toggle.highlighted = True
+            self._redraw_component(self.talents_toggle)
 
     def on_ability_was_clicked(self, ability_type: AbilityType):
         self.highlighted_ability_action = ability_type
         self._ticks_since_last_ability_action = 0
+        self._redraw_panel_area(self._ability_icons_area)
 
     def on_consumable_was_clicked(self, slot_number: int):
         self.highlighted_consumable_action = slot_number
         self._ticks_since_last_consumable_action = 0
+        self._redraw_panel_area(self._consumable_icons_area)
 
     def on_player_movement_speed_updated(self, speed_multiplier: float):
         self.stats_window.player_speed_multiplier = speed_multiplier
@@ -472,6 +530,7 @@ class GameUiView:
         level, ratio_exp_until_next_level = event
         self.exp_bar.update(level, ratio_exp_until_next_level)
         self.stats_window.level = level
+        self._redraw_panel_area(self._exp_bar_area)
 
     def on_player_quests_updated(self, event: Tuple[List[Quest], List[Quest]]):
         active_quests, completed_quests = event
@@ -480,21 +539,27 @@ class GameUiView:
 
     def on_money_updated(self, money: int):
         self.money_text.text = "Money: " + str(money)
+        self._redraw_panel_area(self._money_text_area)
 
     def on_cooldowns_updated(self, ability_cooldowns_remaining: Dict[AbilityType, int]):
         for icon in self.ability_icons:
             ability_type = icon.ability_type
             if ability_type:
                 ability = ABILITIES[ability_type]
-                icon.cooldown_remaining_ratio = ability_cooldowns_remaining[ability_type] / ability.cooldown
+                cooldown_remaining_ratio = ability_cooldowns_remaining[ability_type] / ability.cooldown
+                if cooldown_remaining_ratio != icon.cooldown_remaining_ratio:
+                    icon.cooldown_remaining_ratio = cooldown_remaining_ratio
+                    self._redraw_component(icon)
 
     def on_health_updated(self, health: Tuple[int, int]):
         value, max_value = health
         self.healthbar.update(value, max_value)
+        self._redraw_component(self.healthbar)
 
     def on_mana_updated(self, mana: Tuple[int, int]):
         value, max_value = mana
         self.manabar.update(value, max_value)
+        self._redraw_component(self.manabar)
 
     def on_buffs_updated(self, active_buffs: List[BuffWithDuration]):
         buffs = []
@@ -535,6 +600,7 @@ class GameUiView:
                 label=key_string,
                 ability=ability,
                 ability_type=ability_type)
+        self._redraw_panel_area(self._ability_icons_area)
 
     def on_consumables_updated(self, consumable_slots: Dict[int, List[ConsumableType]]):
         for i, slot_number in enumerate(consumable_slots):
@@ -547,6 +613,7 @@ class GameUiView:
                 image = self.images_by_ui_sprite[consumable.icon_sprite]
 
             icon.update(image, consumable, consumable_types)
+        self._redraw_panel_area(self._consumable_icons_area)
 
     def on_inventory_updated(self, item_slots: List[ItemInventorySlot]):
         for i in range(len(item_slots)):
@@ -581,18 +648,23 @@ class GameUiView:
             icon.tooltip = tooltip
             icon.slot_equipment_category = slot_equipment_category
             icon.item_id = item_id
+        self._redraw_panel_area(self._inventory_icons_area)
 
     def on_fullscreen_changed(self, fullscreen: bool):
         self.fullscreen_checkbox.checked = fullscreen
+        # The screen has been replaced
+        self._redraw_entire_panel()
 
     def on_world_area_updated(self, world_area: Rect):
         self.minimap.update_world_area(world_area)
+        self._redraw_component(self.minimap)
 
     def on_walls_seen(self, seen_wall_positions: List[Tuple[int, int]]):
         self.minimap.add_walls(seen_wall_positions)
 
     def on_player_position_updated(self, center_position: Tuple[int, int]):
-        self.minimap.update_player_position(center_position)
+        if self.minimap.update_player_position(center_position):
+            self._redraw_component(self.minimap)
 
     # --------------------------------------------------------------------------------------------------------
     #                              HANDLE DIALOG USER INTERACTIONS
@@ -639,15 +711,20 @@ class GameUiView:
     # --------------------------------------------------------------------------------------------------------
 
     def update(self, time_passed: Millis):
-        self.minimap.update(time_passed)
+        if self.minimap.update(time_passed):
+            self._redraw_component(self.minimap)
 
         self._ticks_since_last_consumable_action += time_passed
-        if self._ticks_since_last_consumable_action > HIGHLIGHT_CONSUMABLE_ACTION_DURATION:
+        if self._ticks_since_last_consumable_action > HIGHLIGHT_CONSUMABLE_ACTION_DURATION \
+                and self.highlighted_consumable_action is not None:
             self.highlighted_consumable_action = None
+            self._redraw_panel_area(self._consumable_icons_area)
 
         self._ticks_since_last_ability_action += time_passed
-        if self._ticks_since_last_ability_action > HIGHLIGHT_ABILITY_ACTION_DURATION:
+        if self._ticks_since_last_ability_action > HIGHLIGHT_ABILITY_ACTION_DURATION \
+                and self.highlighted_ability_action is not None:
             self.highlighted_ability_action = None
+            self._redraw_panel_area(self._ability_icons_area)
 
         self.info_message.notify_time_passed(time_passed)
 
@@ -656,9 +733,12 @@ class GameUiView:
         image = self.images_by_portrait_sprite[sprite]
         self.portrait.image = image
         self.stats_window.hero_id = hero_id
+        self._redraw_component(self.portrait)
 
     def set_paused(self, paused: bool):
         self.paused_splash_screen.shown = paused
+        # Other scenes may have drawn over all of the screen
+        self._redraw_entire_panel()
 
     def update_fps_string(self, fps_string: str):
         self.fps_string = fps_string
@@ -668,20 +748,25 @@ class GameUiView:
 
     def remove_highlight_from_talent_toggle(self):
         self.talents_toggle.highlighted = False
+        self._redraw_component(self.talents_toggle)
 
     def set_minimap_highlight(self, position_ratio: Tuple[float, float]):
         self.minimap.set_highlight(position_ratio)
+        self._redraw_component(self.minimap)
 
     def remove_minimap_highlight(self):
         self.minimap.remove_highlight()
+        self._redraw_component(self.minimap)
 
     def set_inventory_highlight(self, item_id: ItemId):
         for icon in self.inventory_icons:
             if icon.item_id == item_id:
                 self.manually_highlighted_inventory_item = item_id
+        self._redraw_panel_area(self._inventory_icons_area)
 
     def remove_inventory_highlight(self):
         self.manually_highlighted_inventory_item = None
+        self._redraw_panel_area(self._inventory_icons_area)
 
     # --------------------------------------------------------------------------------------------------------
     #                                          RENDERING
@@ -710,21 +795,15 @@ class GameUiView:
                     mouse_screen_position[1] - relative_mouse_pos[1] - (UI_ICON_BIG_SIZE[1] - UI_ICON_SIZE[1]) // 2)
         self.screen_render.image(big_image, position)
 
-    def render(self):
-
-        self.screen_render.rect(COLOR_BORDER, Rect(0, 0, self.camera_size[0], self.camera_size[1]), 1)
-        self.screen_render.rect_filled((20, 10, 0), Rect(0, self.camera_size[1], self.screen_size[0],
-                                                         self.screen_size[1] - self.camera_size[1]))
-
-        # CONSUMABLES
-        self.ui_render.rect_filled((60, 60, 80), self.consumable_icons_row)
+    def _render_consumable_icons(self):
+        self.panel_render.rect_filled((60, 60, 80), self.consumable_icons_row)
         for icon in self.consumable_icons:
             # TODO treat this as state and update it elsewhere
             recently_clicked = icon.slot_number == self.highlighted_consumable_action
             icon.render(recently_clicked)
 
-        # ABILITIES
-        self.ui_render.rect_filled((60, 60, 80), self.ability_icons_row)
+    def _render_ability_icons(self):
+        self.panel_render.rect_filled((60, 60, 80), self.ability_icons_row)
         for icon in self.ability_icons:
             ability_type = icon.ability_type
             # TODO treat this as state and update it elsewhere
@@ -732,8 +811,8 @@ class GameUiView:
                 recently_clicked = ability_type == self.highlighted_ability_action
                 icon.render(recently_clicked)
 
-        # ITEMS
-        self.ui_render.rect_filled((60, 60, 80), self.inventory_icons_rect)
+    def _render_inventory_icons(self):
+        self.panel_render.rect_filled((60, 60, 80), self.inventory_icons_rect)
         for icon in self.inventory_icons:
             # TODO treat this as state and update it elsewhere
             highlighted = False
@@ -746,19 +825,48 @@ class GameUiView:
                 highlighted = True
             icon.render(highlighted)
 
-        # MINIMAP
-        self.minimap.render()
-
-        simple_components = [self.exp_bar, self.portrait, self.healthbar, self.manabar, self.money_text,
-                             self.buffs, self.sound_checkbox, self.save_button, self.fullscreen_checkbox,
-                             self.stats_window, self.talents_window, self.quests_window,
-                             self.controls_window] + self.toggle_buttons
-
-        for component in simple_components:
+    @staticmethod
+    def _get_component_area(component) -> Rect:
+        return component.rect.inflate(8, 8)
+
+    def _redraw_component(self, component):
+        self._redraw_panel_area(self._get_component_area(component))
+
+    def _redraw_panel_area(self, area: Rect):
+        # Components outside of the panel (like the talent icons) are drawn every frame anyway
+        area = area.clip(self._panel_surface.get_rect())
+        if area.w > 0 and area.h > 0:
+            self._changed_panel_areas.append(area)
+
+    def _redraw_entire_panel(self):
+        self._changed_panel_areas = [self._panel_surface.get_rect()]
+
+    # Returns the areas that were rendered again
+    def _render_panel(self) -> List[Rect]:
+        changed_areas = self._changed_panel_areas
+        self._changed_panel_areas = []
+        for area in changed_areas:
+            self.panel_render.rect_filled(COLOR_PANEL_BACKGROUND, area)
+            for part_area, render_part in self._panel_parts:
+                if part_area.colliderect(area):
+                    render_part()
+            self.panel_render.rect(COLOR_BORDER, self._panel_surface.get_rect(), 1)
+            self._panel_surface.blit(self._panel_drawing_surface, area, area)
+        return changed_areas
+
+    # Returns the areas of the screen that have changed, or None if all of it may have changed
+    def render(self) -> Optional[List[Rect]]:
+        camera_screen_area = Rect(0, 0, self.camera_size[0], self.camera_size[1])
+        self.screen_render.rect(COLOR_BORDER, camera_screen_area, 1)
+
+        is_entire_panel_changed = self._changed_panel_areas[:1] == [self._panel_surface.get_rect()]
+        changed_panel_areas = self._render_panel()
+        self.screen_render.image(self._panel_surface, self.ui_screen_area.topleft)
+
+        for component in [self.buffs, self.stats_window, self.talents_window, self.quests_window,
+                          self.controls_window]:
             component.render()
 
-        self.screen_render.rect(COLOR_BORDER, self.ui_screen_area, 1)
-
         self.screen_render.rect_transparent(Rect(1, 1, 70, 20), 100, COLOR_BLACK)
         self.screen_render.text(self.font_debug_info, "fps: " + self.fps_string, (6, 4))
         if self.game_mode_string:
@@ -778,9 +886,20 @@ class GameUiView:
 
         self.dialog.render()
 
-        if self.hovered_component and self.hovered_component.tooltip and not self.item_slot_being_dragged \
-                and not self.consumable_slot_being_dragged:
+        is_tooltip_shown = self.hovered_component and self.hovered_component.tooltip \
+                           and not self.item_slot_being_dragged and not self.consumable_slot_being_dragged
+        if is_tooltip_shown:
             tooltip: TooltipGraphics = self.hovered_component.tooltip
             tooltip.render()
 
         self.paused_splash_screen.render()
+
+        # Anything that was drawn on top of the panel needs to be sent to the display, and then it needs to be erased
+        # in the next frame
+        is_panel_covered = bool(is_tooltip_shown or self.item_slot_being_dragged or self.consumable_slot_being_dragged
+                                or self.dialog_state.active or self.paused_splash_screen.shown)
+        was_panel_covered = self._was_panel_covered
+        self._was_panel_covered = is_panel_covered
+        if is_entire_panel_changed or is_panel_covered or was_panel_covered:
+            return None
+        return [camera_screen_area] + [area.move(self.ui_screen_area.topleft) for area in changed_panel_areas]
@@ -32,12 +32,13 @@ class PausedScene(AbstractScene):
     def render(self):
         self.world_view.render_world(
             all_entities_to_render=self.game_state.get_all_entities_to_render(),
-            decorations_to_render=self.game_state.get_decorations_to_render(),
+            walls_state=self.game_state.game_world.walls_state,
+            decorations_state=self.game_state.game_world.decorations_state,
             player_entity=self.game_state.game_world.player_entity,
             is_player_invisible=self.game_state.player_state.is_invisible,
             player_active_buffs=self.game_state.player_state.active_buffs,
             camera_world_area=self.game_state.camera_world_area,
-            non_player_characters=self.game_state.game_world.non_player_characters,
+            non_player_characters=self.game_state.get_npcs_to_render(),
             visual_effects=self.game_state.game_world.visual_effects,
             render_hit_and_collision_boxes=False,
             player_health=self.game_state.player_state.health_resource.value,
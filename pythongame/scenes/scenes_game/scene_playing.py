@@ -1,4 +1,6 @@
-from typing import Optional, Any, List, Tuple, Callable
+from typing import Optional, Any, List, Tuple, Callable, Dict
+
+from pygame.rect import Rect
 
 import pythongame.core.pathfinding.npc_pathfinding
 import pythongame.core.pathfinding.npc_pathfinding
@@ -19,6 +21,7 @@ from pythongame.core.user_input import ActionTryUseAbility, ActionTryUsePotion,
     ActionChangeDialogOption, PlayingUserInputHandler, ActionRightMouseClicked, ActionPressKey
 from pythongame.core.view.game_world_view import GameWorldView
 from pythongame.core.world_behavior import DungeonBehavior
+from pythongame.core.world_entity import WorldEntity
 from pythongame.leveled_dungeons import create_dungeon_game_state
 from pythongame.player_file import SaveFileHandler
 from pythongame.scenes.scene_factory import AbstractSceneFactory
@@ -31,6 +34,9 @@ from pythongame.scenes.scenes_game.player_environment_interactions import Player
 from pythongame.scenes.scenes_game.scene_paused import PausedScene
 from pythongame.scenes.scenes_game.ui_events import ToggleFullscreen, ToggleWindow
 
+# Entities that move further than this in one frame (when teleporting for example) are rendered without interpolation
+MAX_INTERPOLATED_DISTANCE = 40
+
 
 class PlayingScene(AbstractScene):
     def __init__(self,
@@ -60,6 +66,9 @@ class PlayingScene(AbstractScene):
         self.save_file_handler = save_file_handler
         self.total_time_played_on_character = total_time_played_on_character
         self.toggle_fullscreen_callback = toggle_fullscreen_callback
+        self._render_interpolation = 1
+        self._positions_before_frame: Dict[WorldEntity, Tuple[int, int]] = {}
+        self._camera_position_before_frame: Tuple[int, int] = None
 
     def on_enter(self):
         self.ui_view.set_paused(False)
@@ -240,6 +249,10 @@ class PlayingScene(AbstractScene):
 
         self.total_time_played_on_character += time_passed
 
+        # Remember where things were before this frame, so that rendering can interpolate
+        self._positions_before_frame = self._get_positions_to_interpolate()
+        self._camera_position_before_frame = self.game_state.camera_world_area.topleft
+
         if not self.ui_view.has_open_dialog():
             self.player_interactions_state.handle_nearby_entities(
                 self.game_state.game_world.player_entity, self.game_state, self.game_engine)
@@ -259,7 +272,54 @@ class PlayingScene(AbstractScene):
 
         return None
 
-    def render(self):
+    def set_render_interpolation(self, interpolation: float):
+        self._render_interpolation = interpolation
+
+    def _get_positions_to_interpolate(self) -> Dict[WorldEntity, Tuple[int, int]]:
+        game_world = self.game_state.game_world
+        camera_world_area = self.game_state.camera_world_area.inflate(MAX_INTERPOLATED_DISTANCE * 2,
+                                                                      MAX_INTERPOLATED_DISTANCE * 2)
+        entities = [game_world.player_entity] + \
+                   [npc.world_entity for npc in game_world.get_npcs_intersecting_rect(camera_world_area)] + \
+                   [projectile.world_entity for projectile in game_world.projectile_entities]
+        return {entity: (entity.x, entity.y) for entity in entities}
+
+    def render(self) -> Optional[List[Rect]]:
+        # Moving entities (and the camera) are temporarily put part of the way between where they were before the
+        # last frame and where they are now. Their positions are only changed for rendering, not for the game world.
+        # The collision rect is moved along with the position, as it's what visual effects, texts, etc are drawn at.
+        # The actual positions are restored even if rendering fails, as the game state may be saved after a crash.
+        alpha = self._render_interpolation
+        actual_positions = []
+        camera_world_area = self.game_state.camera_world_area
+        actual_camera_position = camera_world_area.topleft
+        try:
+            for entity, (previous_x, previous_y) in self._positions_before_frame.items():
+                x, y = entity.x, entity.y
+                if abs(x - previous_x) + abs(y - previous_y) <= MAX_INTERPOLATED_DISTANCE:
+                    rect = entity.pygame_collision_rect
+                    actual_positions.append((entity, x, y, rect.topleft))
+                    entity.x = previous_x + (x - previous_x) * alpha
+                    entity.y = previous_y + (y - previous_y) * alpha
+                    rect.x = entity.x
+                    rect.y = entity.y
+            if self._camera_position_before_frame is not None:
+                previous_camera_x, previous_camera_y = self._camera_position_before_frame
+                if abs(actual_camera_position[0] - previous_camera_x) + \
+                        abs(actual_camera_position[1] - previous_camera_y) <= MAX_INTERPOLATED_DISTANCE:
+                    camera_world_area.topleft = (
+                        round(previous_camera_x + (actual_camera_position[0] - previous_camera_x) * alpha),
+                        round(previous_camera_y + (actual_camera_position[1] - previous_camera_y) * alpha))
+
+            return self._render()
+        finally:
+            for entity, x, y, rect_position in actual_positions:
+                entity.x = x
+                entity.y = y
+                entity.pygame_collision_rect.topleft = rect_position
+            camera_world_area.topleft = actual_camera_position
+
+    def _render(self) -> Optional[List[Rect]]:
 
         entity_action_text = None
         # Don't display any actions on screen if player is stunned. It would look weird when using warp stones
@@ -271,12 +331,13 @@ class PlayingScene(AbstractScene):
         game_world = self.game_state.game_world
         self.world_view.render_world(
             all_entities_to_render=self.game_state.get_all_entities_to_render(),
-            decorations_to_render=self.game_state.get_decorations_to_render(),
+            walls_state=game_world.walls_state,
+            decorations_state=game_world.decorations_state,
             player_entity=game_world.player_entity,
             is_player_invisible=player_state.is_invisible,
             player_active_buffs=player_state.active_buffs,
             camera_world_area=self.game_state.get_camera_world_area_including_camera_shake(),
-            non_player_characters=game_world.non_player_characters,
+            non_player_characters=self.game_state.get_npcs_to_render(),
             visual_effects=game_world.visual_effects,
             render_hit_and_collision_boxes=self.render_hit_and_collision_boxes,
             player_health=player_state.health_resource.value,
@@ -284,7 +345,7 @@ class PlayingScene(AbstractScene):
             entire_world_area=game_world.entire_world_area,
             entity_action_text=entity_action_text)
 
-        self.ui_view.render()
+        return self.ui_view.render()
 
     def _save_game(self):
         play_sound(SoundId.EVENT_SAVED_GAME)
@@ -315,12 +315,14 @@ class TooltipGraphics:
         return TooltipGraphics(ui_render, COLOR_WHITE, "\"Smart floor\"", details, bottom_left=bottom_left)
 
 
+# The icon and its tooltip may be rendered onto different surfaces, as the tooltip can extend outside of the UI panel
 class AbilityIcon(UiComponent):
-    def __init__(self, ui_render: DrawableArea, rect: Rect, image, label: Optional[str], font,
-                 tooltip: Optional[TooltipGraphics], ability_type: Optional[AbilityType],
+    def __init__(self, ui_render: DrawableArea, tooltip_render: DrawableArea, rect: Rect, image, label: Optional[str],
+                 font, tooltip: Optional[TooltipGraphics], ability_type: Optional[AbilityType],
                  cooldown_remaining_ratio: float):
         super().__init__(rect)
         self._ui_render = ui_render
+        self._tooltip_render = tooltip_render
         self._font = font
         self.image = image
         self.label = label
@@ -354,18 +356,20 @@ class AbilityIcon(UiComponent):
             tooltip_details = [DetailLine("Cooldown: " + str(ability.cooldown / 1000.0) + " s"),
                                DetailLine("Mana: " + str(ability.mana_cost)),
                                DetailLine(ability.description)]
-            self.tooltip = TooltipGraphics(self._ui_render, COLOR_WHITE, ability.name, tooltip_details,
+            self.tooltip = TooltipGraphics(self._tooltip_render, COLOR_WHITE, ability.name, tooltip_details,
                                            bottom_left=self.rect.topleft)
         else:
             self.tooltip = None
         self.ability_type = ability_type
 
 
+# The icon and its tooltip may be rendered onto different surfaces, as the tooltip can extend outside of the UI panel
 class ConsumableIcon(UiComponent):
-    def __init__(self, ui_render: DrawableArea, rect: Rect, image, label: str, font, tooltip: Optional[TooltipGraphics],
-                 consumable_types: List[ConsumableType], slot_number: int):
+    def __init__(self, ui_render: DrawableArea, tooltip_render: DrawableArea, rect: Rect, image, label: str, font,
+                 tooltip: Optional[TooltipGraphics], consumable_types: List[ConsumableType], slot_number: int):
         super().__init__(rect)
         self._ui_render = ui_render
+        self._tooltip_render = tooltip_render
         self._image = image
         self._label = label
         self._font = font
@@ -404,7 +408,8 @@ class ConsumableIcon(UiComponent):
         self._image = image
         self.consumable_types = consumable_types
         if top_consumable:
-            self.tooltip = TooltipGraphics.create_for_consumable(self._ui_render, top_consumable, self.rect.topleft)
+            self.tooltip = TooltipGraphics.create_for_consumable(self._tooltip_render, top_consumable,
+                                                                 self.rect.topleft)
         else:
             self.tooltip = None
 
@@ -1030,8 +1035,11 @@ class Minimap(UiComponent):
             self._rect_inner.w /= world_area.h / world_area.w
             self._rect_inner.x = self.rect.x + self.rect.w // 2 - self._rect_inner.w // 2
 
-    def update_player_position(self, center_position: Tuple[int, int]):
+    # Returns whether the player's dot on the minimap was moved
+    def update_player_position(self, center_position: Tuple[int, int]) -> bool:
+        previous_dot_rect = self._get_player_dot_rect()
         self._player_position = center_position
+        return self._get_player_dot_rect() != previous_dot_rect
 
     def add_walls(self, wall_positions: List[Tuple[int, int]]):
         for pos in wall_positions:
@@ -1053,9 +1061,12 @@ class Minimap(UiComponent):
     def get_position_ratio(self, point: Tuple[int, int]) -> Tuple[float, float]:
         return (point[0] - self.rect.x) / self.rect.w, (point[1] - self.rect.y) / self.rect.h
 
-    def update(self, time_passed: Millis):
+    # Returns whether the walls that are shown on the minimap were updated
+    def update(self, time_passed: Millis) -> bool:
         if self._timer.update_and_check_if_ready(time_passed):
             self._update_wall_pixel_positions()
+            return True
+        return False
 
     def update_camera_area(self, camera_world_area: Rect):
         self.camera_rect_ratio = ((camera_world_area.x - self._world_area.x) / self._world_area.w,
@@ -1092,11 +1103,7 @@ class Minimap(UiComponent):
         for pos in self._wall_pixel_positions:
             self._ui_render.rect((100, 100, 100), Rect(pos[0], pos[1], 1, 1), 1)
 
-        player_relative_position = get_relative_pos_within_rect(self._player_position, self._world_area)
-        dot_x = rect[0] + player_relative_position[0] * rect.w
-        dot_y = rect[1] + player_relative_position[1] * rect.h
-        dot_w = 4
-        self._ui_render.rect_filled((100, 160, 100), Rect(dot_x - dot_w / 2, dot_y - dot_w / 2, dot_w, dot_w))
+        self._ui_render.rect_filled((100, 160, 100), self._get_player_dot_rect())
 
         if self.camera_rect_ratio:
             self._ui_render.rect(
@@ -1107,6 +1114,14 @@ class Minimap(UiComponent):
                      self.camera_rect_ratio[3] * rect.h),
                 1)
 
+    def _get_player_dot_rect(self) -> Rect:
+        rect = self._rect_inner
+        player_relative_position = get_relative_pos_within_rect(self._player_position, self._world_area)
+        dot_x = rect[0] + player_relative_position[0] * rect.w
+        dot_y = rect[1] + player_relative_position[1] * rect.h
+        dot_w = 4
+        return Rect(dot_x - dot_w / 2, dot_y - dot_w / 2, dot_w, dot_w)
+
     def set_highlight(self, position_ratio: Tuple[float, float]):
         self._highlight_pos_ratio = position_ratio
 
@@ -20,7 +20,7 @@ def register_game_state_observers(game_state: GameState, ui_view: GameUiView, in
     game_state.game_world.player_entity.position_changed = Observable()
     game_state.game_world.player_entity.position_changed.register_observer(ui_view.on_player_position_updated)
     game_state.game_world.player_entity.position_changed.register_observer(
-        lambda _: ui_view.on_walls_seen([w.get_position() for w in game_state.get_walls_in_sight_of_player()]))
+        lambda _: ui_view.on_walls_seen(game_state.get_wall_positions_in_sight_of_player()))
     game_state.game_world.player_entity.notify_position_observers()  # Must notify the initial state
 
     if include_player_state:
@@ -1,16 +1,28 @@
 #!/usr/bin/env python3
 
 import argparse
+import multiprocessing
 
-from pythongame import main
+if __name__ == '__main__':
+    # Pathfinding worker processes (see --pathfinding_workers) re-import this file. They must not start the game, and
+    # shouldn't import it either (as that would load pygame and all of the game data in each of them).
+    multiprocessing.freeze_support()
+    from pythongame import main
 
-parser = argparse.ArgumentParser()
-parser.add_argument('--map')
-parser.add_argument('--hero')
-parser.add_argument('--level')
-parser.add_argument('--money')
-parser.add_argument('--file')
-parser.add_argument('--disable_fullscreen', action='store_true')
-args = parser.parse_args()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--map')
+    parser.add_argument('--hero')
+    parser.add_argument('--level')
+    parser.add_argument('--money')
+    parser.add_argument('--file')
+    parser.add_argument('--disable_fullscreen', action='store_true')
+    parser.add_argument('--pathfinding_workers', type=int, default=0)
+    parser.add_argument('--simulation_rate', type=int, default=main.DEFAULT_SIMULATION_RATE)
+    parser.add_argument('--max_fps', type=int, default=main.DEFAULT_MAX_RENDER_RATE)
+    parser.add_argument('--sprite_memory_budget_mb', type=int)
+    parser.add_argument('--disable_sprite_cache', action='store_true')
+    args = parser.parse_args()
 
-main.start(args.map, args.hero, args.level, args.money, args.file, not args.disable_fullscreen)
+    main.start(args.map, args.hero, args.level, args.money, args.file, not args.disable_fullscreen,
+               args.pathfinding_workers, args.simulation_rate, args.max_fps, args.sprite_memory_budget_mb,
+               not args.disable_sprite_cache)
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+
+import argparse
+
+from pythongame.core.common import HeroId, Millis
+from pythongame.headless_simulation import HeadlessSimulation
+from pythongame.register_game_data import register_all_game_data
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the game engine without display or audio")
+    parser.add_argument('--map', default='map1.json')
+    parser.add_argument('--hero', default='MAGE')
+    parser.add_argument('--seconds', type=int, default=60, help="Simulated seconds")
+    parser.add_argument('--frame_time', type=int, default=16, help="Simulated milliseconds per frame")
+    args = parser.parse_args()
+
+    register_all_game_data()
+    simulation = HeadlessSimulation('resources/maps/' + args.map, HeroId[args.hero], Millis(args.frame_time))
+    result = simulation.run(Millis(args.seconds * 1000))
+
+    print("Simulated %i frames (%.1f seconds) in %.2f seconds" % (
+        result.num_frames, result.simulated_time / 1000, result.wall_clock_seconds))
+    print("Simulated seconds per wall-clock second: %.1f" % result.get_simulated_seconds_per_wall_clock_second())
+    if result.player_died:
+        print("The player died")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import argparse
+import random
+import sys
+from collections import deque
+from typing import List, Tuple, Optional
+
+from pythongame.core.pathfinding.clearance_map import ClearanceMap
+from pythongame.core.pathfinding.grid_astar_pathfinder import GridBasedJumpPointSearch
+
+
+def create_random_grid(width: int, height: int, wall_ratio: float) -> List[List[int]]:
+    return [[1 if random.random() < wall_ratio else 0 for _ in range(height)] for _ in range(width)]
+
+
+# Number of steps along a shortest path, or None if there is no path
+def get_breadth_first_search_path_length(is_cell_free, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[int]:
+    distances = {start: 0}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        if (x, y) == goal:
+            return distances[goal]
+        for neighbor in ((x, y - 1), (x - 1, y), (x + 1, y), (x, y + 1)):
+            if neighbor not in distances and is_cell_free(neighbor[0], neighbor[1]):
+                distances[neighbor] = distances[(x, y)] + 1
+                queue.append(neighbor)
+    return None
+
+
+def is_valid_path(is_cell_free, path: List[Tuple[int, int]], start: Tuple[int, int], goal: Tuple[int, int]) -> bool:
+    if path[0] != start or path[-1] != goal:
+        return False
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        if abs(x1 - x0) + abs(y1 - y0) != 1 or not is_cell_free(x1, y1):
+            return False
+    return True
+
+
+# Jump Point Search prunes most of the grid, so this checks that it still finds paths that are as short as the ones
+# that a breadth-first search finds
+def check_jump_point_search(num_grids: int, size: int) -> int:
+    num_failures = 0
+    num_paths = 0
+    for _ in range(num_grids):
+        clearance_map = ClearanceMap(create_random_grid(size, size, random.uniform(0.2, 0.3)))
+        jps = GridBasedJumpPointSearch(clearance_map, (1, 1))
+        jps.set_pathfinding_bounds(0, 0, size - 1, size - 1)
+        free_cells = [(x, y) for x in range(size) for y in range(size) if jps.is_cell_free_for_agent(x, y)]
+        start = random.choice(free_cells)
+        goal = random.choice(free_cells)
+        expected_length = get_breadth_first_search_path_length(jps.is_cell_free_for_agent, start, goal)
+        path = jps.find_path_within_bounds(start, goal, (0, 0, size - 1, size - 1))
+        if expected_length is None:
+            if path is not None:
+                print("Found a path where there is none: %s -> %s" % (start, goal))
+                num_failures += 1
+            continue
+        num_paths += 1
+        if path is None or not is_valid_path(jps.is_cell_free_for_agent, path, start, goal) \
+                or len(path) - 1 != expected_length:
+            print("%s -> %s: expected %i steps, got %s" % (
+                start, goal, expected_length, "no path" if path is None else str(len(path) - 1) + " steps"))
+            num_failures += 1
+    print("Checked %i paths on %i grids: %i failures" % (num_paths, num_grids, num_failures))
+    return num_failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare Jump Point Search paths with breadth-first search")
+    parser.add_argument('--grids', type=int, default=1000)
+    parser.add_argument('--size', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    sys.exit(1 if check_jump_point_search(args.grids, args.size) > 0 else 0)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import time
+
+# The benchmark doesn't need a window
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from pygame.rect import Rect
+
+from pythongame.core.view.render_util import DrawableArea
+
+# Roughly what's drawn in a frame with the talent window open and a tooltip and some loot texts shown
+TYPICAL_UI_OVERLAYS = [
+    (Rect(1, 1, 70, 20), 100, (0, 0, 0)),  # fps
+    (Rect(1, 23, 70, 20), 100, (0, 0, 0)),  # game mode
+    (Rect(300, 80, 220, 180), 220, (0, 0, 0)),  # tooltip
+    (Rect(10, 50, 244, 300), 200, (0, 0, 0)),  # talent window
+    (Rect(20, 90, 220, 40), 120, (250, 250, 250)),  # hovered talent choice
+    (Rect(330, 310, 36, 36), 150, (50, 0, 0)),  # ability on cooldown
+    (Rect(370, 310, 36, 36), 150, (50, 0, 0)),  # ability on cooldown
+    (Rect(410, 200, 130, 40), 150, (0, 0, 0)),  # loot text
+    (Rect(560, 240, 110, 56), 150, (0, 0, 0)),  # loot text
+]
+
+
+def render_overlays_without_cache(screen):
+    # This is how DrawableArea.rect_transparent used to render overlays
+    for rect, alpha, color in TYPICAL_UI_OVERLAYS:
+        surface = pygame.Surface((rect[2], rect[3]))
+        surface.set_alpha(alpha)
+        surface.fill(color)
+        screen.blit(surface, (rect[0], rect[1]))
+
+
+def render_overlays_with_cache(screen_render: DrawableArea):
+    for rect, alpha, color in TYPICAL_UI_OVERLAYS:
+        screen_render.rect_transparent(rect, alpha, color)
+
+
+def measure_millis_per_frame(render_frame, num_frames: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(num_frames):
+        render_frame()
+    return (time.perf_counter() - start_time) * 1000 / num_frames
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure the cost of rendering the game's translucent UI overlays")
+    parser.add_argument('--frames', type=int, default=2000)
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600))
+    screen_render = DrawableArea(screen)
+
+    millis_without_cache = measure_millis_per_frame(lambda: render_overlays_without_cache(screen), args.frames)
+    millis_with_cache = measure_millis_per_frame(lambda: render_overlays_with_cache(screen_render), args.frames)
+
+    print("%i overlays per frame, %i frames" % (len(TYPICAL_UI_OVERLAYS), args.frames))
+    print("Allocating a surface per overlay: %.3f ms/frame" % millis_without_cache)
+    print("Reusing cached surfaces:          %.3f ms/frame" % millis_with_cache)